@@ -0,0 +1,31 @@
+"""Build hook that precompiles the packaged templates into the wheel."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+from setuptools import setup
+from setuptools.command.build_py import build_py
+
+SOURCE = Path(__file__).resolve().parent / "src" / "peripheralyzer"
+
+
+def _template_bundle():
+    # Load the module on its own; importing the package would pull in runtime-only dependencies.
+    spec = importlib.util.spec_from_file_location("_peripheralyzer_template_bundle", SOURCE / "template_bundle.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class BuildPyWithTemplateBundle(build_py):
+    def run(self) -> None:
+        super().run()
+        if not self.dry_run:
+            package_dir = Path(self.build_lib) / "peripheralyzer"
+            bundle = _template_bundle().compile_template_bundle(SOURCE / "templates", package_dir)
+            self.announce(f"precompiled templates into {bundle}", level=2)
+
+
+setup(cmdclass={"build_py": BuildPyWithTemplateBundle})
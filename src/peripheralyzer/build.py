@@ -0,0 +1,219 @@
+"""Generate code straight from a CMSIS-SVD file without the intermediate YAML round trip."""
+
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from .bundle import render_bundle
+from .command_help import BUILD_HELP
+from .generate import GenerateOptions, PeripheralGenerator, YamlLoader
+from .ir import IR_VERSIONS, NATIVE_IR_VERSION
+from .output import write_if_changed
+from .paths import CACHE_DIR_ENV, package_templates_root
+from .transmogrify import MemoryYamlDumper, Transmogrifier, TransmogrifyOptions
+
+
+@dataclass(slots=True)
+class BuildOptions:
+    transmogrify: TransmogrifyOptions
+    generate: GenerateOptions
+
+    @classmethod
+    def from_namespace(cls, args: argparse.Namespace) -> "BuildOptions":
+        yaml_root = None if args.yaml_root is None else Path(args.yaml_root)
+        transmogrify = TransmogrifyOptions(
+            banner=False,
+            svd=Path(args.svd),
+            namespaces=list(args.namespace or []),
+            name_map=Path(args.name_map),
+            yaml_root=yaml_root if yaml_root is not None else Path(os.getcwd()),
+            verbose=bool(args.verbose),
+            dry_run=yaml_root is None,
+            emit_fragment=None,
+            fragment_cpp_root=None,
+            fragment_templates=[],
+            fragment_aggregate_target="",
+            preserve_name_map=bool(args.preserve_name_map),
+            stream=bool(args.stream),
+            jobs=1,
+            incremental=False,
+            ir_version=int(args.ir_version),
+            bundle=None if args.bundle is None else Path(args.bundle),
+            dedupe=bool(args.dedupe),
+            reuse_derived=bool(args.reuse_derived),
+            compact_arrays=bool(args.compact_arrays),
+        )
+        generate_args = argparse.Namespace(**vars(args))
+        generate_args.yaml_root = None
+        generate_args.banner = False
+        return cls(transmogrify=transmogrify, generate=GenerateOptions.from_namespace(generate_args))
+
+
+class Builder:
+    """Transmogrify an SVD into memory and render the peripherals from those documents directly.
+
+    Name maps are resolved exactly as ``transmogrify`` resolves them. The yaml
+    files (or a bundle) are only written when asked for, as a side output.
+    """
+
+    def __init__(self, options: BuildOptions) -> None:
+        self.options = options
+        self.dumper = MemoryYamlDumper(
+            dry_run=options.transmogrify.dry_run, verbose=options.transmogrify.verbose
+        )
+        self.transmogrifier = Transmogrifier(options.transmogrify, dumper=self.dumper)
+
+    def run(self) -> int:
+        transmogrify = self.options.transmogrify
+        if not transmogrify.dry_run:
+            transmogrify.yaml_root.mkdir(parents=True, exist_ok=True)
+        self.transmogrifier.transmogrify()
+        if transmogrify.bundle is not None:
+            write_if_changed(
+                transmogrify.bundle,
+                render_bundle({name: self.dumper.render(data) for name, data in self.dumper.documents.items()}),
+            )
+        self.transmogrifier.save_name_map()
+
+        loader = YamlLoader(None, verbose=self.options.generate.verbose, documents=self.dumper.documents)
+        return PeripheralGenerator(self.options.generate, loader).run()
+
+
+class BuildCommand:
+    name = "build"
+    help = BUILD_HELP
+
+    def configure_parser(self, parser: argparse.ArgumentParser) -> None:
+        parser.description = self.help
+        parser.add_argument("-s", "--svd", type=str, required=True, help="The CMSIS SVD file")
+        parser.add_argument(
+            "-t",
+            "--template",
+            type=str,
+            action="append",
+            required=True,
+            help="The template to use to generate the code (appendable)",
+        )
+        parser.add_argument(
+            "-y",
+            "--yaml",
+            type=str,
+            action="append",
+            help="Only render the peripheral documents matching this glob, e.g. peripheral_GPIO*.yml (appendable)",
+        )
+        parser.add_argument(
+            "-ns",
+            "--namespace",
+            type=str,
+            action="append",
+            help="The namespaces to use in the file (appendable)",
+        )
+        parser.add_argument(
+            "-nm",
+            "--name-map",
+            type=str,
+            default="name_map.yml",
+            help="The dictionary of name mappings",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            type=str,
+            default=os.getcwd(),
+            help="[optional] the output path if given (default:%(default)s)",
+        )
+        parser.add_argument(
+            "-tr",
+            "--template-root",
+            type=str,
+            default=os.fspath(package_templates_root()),
+            help="The location where the templates are kept (default=%(default)s)",
+        )
+        parser.add_argument(
+            "-yr",
+            "--yaml-root",
+            type=str,
+            default=None,
+            help="Also write the intermediate yaml files into this folder",
+        )
+        parser.add_argument(
+            "--bundle",
+            type=str,
+            metavar="FILE",
+            default=None,
+            help="Also write the intermediate yaml documents as a single device bundle",
+        )
+        parser.add_argument(
+            "--ir-version",
+            type=int,
+            choices=IR_VERSIONS,
+            default=NATIVE_IR_VERSION,
+            help="Representation of the intermediate documents (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--dedupe",
+            action="store_true",
+            help="Share identical register and enum documents between peripherals (see transmogrify --dedupe)",
+        )
+        parser.add_argument(
+            "--reuse-derived",
+            action="store_true",
+            help="Let derivedFrom peripherals reference their parent's register and enum documents",
+        )
+        parser.add_argument(
+            "--compact-arrays",
+            action="store_true",
+            help="Keep SVD dim register arrays and clusters whole (see transmogrify --compact-arrays)",
+        )
+        parser.add_argument("-v", "--verbose", action="store_true", help="Print verbose information.")
+        parser.add_argument(
+            "-a",
+            "--anonymous",
+            action="store_true",
+            help="Disable padding with named reserved fields",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Walk the SVD one peripheral at a time with an incremental parser instead of loading the whole device",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Number of worker processes used to render peripherals, 0 uses every CPU (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--bytecode-cache",
+            type=str,
+            metavar="DIR",
+            default=None,
+            help=f"Directory for compiled template bytecode (default: ${CACHE_DIR_ENV}/jinja or the user cache dir)",
+        )
+        parser.add_argument(
+            "--no-bytecode-cache",
+            action="store_true",
+            help="Always compile templates from source",
+        )
+        parser.add_argument(
+            "--expand-name-map",
+            action="store_false",
+            dest="preserve_name_map",
+            help="Allow the name map to be auto-expanded with new entries (legacy behavior)",
+        )
+
+    def run(self, args: argparse.Namespace) -> int:
+        return Builder(BuildOptions.from_namespace(args)).run()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="peripheralyzer build")
+    command = BuildCommand()
+    command.configure_parser(parser)
+    args = parser.parse_args(argv)
+    return command.run(args)
@@ -0,0 +1,106 @@
+"""Single-file device bundles holding every yaml document transmogrify produces.
+
+A bundle is a YAML stream. The first document is an index that maps each
+yaml filename (``peripheral_GPIOA.yml``, ``register_GPIOA_MODER.yml``, ...)
+to the byte offset and length of its text in the rest of the file, so a
+single document can be read and parsed without touching the others.
+Documents with identical text, such as the registers and enums of sibling
+peripherals, are stored once and shared by every name that refers to them.
+
+Consumers accept a bundle wherever they accept a yaml root directory; the
+filenames inside it behave exactly like files in that directory.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from .yaml_io import safe_dump, safe_load
+
+BUNDLE_KEY = "peripheralyzer_bundle"
+BUNDLE_VERSION = 1
+_SEPARATOR = b"---\n"
+
+
+def render_bundle(documents: Mapping[str, str]) -> str:
+    """Render yaml documents, keyed by filename, as a bundle."""
+    body = bytearray()
+    spans: dict[bytes, list[int]] = {}
+    index: dict[str, list[int]] = {}
+    for name in sorted(documents):
+        data = documents[name].encode("utf-8")
+        if data not in spans:
+            body += _SEPARATOR
+            spans[data] = [len(body), len(data)]
+            body += data
+        index[name] = spans[data]
+    header = safe_dump(
+        {BUNDLE_KEY: BUNDLE_VERSION, "documents": index},
+        default_flow_style=None,
+        sort_keys=False,
+    )
+    return header + body.decode("utf-8")
+
+
+class DeviceBundle:
+    """Read access to a bundle; documents are only parsed when they are loaded."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as handle:
+            header = bytearray()
+            for line in handle:
+                if line == _SEPARATOR:
+                    break
+                header += line
+        index = safe_load(bytes(header))
+        if not isinstance(index, dict) or index.get(BUNDLE_KEY) != BUNDLE_VERSION:
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} peripheralyzer bundle")
+        self._body_start = len(header)
+        self._spans: dict[str, tuple[int, int]] = {
+            str(name): (int(offset), int(length)) for name, (offset, length) in index["documents"].items()
+        }
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._spans
+
+    def names(self) -> list[str]:
+        return sorted(self._spans)
+
+    def glob(self, pattern: str) -> list[str]:
+        return [name for name in self.names() if fnmatch.fnmatchcase(name, pattern)]
+
+    def text(self, name: str) -> str:
+        try:
+            offset, length = self._spans[name]
+        except KeyError:
+            raise FileNotFoundError(f"{name} is not in bundle {self.path}") from None
+        with self.path.open("rb") as handle:
+            handle.seek(self._body_start + offset)
+            return handle.read(length).decode("utf-8")
+
+    def load(self, name: str) -> Any:
+        return safe_load(self.text(name))
+
+
+_open_bundles: dict[Path, tuple[tuple[int, int], DeviceBundle]] = {}
+
+
+def open_bundle(path: Path) -> DeviceBundle:
+    """Open a bundle, reusing the parsed index for as long as the file is unchanged."""
+    stat = path.stat()
+    key = path.resolve()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _open_bundles.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, DeviceBundle(path))
+        _open_bundles[key] = cached
+    return cached[1]
+
+
+def is_bundle(path: Path | None) -> bool:
+    """Whether a yaml root given on the command line is a bundle rather than a directory."""
+    return path is not None and path.is_file()
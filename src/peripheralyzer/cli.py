@@ -3,16 +3,11 @@
 from __future__ import annotations
 
 import argparse
-from collections.abc import Iterable, Mapping, Sequence
-from dataclasses import dataclass
+import importlib
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
 
-from .generate import GenerateCommand
-from .map_diff import MapDiffCommand
-from .merge_name_maps import MergeNameMapsCommand
-from .peripheral_duplicate_finder import PeripheralDuplicateFinderCommand
-from .track_name_map_changes import TrackNameMapChangesCommand
-from .transmogrify import TransmogrifyCommand
-from .verify_name_map import VerifyNameMapCommand
+from . import command_help
 
 
 class CLICommand:
@@ -28,6 +23,59 @@ class CLICommand:
         raise NotImplementedError
 
 
+@dataclass(slots=True)
+class LazyCommand:
+    """A command descriptor that imports its implementation only when it is used.
+
+    Keeps ``peripheralyzer <command>`` from paying for the imports (jinja2,
+    rich, cmsis_svd, ...) of every other command on each invocation.
+    """
+
+    name: str
+    help: str
+    module: str
+    attribute: str
+    _command: CLICommand | None = field(default=None, repr=False, compare=False)
+
+    def load(self) -> CLICommand:
+        if self._command is None:
+            command = getattr(importlib.import_module(self.module, __package__), self.attribute)()
+            command.name = self.name
+            self._command = command
+        return self._command
+
+    def configure_parser(self, parser: argparse.ArgumentParser) -> None:
+        self.load().configure_parser(parser)
+
+    def run(self, args: argparse.Namespace) -> int:
+        return self.load().run(args)
+
+
+class _DeferredParser(argparse.ArgumentParser):
+    """Subcommand parser whose arguments are only added once it parses or prints help."""
+
+    def defer(self, configure: Callable[[argparse.ArgumentParser], None]) -> None:
+        self._configure: Callable[[argparse.ArgumentParser], None] | None = configure
+
+    def _ensure_configured(self) -> None:
+        configure = getattr(self, "_configure", None)
+        if configure is not None:
+            self._configure = None
+            configure(self)
+
+    def parse_known_args(self, args=None, namespace=None):  # type: ignore[override]
+        self._ensure_configured()
+        return super().parse_known_args(args, namespace)
+
+    def format_usage(self) -> str:
+        self._ensure_configured()
+        return super().format_usage()
+
+    def format_help(self) -> str:
+        self._ensure_configured()
+        return super().format_help()
+
+
 @dataclass(slots=True)
 class CLICommandGroup:
     """A group of related CLI commands with a common namespace."""
@@ -46,7 +94,7 @@ class PeripheralyzerCLI:
             prog="peripheralyzer",
             description="Generate code and manage name maps for memory-mapped peripherals.",
         )
-        subparsers = parser.add_subparsers(dest="command", required=True)
+        subparsers = parser.add_subparsers(dest="command", required=True, parser_class=_DeferredParser)
 
         for item in self.commands:
             if isinstance(item, CLICommandGroup):
@@ -58,6 +106,7 @@ class PeripheralyzerCLI:
                 group_subparsers = group_parser.add_subparsers(
                     dest="subcommand",
                     required=True,
+                    parser_class=_DeferredParser,
                 )
 
                 # Add subcommands to the group
@@ -66,12 +115,12 @@ class PeripheralyzerCLI:
                         subcommand.name,
                         help=subcommand.help,
                     )
-                    subcommand.configure_parser(sub_parser)
+                    sub_parser.defer(subcommand.configure_parser)
                     sub_parser.set_defaults(_command=subcommand)
             else:
                 # Create a regular subparser
                 subparser = subparsers.add_parser(item.name, help=item.help)
-                item.configure_parser(subparser)
+                subparser.defer(item.configure_parser)
                 subparser.set_defaults(_command=item)
 
         return parser
@@ -83,36 +132,38 @@ class PeripheralyzerCLI:
 
 
 def default_commands() -> tuple[CLICommand | CLICommandGroup, ...]:
-    # Rename the name-map commands to simpler names
-    map_diff_cmd = MapDiffCommand()
-    map_diff_cmd.name = "diff"
-
-    merge_maps_cmd = MergeNameMapsCommand()
-    merge_maps_cmd.name = "merge"
-
-    verify_map_cmd = VerifyNameMapCommand()
-    verify_map_cmd.name = "verify"
-
-    track_changes_cmd = TrackNameMapChangesCommand()
-    track_changes_cmd.name = "track"
-
-    # Create the name-map command group
+    # The name-map commands get simpler names inside their group
     name_map_group = CLICommandGroup(
         name="name-map",
         help="Manage naming maps for peripherals.",
         subcommands={
-            "diff": map_diff_cmd,
-            "merge": merge_maps_cmd,
-            "verify": verify_map_cmd,
-            "track": track_changes_cmd,
+            "diff": LazyCommand("diff", command_help.MAP_DIFF_HELP, ".map_diff", "MapDiffCommand"),
+            "merge": LazyCommand(
+                "merge", command_help.MERGE_NAME_MAPS_HELP, ".merge_name_maps", "MergeNameMapsCommand"
+            ),
+            "verify": LazyCommand(
+                "verify", command_help.VERIFY_NAME_MAP_HELP, ".verify_name_map", "VerifyNameMapCommand"
+            ),
+            "track": LazyCommand(
+                "track",
+                command_help.TRACK_NAME_MAP_CHANGES_HELP,
+                ".track_name_map_changes",
+                "TrackNameMapChangesCommand",
+            ),
         },
     )
 
     return (
-        GenerateCommand(),
-        TransmogrifyCommand(),
+        LazyCommand("generate", command_help.GENERATE_HELP, ".generate", "GenerateCommand"),
+        LazyCommand("transmogrify", command_help.TRANSMOGRIFY_HELP, ".transmogrify", "TransmogrifyCommand"),
+        LazyCommand("build", command_help.BUILD_HELP, ".build", "BuildCommand"),
         name_map_group,
-        PeripheralDuplicateFinderCommand(),
+        LazyCommand(
+            "find-duplicates",
+            command_help.FIND_DUPLICATES_HELP,
+            ".peripheral_duplicate_finder",
+            "PeripheralDuplicateFinderCommand",
+        ),
     )
 
 
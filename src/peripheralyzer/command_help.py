@@ -0,0 +1,10 @@
+"""Help text of every subcommand, kept apart so the CLI can list them without importing the commands."""
+
+GENERATE_HELP = "Generate C/C++ code from peripheral YAML files."
+TRANSMOGRIFY_HELP = "Convert CMSIS-SVD files into peripheralyzer YAML files."
+BUILD_HELP = "Generate C/C++ code directly from a CMSIS-SVD file."
+MAP_DIFF_HELP = "Compare two naming maps and show differing values for shared keys."
+MERGE_NAME_MAPS_HELP = "Merge newly discovered naming map entries into the main map."
+VERIFY_NAME_MAP_HELP = "Verify a naming map YAML file."
+TRACK_NAME_MAP_CHANGES_HELP = "Track changes to naming maps during transmogrify processing."
+FIND_DUPLICATES_HELP = "Find duplicated peripheral YAML definitions with matching shapes."
@@ -3,22 +3,34 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import copy
+import fnmatch
+import glob
+import hashlib
+import io
 import os
-import re
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import jinja2
-import yaml
+from .bundle import is_bundle, open_bundle
+from .command_help import GENERATE_HELP
+from .ir import as_int, is_native
+from .manifest import GenerateManifest, OutputRecord, digest_file, digest_text
+from .output import write_chunks_if_changed, write_if_changed
+from .paths import CACHE_DIR_ENV, default_cache_root, package_templates_root
+from .template_bundle import TEMPLATE_FILTERS, camel_to_snake_case, packaged_bundle  # noqa: F401
+from .yaml_io import safe_load
 
-from .paths import package_templates_root
+if TYPE_CHECKING:
+    import jinja2
 
-
-def camel_to_snake_case(name: str) -> str:
-    """Convert CamelCase text into snake_case."""
-    snake_string = re.sub("([A-Z])", r"_\1", name)
-    return snake_string.lower().lstrip("_")
+DEFAULT_YAML_PATTERN = "peripheral_*.yml"
 
 
 @dataclass(slots=True)
@@ -31,10 +43,22 @@ class GenerateOptions:
     template_root: Path
     yaml_root: Path | None
     anonymous: bool
+    jobs: int = 1
+    bytecode_cache: Path | None = None
+    depfile: Path | None = None
+    manifest: Path | None = None
+    plan: bool = False
+    yaml_cache_size: int | None = None
+    watch: bool = False
+    watch_interval: float = 0.25
 
     @classmethod
     def from_namespace(cls, args: argparse.Namespace) -> "GenerateOptions":
         yaml_root = None if args.yaml_root is None else Path(args.yaml_root)
+        bytecode_cache: Path | None = None
+        if not getattr(args, "no_bytecode_cache", False):
+            cache_dir = getattr(args, "bytecode_cache", None)
+            bytecode_cache = Path(cache_dir) if cache_dir else default_cache_root() / "jinja"
         return cls(
             banner=bool(args.banner),
             templates=list(args.template or []),
@@ -44,40 +68,224 @@ class GenerateOptions:
             template_root=Path(args.template_root),
             yaml_root=yaml_root,
             anonymous=bool(args.anonymous),
+            jobs=int(getattr(args, "jobs", 1)),
+            bytecode_cache=bytecode_cache,
+            depfile=None if getattr(args, "depfile", None) is None else Path(args.depfile),
+            manifest=None if getattr(args, "manifest", None) is None else Path(args.manifest),
+            plan=bool(getattr(args, "plan", False)),
+            yaml_cache_size=getattr(args, "yaml_cache_size", None),
+            watch=bool(getattr(args, "watch", False)),
+            watch_interval=float(getattr(args, "watch_interval", 0.25)),
         )
 
 
-class YamlLoader:
-    """Load YAML files once and cache the parsed content."""
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    peak_bytes: int = 0
+
+    def merge(self, other: "CacheStats") -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.evictions += other.evictions
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions, peak {self.peak_bytes} bytes"
+
 
-    def __init__(self, yaml_root: Path | None, verbose: bool = False) -> None:
+class YamlLoader:
+    """Load YAML files once and cache the parsed content.
+
+    The cached parse is shared by every caller and must be treated as
+    read-only; use ``load_copy`` to get a document that may be modified.
+    The yaml root may also be a device bundle written by ``transmogrify
+    --bundle``, in which case files are read from the bundle instead, and
+    ``documents`` serves already parsed documents by filename (as ``build``
+    does) without reading anything.
+
+    With ``max_bytes`` the cache holds at most that much YAML text (the size
+    of each source document approximates the size of its parse) and evicts
+    the least recently used documents beyond it, except those loaded inside
+    a ``pinned`` block that is still open.
+    """
+
+    def __init__(
+        self,
+        yaml_root: Path | None,
+        verbose: bool = False,
+        documents: Mapping[str, dict[str, Any]] | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
         self.yaml_root = yaml_root
         self.verbose = verbose
-        self.loaded_files: dict[Path, dict[str, Any]] = {}
+        self.documents = documents
+        self.bundle = None
+        if documents is None and yaml_root is not None and is_bundle(yaml_root):
+            self.bundle = open_bundle(yaml_root)
+        self.max_bytes = max_bytes
+        self.loaded_files: OrderedDict[Path, dict[str, Any]] = OrderedDict()
+        self.resident_bytes = 0
+        self.stats = CacheStats()
+        self._sizes: dict[Path, int] = {}
+        self._pinned: set[Path] | None = None
+        self._eviction_listeners: list[Callable[[Path], None]] = []
+
+    def resolve(self, filename: str) -> Path:
+        filepath = (self.yaml_root / filename) if self.yaml_root is not None else Path(filename)
+        return filepath.resolve()
+
+    def source(self, filename: str) -> Path | None:
+        """The file a document is read from, as given on the command line, or None when it is in memory."""
+        if self.documents is not None:
+            return None
+        if self.bundle is not None:
+            return self.bundle.path
+        return (self.yaml_root / filename) if self.yaml_root is not None else Path(filename)
+
+    def load_copy(self, filename: str) -> dict[str, Any]:
+        return copy.deepcopy(self.load(filename))
 
     def load(self, filename: str) -> dict[str, Any]:
-        filepath = (self.yaml_root / filename) if self.yaml_root is not None else Path(filename)
-        filepath = filepath.resolve()
-        if filepath not in self.loaded_files:
-            if self.verbose:
-                print(f"Loading {filepath}")
-            if not filepath.exists():
-                raise FileNotFoundError(f"File {filepath} must exist")
-            with filepath.open("r", encoding="utf-8") as handle:
-                data = yaml.safe_load(handle)
-            if not isinstance(data, dict):
-                raise ValueError(f"Expected YAML mapping in {filepath}")
+        filepath = self.resolve(filename)
+        data = self.loaded_files.get(filepath)
+        if data is not None:
+            self.stats.hits += 1
+            self.loaded_files.move_to_end(filepath)
+        else:
+            self.stats.misses += 1
+            data, size = self._read(filename, filepath)
             self.loaded_files[filepath] = data
-        return self.loaded_files[filepath]
+            self._sizes[filepath] = size
+            self.resident_bytes += size
+            self.stats.peak_bytes = max(self.stats.peak_bytes, self.resident_bytes)
+        if self._pinned is not None:
+            self._pinned.add(filepath)
+        self._evict()
+        return data
+
+    def _read(self, filename: str, filepath: Path) -> tuple[dict[str, Any], int]:
+        """Parse a document, paired with the size it is accounted at."""
+        if self.verbose:
+            print(f"Loading {filepath}")
+        if self.documents is not None:
+            if filename not in self.documents:
+                raise FileNotFoundError(f"File {filename} must exist")
+            # already resident whether cached or not
+            data, size = self.documents[filename], 0
+        else:
+            if self.bundle is not None:
+                text = self.bundle.text(filename)
+            elif not filepath.exists():
+                raise FileNotFoundError(f"File {filepath} must exist")
+            else:
+                text = filepath.read_text(encoding="utf-8")
+            data, size = safe_load(text), len(text)
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected YAML mapping in {filepath}")
+        return data, size
+
+    @contextlib.contextmanager
+    def pinned(self) -> Iterator[None]:
+        """Keep every document loaded inside the block cached until the outermost block exits."""
+        outer = self._pinned
+        if outer is None:
+            self._pinned = set()
+        try:
+            yield
+        finally:
+            if outer is None:
+                self._pinned = None
+                self._evict()
+
+    def add_eviction_listener(self, listener: Callable[[Path], None]) -> None:
+        """Call listener with the resolved path of every document dropped from the cache."""
+        self._eviction_listeners.append(listener)
+
+    def refresh(self, sources: Iterable[Path]) -> None:
+        """Drop the cached parse of each source changed on disk, reopening the bundle if it is one of them."""
+        for source in sources:
+            if self.bundle is not None and source == self.bundle.path:
+                self.bundle = open_bundle(source)
+                for filepath in list(self.loaded_files):
+                    self.forget(filepath)
+            else:
+                self.forget(source.resolve())
+
+    def forget(self, filepath: Path) -> None:
+        """Drop a document from the cache so the next load reads it again."""
+        if self.loaded_files.pop(filepath, None) is None:
+            return
+        self.resident_bytes -= self._sizes.pop(filepath)
+        for listener in self._eviction_listeners:
+            listener(filepath)
+
+    def _evict(self) -> None:
+        if self.max_bytes is None or self.resident_bytes <= self.max_bytes:
+            return
+        excess = self.resident_bytes - self.max_bytes
+        victims: list[Path] = []
+        for filepath in self.loaded_files:
+            if excess <= 0:
+                break
+            if self._pinned is not None and filepath in self._pinned:
+                continue
+            victims.append(filepath)
+            excess -= self._sizes[filepath]
+        for filepath in victims:
+            self.forget(filepath)
+        self.stats.evictions += len(victims)
+
+    def take_stats(self) -> CacheStats:
+        """The counters since the last call, which start again from zero."""
+        stats = self.stats
+        self.stats = CacheStats(peak_bytes=self.resident_bytes)
+        return stats
+
+
+@dataclass(slots=True)
+class RenderedOutput:
+    """A file generate wrote, its template, the digest of its text (when recorded) and every file it came from."""
+
+    path: Path
+    template: str
+    digest: str | None
+    inputs: list[Path]
+
+
+def _depfile_path(path: Path) -> str:
+    return os.fspath(path).replace(" ", "\\ ").replace("#", "\\#").replace("$", "$$")
+
+
+def render_depfile(dependencies: Mapping[Path, Iterable[Path]]) -> str:
+    """A gcc-style depfile with one rule per output, readable by make and ninja."""
+    rules = []
+    for output, inputs in dependencies.items():
+        lines = [f"{_depfile_path(output)}:", *(f"  {_depfile_path(path)}" for path in inputs)]
+        rules.append(" \\\n".join(lines) + "\n")
+    return "".join(rules)
 
 
 class PeripheralGenerator:
     """Stateful generator for rendering peripherals from YAML into templates."""
 
-    def __init__(self, options: GenerateOptions) -> None:
+    def __init__(self, options: GenerateOptions, loader: YamlLoader | None = None) -> None:
         self.options = options
-        self.loader = YamlLoader(options.yaml_root, verbose=options.verbose)
+        self.loader = loader or YamlLoader(
+            options.yaml_root, verbose=options.verbose, max_bytes=options.yaml_cache_size
+        )
         self.use_named_reserved = not options.anonymous
+        # Registers, enums and structures are shared between containers, so each
+        # file is processed once (from a copy of its parse) and then reused for
+        # as long as the loader keeps the parse cached.
+        self.processed: dict[Path, dict[str, dict[str, Any]]] = {}
+        self.loader.add_eviction_listener(self._forget_processed)
+        # The yaml files the peripheral being rendered pulled in, memoized or not.
+        self._sources: list[Path] = []
+        self.dependencies: dict[Path, list[Path]] = {}
+        self.records: dict[Path, OutputRecord] = {}
 
     @property
     def verbose(self) -> bool:
@@ -126,25 +334,39 @@ class PeripheralGenerator:
         member_sizeof: int,
         start: int,
         limit: int,
+        native: bool = False,
     ) -> int:
         count = int(start)
         while count < limit:
+            offset = count if native else hex(count)
             if self.use_named_reserved:
                 bytes_diff = int(limit - count)
                 unit_diff = int(bytes_diff / member_sizeof)
-                reserved = {
-                    "type": default_type,
-                    "name": f"_reserved_{hex(count)}",
-                    "count": unit_diff,
-                    "offset": f"{hex(count)}",
-                }
-                count = int(count + int(unit_diff * member_sizeof))
+                misaligned = count % member_sizeof
+                if unit_diff == 0 or misaligned:
+                    # fill gaps narrower than the default type (or up to its alignment) bytewise
+                    byte_diff = min(bytes_diff, member_sizeof - misaligned) if misaligned else bytes_diff
+                    reserved = {
+                        "type": "uint8_t",
+                        "name": f"_reserved_{hex(count)}",
+                        "count": byte_diff,
+                        "offset": offset,
+                    }
+                    count = int(count + byte_diff)
+                else:
+                    reserved = {
+                        "type": default_type,
+                        "name": f"_reserved_{hex(count)}",
+                        "count": unit_diff,
+                        "offset": offset,
+                    }
+                    count = int(count + int(unit_diff * member_sizeof))
             else:
                 reserved = {
                     "type": default_type,
                     "name": "",
                     "count": 1,
-                    "offset": f"{hex(count)}",
+                    "offset": offset,
                 }
                 count = int(count + member_sizeof)
             if self.verbose:
@@ -158,6 +380,7 @@ class PeripheralGenerator:
         depth: int,
         default_type: str,
         sizeof: int,
+        native: bool = False,
     ) -> list[dict[str, Any]]:
         sorted_members = sorted(old_members, key=lambda member: self.convert_to_int(member, "offset"))
         members: list[dict[str, Any]] = []
@@ -166,18 +389,18 @@ class PeripheralGenerator:
         for member in sorted_members:
             self.validate_member(member)
             offset = self.convert_to_int(member, "offset")
-            count = self.pad_members(members, default_type, member_sizeof, count, offset)
+            count = self.pad_members(members, default_type, member_sizeof, count, offset, native)
             member.setdefault("type", default_type)
             member.setdefault("count", 1)
             member.setdefault("comment", "FIXME (comment)")
             member.setdefault("sizeof", member_sizeof)
             self.convert_to_int(member, "sizeof")
             count = int(offset) + int(member["sizeof"])
-            member["offset"] = hex(offset)
+            member["offset"] = offset if native else hex(offset)
             if self.verbose:
                 print(f"Adding member {member}")
             members.append(member)
-        self.pad_members(members, default_type, member_sizeof, count, sizeof)
+        self.pad_members(members, default_type, member_sizeof, count, sizeof, native)
         return members
 
     def pad_fields(
@@ -226,77 +449,131 @@ class PeripheralGenerator:
         self.pad_fields(fields, default_type=default_type, start=index, limit=depth)
         return fields
 
+    def _load_processed(
+        self, kind: str, yaml_file: str, process: Callable[[dict[str, Any]], None]
+    ) -> dict[str, Any]:
+        source = self.loader.source(yaml_file)
+        if source is not None:
+            self._sources.append(source)
+        # loading even when memoized keeps the parse, and so this entry, recently used
+        raw = self.loader.load(yaml_file)
+        by_kind = self.processed.setdefault(self.loader.resolve(yaml_file), {})
+        if kind not in by_kind:
+            data = copy.deepcopy(raw)
+            process(data)
+            by_kind[kind] = data
+        return by_kind[kind]
+
+    def _forget_processed(self, filepath: Path) -> None:
+        self.processed.pop(filepath, None)
+
     def process_enums(self, top: dict[str, Any]) -> None:
         if "enums" not in top:
             return
-        enums: list[dict[str, Any]] = []
-        for yaml_file in top["enums"]:
-            data = self.loader.load(yaml_file)
-            if self.verbose:
-                print(f"Loading {data}")
-            self.validate_enum(data)
-            if "type" in data:
-                for symbol in data["symbols"]:
-                    symbol.setdefault("comment", "FIXME (comment)")
-            enums.append(data)
-        top["enums"] = enums
+        top["enums"] = [self._load_processed("enum", yaml_file, self._process_enum) for yaml_file in top["enums"]]
+
+    def _process_enum(self, data: dict[str, Any]) -> None:
+        if self.verbose:
+            print(f"Loading {data}")
+        self.validate_enum(data)
+        if "type" in data:
+            for symbol in data["symbols"]:
+                symbol.setdefault("comment", "FIXME (comment)")
 
     def process_register(self, top: dict[str, Any]) -> None:
         if "registers" not in top:
             return
-        registers: list[dict[str, Any]] = []
-        for yaml_file in top["registers"]:
-            register = self.loader.load(yaml_file)
-            if self.verbose:
-                print(f"Loaded {register}")
-            self.validate_register(register)
-            if isinstance(register["sizeof"], str):
-                register["sizeof"] = int(register["sizeof"], 0)
-            register["fields"] = self.pack_fields(
-                old_fields=register["fields"],
-                depth=int(register["default_depth"]),
-                default_type=str(register["default_type"]),
-            )
-            self.process_enums(register)
-            registers.append(register)
-        top["registers"] = registers
+        top["registers"] = [
+            self._load_processed("register", yaml_file, self._process_register) for yaml_file in top["registers"]
+        ]
+
+    def _process_register(self, register: dict[str, Any]) -> None:
+        if self.verbose:
+            print(f"Loaded {register}")
+        self.validate_register(register)
+        register["sizeof"] = as_int(register["sizeof"])
+        register["fields"] = self.pack_fields(
+            old_fields=register["fields"],
+            depth=int(register["default_depth"]),
+            default_type=str(register["default_type"]),
+        )
+        self.process_enums(register)
 
     def process_structure(self, top: dict[str, Any]) -> None:
         if "structures" not in top:
             return
-        structures: list[dict[str, Any]] = []
-        for yaml_file in top["structures"]:
-            structure = self.loader.load(yaml_file)
+        top["structures"] = [
+            self._load_processed("structure", yaml_file, self._process_structure) for yaml_file in top["structures"]
+        ]
+
+    def _process_structure(self, structure: dict[str, Any]) -> None:
+        if self.verbose:
+            print(f"Loaded {structure}")
+        self.validate_structure(structure)
+        native = is_native(structure)
+        sizeof = as_int(structure["sizeof"])
+        structure["members"] = self.pack_members(
+            old_members=structure["members"],
+            depth=int(structure["default_depth"]),
+            default_type=str(structure["default_type"]),
+            sizeof=sizeof,
+            native=native,
+        )
+        self.process_enums(structure)
+        self.process_structure(structure)
+        self.process_register(structure)
+        structure["sizeof"] = sizeof if native else hex(sizeof)
+
+    def _bytecode_cache(self) -> jinja2.BytecodeCache | None:
+        """On-disk cache of compiled templates, or None when disabled or not creatable.
+
+        Jinja keys each entry on the template's path and checks the source
+        checksum on load, so edited templates are recompiled. Entries live in a
+        per-Jinja-version directory because compiled code is version specific.
+        A directory that turns out not to be readable or writable switches the
+        cache off at the first failure and templates are compiled in memory.
+        """
+        if self.options.bytecode_cache is None:
+            return None
+        import jinja2
+
+        from .jinja_environment import QuietBytecodeCache
+
+        directory = self.options.bytecode_cache / f"jinja-{jinja2.__version__}"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
             if self.verbose:
-                print(f"Loaded {structure}")
-            self.validate_structure(structure)
-            sizeof = structure["sizeof"]
-            if isinstance(sizeof, str):
-                sizeof = int(sizeof, 0)
-            structure["members"] = self.pack_members(
-                old_members=structure["members"],
-                depth=int(structure["default_depth"]),
-                default_type=str(structure["default_type"]),
-                sizeof=int(sizeof),
-            )
-            self.process_enums(structure)
-            self.process_structure(structure)
-            self.process_register(structure)
-            if isinstance(structure["sizeof"], int):
-                structure["sizeof"] = hex(structure["sizeof"])
-            else:
-                structure["sizeof"] = hex(int(structure["sizeof"], 0))
-            structures.append(structure)
-        top["structures"] = structures
+                print(f"Template bytecode cache disabled: {error}")
+            return None
+        return QuietBytecodeCache(os.fspath(directory), verbose=self.verbose)
+
+    def _template_loader(self) -> jinja2.BaseLoader:
+        """Load the packaged templates from the precompiled bundle when it applies.
+
+        The bundle is only used with the default --template-root; a custom root,
+        or a template missing from the bundle, is compiled from source.
+        """
+        import jinja2
+
+        loader = jinja2.FileSystemLoader(os.fspath(self.options.template_root))
+        if self.options.template_root.resolve() != package_templates_root().resolve():
+            return loader
+        bundle = packaged_bundle()
+        if bundle is None:
+            return loader
+        if self.verbose:
+            print(f"Using precompiled templates from {bundle}")
+        return jinja2.ChoiceLoader([jinja2.ModuleLoader(os.fspath(bundle)), loader])
 
     def _build_environment(self) -> jinja2.Environment:
-        environment = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(os.fspath(self.options.template_root))
+        from .jinja_environment import RecordingEnvironment
+
+        environment = RecordingEnvironment(
+            loader=self._template_loader(),
+            bytecode_cache=self._bytecode_cache(),
         )
-        environment.filters["debug"] = lambda value: print(value) or value
-        environment.filters["list"] = list
-        environment.filters["conjoin"] = lambda namespace: f"{namespace}::"
-        environment.filters["snake_case"] = camel_to_snake_case
+        environment.filters.update(TEMPLATE_FILTERS)
         return environment
 
     def _print_banner(self) -> None:
@@ -314,54 +591,306 @@ class PeripheralGenerator:
 """
         )
 
+    def resolve_yaml_files(self) -> list[str]:
+        """Expand the requested yaml files, which may be globs relative to the yaml root.
+
+        Without any ``--yaml`` every ``peripheral_*.yml`` in the yaml root is used.
+        """
+        yaml_root = self.options.yaml_root
+        patterns = self.options.yaml_files
+        if not patterns and (yaml_root is not None or self.loader.documents is not None):
+            patterns = [DEFAULT_YAML_PATTERN]
+        yaml_files: list[str] = []
+        for pattern in patterns:
+            if self.loader.documents is not None and glob.has_magic(pattern):
+                yaml_files.extend(name for name in sorted(self.loader.documents) if fnmatch.fnmatchcase(name, pattern))
+            elif self.loader.bundle is not None and glob.has_magic(pattern):
+                yaml_files.extend(self.loader.bundle.glob(pattern))
+            elif glob.has_magic(pattern):
+                root_dir = None if yaml_root is None else os.fspath(yaml_root)
+                yaml_files.extend(sorted(glob.glob(pattern, root_dir=root_dir)))
+            else:
+                yaml_files.append(pattern)
+        return list(dict.fromkeys(yaml_files))
+
+    def _find_templates(self) -> list[tuple[str, str]] | None:
+        """Pair each template with the extension of the file it renders, or None when one does not exist."""
+        found: list[tuple[str, str]] = []
+        for template_file in self.options.templates:
+            template_path = self.options.template_root / template_file
+            if not template_path.exists():
+                print(f"Template {template_path} not found.")
+                return None
+            _, template_ext, _ = template_path.name.split(".")
+            found.append((template_ext, template_file))
+        return found
+
+    def _load_templates(self, environment: jinja2.Environment) -> list[tuple[str, jinja2.Template]] | None:
+        """Compile each template once, paired with the extension of the file it renders."""
+        found = self._find_templates()
+        if found is None:
+            return None
+        return [(template_ext, environment.get_template(template_file)) for template_ext, template_file in found]
+
     def run(self) -> int:
         if self.options.banner:
             self._print_banner()
 
-        environment = self._build_environment()
-        self.options.output.mkdir(parents=True, exist_ok=True)
+        if self.options.plan:
+            return self.plan()
+
+        yaml_files = self.resolve_yaml_files()
+        if not yaml_files:
+            print("No yaml files to generate from; give --yaml or a --yaml-root with peripheral_*.yml files.")
+            return -1
+
+        jobs = self.options.jobs or os.cpu_count() or 1
+        if not self.options.watch and jobs > 1 and len(yaml_files) > 1:
+            # the workers compile the templates, the parent only checks they exist
+            if self._find_templates() is None:
+                return -1
+            self.options.output.mkdir(parents=True, exist_ok=True)
+            self._run_parallel(yaml_files, jobs)
+        else:
+            templates = self._load_templates(self._build_environment())
+            if templates is None:
+                return -1
+            self.options.output.mkdir(parents=True, exist_ok=True)
+
+            if self.options.watch:
+                from .watch import Watcher
+
+                return Watcher(self, templates).run()
+
+            for yaml_file in yaml_files:
+                self._record_outputs(self.render_peripheral(yaml_file, templates))
+        self.write_dependencies()
+        if self.verbose or self.options.yaml_cache_size is not None:
+            print(f"yaml cache: {self.loader.stats}")
+        return 0
 
-        for yaml_file in self.options.yaml_files:
-            data = self.loader.load(yaml_file)
-            assert "peripheral" in data
-            peripheral = data["peripheral"]
-            self.validate_structure(peripheral)
+    def write_dependencies(self) -> None:
+        """Write the depfile and manifest, when asked for, from every output recorded so far."""
+        if self.options.depfile is not None:
+            write_if_changed(self.options.depfile, render_depfile(self.dependencies))
+        if self.options.manifest is not None:
+            self._save_manifest(self.options.manifest)
+
+    def _record_outputs(self, outputs: list[RenderedOutput]) -> None:
+        for output in outputs:
+            self.dependencies[output.path] = output.inputs
+            if output.digest is not None:
+                self.records[output.path] = OutputRecord(output.template, output.digest)
+
+    def _options_digest(self) -> str:
+        """Digest of the options that change every output without changing any input file."""
+        return digest_text(repr((self.options.anonymous, os.fspath(self.options.template_root))))
+
+    def _save_manifest(self, manifest_path: Path) -> None:
+        """Record the inputs of every output written, keeping the entries of outputs this run did not touch."""
+        manifest = GenerateManifest.load(manifest_path)
+        if manifest.options != self._options_digest():
+            manifest = GenerateManifest(self._options_digest())
+        digests: dict[Path, str | None] = {}
+        for path, record in self.records.items():
+            for source in self.dependencies[path]:
+                if source not in digests:
+                    digests[source] = digest_file(source)
+                digest = digests[source]
+                if digest is not None:
+                    record.inputs[os.fspath(source)] = digest
+            manifest.outputs[os.fspath(path)] = record
+        manifest.save(manifest_path)
+
+    def _stale_reason(
+        self, path: Path, template: str, manifest: GenerateManifest, digests: dict[str, str | None]
+    ) -> str | None:
+        record = manifest.outputs.get(os.fspath(path))
+        if record is None:
+            return "not in the manifest"
+        if record.template != template:
+            return f"was rendered from {record.template}"
+        output_digest = digest_file(path)
+        if output_digest is None:
+            return "missing"
+        if output_digest != record.digest:
+            return "modified since it was generated"
+        for source, digest in record.inputs.items():
+            if source not in digests:
+                digests[source] = digest_file(Path(source))
+            if digests[source] is None:
+                return f"{source} is missing"
+            if digests[source] != digest:
+                return f"{source} changed"
+        return None
+
+    def plan(self) -> int:
+        """Report the outputs a run would change, and why, without loading Jinja or rendering anything.
+
+        Returns 1 when any output is stale and 0 when everything is up to date.
+        """
+        manifest_path = self.options.manifest
+        if manifest_path is None:
+            print("--plan compares against a manifest; give --manifest")
+            return -1
+        yaml_files = self.resolve_yaml_files()
+        if not yaml_files:
+            print("No yaml files to generate from; give --yaml or a --yaml-root with peripheral_*.yml files.")
+            return -1
+        manifest = GenerateManifest.load(manifest_path)
+        options_changed = bool(manifest.outputs) and manifest.options != self._options_digest()
+        digests: dict[str, str | None] = {}
+        total = stale = 0
+        for yaml_file in yaml_files:
+            name = self.loader.load(yaml_file)["peripheral"]["name"]
+            for template in self.options.templates:
+                path = self.options.output / f"{name}.{Path(template).name.split('.')[1]}"
+                total += 1
+                if options_changed:
+                    reason: str | None = "options changed"
+                else:
+                    reason = self._stale_reason(path, template, manifest, digests)
+                if reason is not None:
+                    stale += 1
+                    print(f"{path}: {reason}")
+                elif self.verbose:
+                    print(f"{path}: up to date")
+        print(f"{stale} of {total} outputs are stale")
+        return 1 if stale else 0
+
+    def _run_parallel(self, yaml_files: list[str], jobs: int) -> None:
+        """Render peripherals in worker processes, which write their own outputs.
+
+        Each worker warms its own environment once. Results (and any error) are
+        consumed in the order the yaml files were given, so output is printed,
+        dependencies are recorded and the first failure is raised in the same
+        order as a serial run.
+        """
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(yaml_files)),
+            initializer=_init_worker,
+            initargs=(self.options, self.loader.documents),
+        ) as executor:
+            for stdout, outputs, stats in executor.map(_render_in_worker, yaml_files):
+                sys.stdout.write(stdout)
+                self._record_outputs(outputs)
+                self.loader.stats.merge(stats)
+
+    def render_peripheral(
+        self, yaml_file: str, templates: list[tuple[str, jinja2.Template]]
+    ) -> list[RenderedOutput]:
+        """Process one peripheral yaml and render it with every template, streaming each file to disk.
+
+        Templates are rendered chunk by chunk straight into
+        ``write_chunks_if_changed``, so a large peripheral is never held in
+        memory as a whole and unchanged outputs are not rewritten. Every yaml
+        document the peripheral loads stays cached until it is rendered.
+        """
+        with self.loader.pinned():
+            return self._render_peripheral(yaml_file, templates)
+
+    def _render_peripheral(
+        self, yaml_file: str, templates: list[tuple[str, jinja2.Template]]
+    ) -> list[RenderedOutput]:
+        if self.verbose:
+            print(f"Generating {yaml_file}")
+        source = self.loader.source(yaml_file)
+        self._sources = [] if source is None else [source]
+        data = self.loader.load_copy(yaml_file)
+        assert "peripheral" in data
+        peripheral = data["peripheral"]
+        self.validate_structure(peripheral)
+
+        native = is_native(data)
+        default_type = str(peripheral["default_type"])
+        depth = int(peripheral["default_depth"])
+        sizeof = as_int(peripheral["sizeof"])
+
+        self.process_enums(peripheral)
+        self.process_structure(peripheral)
+        self.process_register(peripheral)
+
+        peripheral["members"] = self.pack_members(
+            old_members=peripheral["members"],
+            depth=depth,
+            default_type=default_type,
+            sizeof=sizeof,
+            native=native,
+        )
+        peripheral["sizeof"] = sizeof if native else hex(sizeof)
+
+        from .jinja_environment import RecordingEnvironment
+
+        sources = list(dict.fromkeys(self._sources))
+        outputs: list[RenderedOutput] = []
+        for template_ext, template in templates:
+            environment = template.environment
+            resolved = environment.resolved if isinstance(environment, RecordingEnvironment) else []
+            mark = len(resolved)
+            path = self.options.output / f"{peripheral['name']}.{template_ext}"
+            digest = hashlib.sha256() if self.options.manifest is not None else None
+            write_chunks_if_changed(path, self._observe(template.generate(data), digest))
+            if self.verbose:
+                print()
+            names = dict.fromkeys([str(template.name), *resolved[mark:]])
+            del resolved[mark:]
+            inputs = [*sources, *(self.options.template_root / name for name in names)]
+            recorded = None if digest is None else digest.hexdigest()
+            outputs.append(RenderedOutput(path, str(template.name), recorded, inputs))
+        return outputs
+
+    def _observe(self, chunks: Iterator[str], digest: Any) -> Iterator[str]:
+        """Pass rendered chunks through, hashing them for the manifest and echoing them when verbose."""
+        for chunk in chunks:
+            if digest is not None:
+                digest.update(chunk.encode("utf-8"))
+            if self.verbose:
+                sys.stdout.write(chunk)
+            yield chunk
 
-            default_type = str(peripheral["default_type"])
-            depth = int(peripheral["default_depth"])
-            sizeof = int(peripheral["sizeof"], 0) if isinstance(peripheral["sizeof"], str) else int(peripheral["sizeof"])
 
-            self.process_enums(peripheral)
-            self.process_structure(peripheral)
-            self.process_register(peripheral)
+_worker: tuple[PeripheralGenerator, list[tuple[str, jinja2.Template]]] | None = None
+
+
+def _init_worker(options: GenerateOptions, documents: Mapping[str, dict[str, Any]] | None) -> None:
+    global _worker
+    loader = YamlLoader(
+        options.yaml_root, verbose=options.verbose, documents=documents, max_bytes=options.yaml_cache_size
+    )
+    generator = PeripheralGenerator(options, loader)
+    templates = generator._load_templates(generator._build_environment())
+    assert templates is not None
+    _worker = (generator, templates)
+
+
+def _render_in_worker(yaml_file: str) -> tuple[str, list[RenderedOutput], CacheStats]:
+    assert _worker is not None
+    generator, templates = _worker
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        outputs = generator.render_peripheral(yaml_file, templates)
+    return stdout.getvalue(), outputs, generator.loader.take_stats()
 
-            peripheral["members"] = self.pack_members(
-                old_members=peripheral["members"],
-                depth=depth,
-                default_type=default_type,
-                sizeof=sizeof,
-            )
-            peripheral["sizeof"] = hex(sizeof)
-
-            for template_file in self.options.templates:
-                template_path = self.options.template_root / template_file
-                if not template_path.exists():
-                    print(f"Template {template_path} not found.")
-                    return -1
-                template_data = template_path.read_text(encoding="utf-8")
-                _, template_ext, _ = template_path.name.split(".")
-                template = environment.from_string(template_data)
-                rendered = template.render(data)
-                filepath = self.options.output / f"{peripheral['name']}.{template_ext}"
-                filepath.write_text(rendered, encoding="utf-8")
-                if self.verbose:
-                    print(rendered)
-        return 0
+
+_SIZE_SUFFIXES = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte count such as ``65536``, ``64K`` or ``1.5M``."""
+    value = text.strip().upper().removesuffix("B")
+    suffix = value[-1:] if value[-1:] in _SIZE_SUFFIXES else ""
+    try:
+        size = int(float(value.removesuffix(suffix)) * _SIZE_SUFFIXES[suffix])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r}") from None
+    if size < 0:
+        raise argparse.ArgumentTypeError(f"size must not be negative: {text!r}")
+    return size
 
 
 class GenerateCommand:
     name = "generate"
-    help = "Generate C/C++ code from peripheral YAML files."
+    help = GENERATE_HELP
 
     def configure_parser(self, parser: argparse.ArgumentParser) -> None:
         parser.description = self.help
@@ -379,8 +908,8 @@ class GenerateCommand:
             "--yaml",
             type=str,
             action="append",
-            required=True,
-            help="The yaml description of the peripheral set.",
+            help="The yaml description of the peripheral set, may be a glob relative to the yaml root "
+            f"(appendable, default: {DEFAULT_YAML_PATTERN} in the yaml root)",
         )
         parser.add_argument("-v", "--verbose", action="store_true", help="Print verbose information.")
         parser.add_argument(
@@ -402,7 +931,7 @@ class GenerateCommand:
             "--yaml-root",
             type=str,
             default=None,
-            help="The root to the location where the yamls are kept",
+            help="The root to the location where the yamls are kept, or a device bundle from transmogrify --bundle",
         )
         parser.add_argument(
             "-a",
@@ -410,6 +939,64 @@ class GenerateCommand:
             action="store_true",
             help="Disable padding with named reserved fields",
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Number of worker processes used to render peripherals, 0 uses every CPU (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--bytecode-cache",
+            type=str,
+            metavar="DIR",
+            default=None,
+            help=f"Directory for compiled template bytecode (default: ${CACHE_DIR_ENV}/jinja or the user cache dir)",
+        )
+        parser.add_argument(
+            "--no-bytecode-cache",
+            action="store_true",
+            help="Always compile templates from source",
+        )
+        parser.add_argument(
+            "--depfile",
+            type=str,
+            metavar="PATH",
+            default=None,
+            help="Write a make/ninja depfile listing the yaml files and templates each output was rendered from",
+        )
+        parser.add_argument(
+            "--manifest",
+            type=str,
+            metavar="PATH",
+            default=None,
+            help="Record the digest of every input of each output in this manifest, for --plan",
+        )
+        parser.add_argument(
+            "--plan",
+            action="store_true",
+            help="Only print the outputs that are stale against --manifest, and why; exits 1 if any are",
+        )
+        parser.add_argument(
+            "--yaml-cache-size",
+            type=parse_size,
+            metavar="SIZE",
+            default=None,
+            help="Keep at most this much parsed yaml cached, in bytes or with a K, M or G suffix (default: unbounded)",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and re-render the peripherals whose yaml or templates change (renders in-process)",
+        )
+        parser.add_argument(
+            "--watch-interval",
+            type=float,
+            metavar="SECONDS",
+            default=0.25,
+            help="How often --watch checks the inputs for changes (default: %(default)s)",
+        )
 
     def run(self, args: argparse.Namespace) -> int:
         return PeripheralGenerator(GenerateOptions.from_namespace(args)).run()
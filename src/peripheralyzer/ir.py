@@ -0,0 +1,33 @@
+"""Versions of the peripheral YAML intermediate representation.
+
+Version 1 (legacy, no ``ir_version`` key) stores offsets, sizes and base
+addresses as hex strings. Version 2 stores them as plain integers and leaves
+all formatting to the templates' ``hex`` filter, so nothing is converted to
+text and parsed back between transmogrify and generate.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+IR_VERSION_KEY = "ir_version"
+LEGACY_IR_VERSION = 1
+NATIVE_IR_VERSION = 2
+IR_VERSIONS = (LEGACY_IR_VERSION, NATIVE_IR_VERSION)
+
+
+def ir_version(document: Mapping[str, Any]) -> int:
+    version = document.get(IR_VERSION_KEY, LEGACY_IR_VERSION)
+    if version not in IR_VERSIONS:
+        raise ValueError(f"Unsupported {IR_VERSION_KEY} {version!r}, expected one of {IR_VERSIONS}")
+    return int(version)
+
+
+def is_native(document: Mapping[str, Any]) -> bool:
+    return ir_version(document) == NATIVE_IR_VERSION
+
+
+def as_int(value: int | str) -> int:
+    """An IR integer, which legacy documents store as a (hex) string."""
+    return value if isinstance(value, int) else int(value, 0)
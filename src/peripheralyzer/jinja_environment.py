@@ -0,0 +1,65 @@
+"""Jinja environment used by generate, kept apart so generate only imports Jinja when it renders."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+import jinja2
+
+
+class RecordingEnvironment(jinja2.Environment):
+    """Environment that remembers the name of every template it hands out, includes and imports too."""
+
+    def __init__(self, **options: Any) -> None:
+        super().__init__(**options)
+        self.resolved: list[str] = []
+
+    def get_template(self, name: Any, parent: str | None = None, globals: Any = None) -> jinja2.Template:
+        template = super().get_template(name, parent, globals)
+        self.resolved.append(template.name or str(name))
+        return template
+
+    def select_template(self, names: Any, parent: str | None = None, globals: Any = None) -> jinja2.Template:
+        template = super().select_template(names, parent, globals)
+        self.resolved.append(str(template.name))
+        return template
+
+    def forget(self, names: Iterable[str]) -> None:
+        """Drop the compiled templates with these names, so the next use reads their source again."""
+        names = set(names)
+        if self.cache is None:
+            return
+        for key, template in list(self.cache.items()):
+            if template.name in names:
+                del self.cache[key]
+
+
+class QuietBytecodeCache(jinja2.FileSystemBytecodeCache):
+    """Bytecode cache that turns itself off, instead of failing the render, when the directory is unusable."""
+
+    def __init__(self, directory: str, verbose: bool = False) -> None:
+        super().__init__(directory)
+        self.verbose = verbose
+        self.disabled = False
+
+    def _disable(self, error: OSError) -> None:
+        if self.verbose and not self.disabled:
+            print(f"Template bytecode cache disabled: {error}")
+        self.disabled = True
+
+    def load_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        if self.disabled:
+            return
+        try:
+            super().load_bytecode(bucket)
+        except OSError as error:
+            self._disable(error)
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        if self.disabled:
+            return
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as error:
+            self._disable(error)
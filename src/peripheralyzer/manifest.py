@@ -0,0 +1,165 @@
+"""Manifests of what transmogrify and generate produced, used by ``--incremental`` and ``--plan`` runs."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .output import write_if_changed
+from .yaml_io import safe_dump, safe_load
+
+MANIFEST_NAME = ".transmogrify_manifest.yml"
+MANIFEST_VERSION = 2
+GENERATE_MANIFEST_VERSION = 2
+
+
+def digest_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def digest_file(path: Path) -> str | None:
+    """Digest of a file's bytes, or None when it does not exist."""
+    try:
+        with path.open("rb") as handle:
+            return hashlib.sha256(handle.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+@dataclass(slots=True)
+class PeripheralRecord:
+    """What one peripheral was built from and what it produced.
+
+    ``source`` hashes the peripheral's SVD subtree (after ``derivedFrom``
+    resolution) together with the device defaults and namespaces, ``names``
+    hashes the name map results of every lookup in ``journal``, and
+    ``outputs`` maps each emitted yaml filename to the digest of its text.
+    With ``--reuse-derived``, ``derived_from`` names the peripheral whose
+    files it references and ``derivation`` keeps what a peripheral deriving
+    from this one needs to reference its files in turn.
+    """
+
+    source: str
+    names: str
+    journal: list[tuple[str, str | None]]
+    entry: tuple[str, str, str]
+    outputs: dict[str, str] = field(default_factory=dict)
+    derived_from: str | None = None
+    derivation: dict[str, Any] | None = None
+
+    def to_data(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "source": self.source,
+            "names": self.names,
+            "journal": [[name, context] for name, context in self.journal],
+            "entry": list(self.entry),
+            "outputs": dict(self.outputs),
+        }
+        if self.derived_from is not None:
+            data["derived_from"] = self.derived_from
+        if self.derivation is not None:
+            data["derivation"] = self.derivation
+        return data
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any]) -> "PeripheralRecord":
+        yaml_file, svd_name, type_name = data["entry"]
+        return cls(
+            source=str(data["source"]),
+            names=str(data["names"]),
+            journal=[(str(name), context) for name, context in data.get("journal", [])],
+            entry=(str(yaml_file), str(svd_name), str(type_name)),
+            outputs={str(name): str(digest) for name, digest in (data.get("outputs") or {}).items()},
+            derived_from=None if data.get("derived_from") is None else str(data["derived_from"]),
+            derivation=data.get("derivation"),
+        )
+
+
+@dataclass(slots=True)
+class Manifest:
+    peripherals: dict[str, PeripheralRecord] = field(default_factory=dict)
+
+    @staticmethod
+    def path_for(yaml_root: Path) -> Path:
+        return yaml_root / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, yaml_root: Path) -> "Manifest":
+        """Read the manifest in yaml_root, or an empty one if it is missing or from another version."""
+        path = cls.path_for(yaml_root)
+        if not path.exists():
+            return cls()
+        with path.open("r", encoding="utf-8") as handle:
+            data = safe_load(handle)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls()
+        peripherals = data.get("peripherals") or {}
+        return cls({str(name): PeripheralRecord.from_data(record) for name, record in peripherals.items()})
+
+    def output_digests(self) -> dict[str, str]:
+        digests: dict[str, str] = {}
+        for record in self.peripherals.values():
+            digests.update(record.outputs)
+        return digests
+
+    def save(self, yaml_root: Path) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "peripherals": {name: record.to_data() for name, record in self.peripherals.items()},
+        }
+        yaml_root.mkdir(parents=True, exist_ok=True)
+        write_if_changed(self.path_for(yaml_root), safe_dump(data, sort_keys=False))
+
+
+@dataclass(slots=True)
+class OutputRecord:
+    """How generate produced one file: the template, the digest of each input and of the text written."""
+
+    template: str
+    digest: str
+    inputs: dict[str, str] = field(default_factory=dict)
+
+    def to_data(self) -> dict[str, Any]:
+        return {"template": self.template, "digest": self.digest, "inputs": dict(self.inputs)}
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any]) -> "OutputRecord":
+        return cls(
+            template=str(data["template"]),
+            digest=str(data["digest"]),
+            inputs={str(name): str(digest) for name, digest in (data.get("inputs") or {}).items()},
+        )
+
+
+@dataclass(slots=True)
+class GenerateManifest:
+    """Every file generate wrote, keyed by path, and a digest of the options that shape all of them."""
+
+    options: str = ""
+    outputs: dict[str, OutputRecord] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "GenerateManifest":
+        """Read the manifest at path, or an empty one if it is missing or from another version."""
+        if not path.exists():
+            return cls()
+        with path.open("r", encoding="utf-8") as handle:
+            data = safe_load(handle)
+        if not isinstance(data, dict) or data.get("version") != GENERATE_MANIFEST_VERSION:
+            return cls()
+        outputs = data.get("outputs") or {}
+        return cls(
+            str(data.get("options", "")),
+            {str(name): OutputRecord.from_data(record) for name, record in outputs.items()},
+        )
+
+    def save(self, path: Path) -> None:
+        data = {
+            "version": GENERATE_MANIFEST_VERSION,
+            "options": self.options,
+            "outputs": {name: record.to_data() for name, record in self.outputs.items()},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(path, safe_dump(data, sort_keys=False))
@@ -10,6 +10,9 @@ import yaml
 from rich.console import Console
 from rich.table import Table
 
+from .command_help import MAP_DIFF_HELP
+from .yaml_io import safe_dump, safe_load
+
 
 MISSING = object()
 TRACKED_FIELDS = ("as_type", "as_variable", "overrides")
@@ -21,7 +24,7 @@ def format_entry_value(value: Any) -> str:
     if value is None:
         return ""
     if isinstance(value, (dict, list)):
-        return yaml.safe_dump(value, sort_keys=True).strip()
+        return safe_dump(value, sort_keys=True).strip()
     return str(value)
 
 
@@ -109,7 +112,7 @@ def copy_entry_fields(source: dict[str, Any], destination: dict[str, Any]) -> No
 
 def load_name_map(path: Path) -> dict[str, dict[str, Any]]:
     with path.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle)
+        data = safe_load(handle)
 
     if data is None:
         return {}
@@ -122,7 +125,7 @@ def load_name_map(path: Path) -> dict[str, dict[str, Any]]:
 
 def write_name_map(path: Path, data: dict[str, dict[str, Any]]) -> None:
     with path.open("w", encoding="utf-8") as handle:
-        yaml.safe_dump(data, handle, sort_keys=False)
+        safe_dump(data, handle, sort_keys=False)
 
 
 def get_entry(map_data: dict[str, dict[str, Any]], key: str) -> dict[str, Any]:
@@ -412,7 +415,7 @@ def build_parser() -> argparse.ArgumentParser:
 
 class MapDiffCommand:
     name = "name-map-diff"
-    help = "Compare two naming maps and show differing values for shared keys."
+    help = MAP_DIFF_HELP
 
     def configure_parser(self, parser: argparse.ArgumentParser) -> None:
         configured = build_parser()
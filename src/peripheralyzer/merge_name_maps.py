@@ -8,7 +8,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import yaml
+from .command_help import MERGE_NAME_MAPS_HELP
+from .yaml_io import safe_dump, safe_load
 
 
 @dataclass(slots=True)
@@ -34,7 +35,7 @@ class MergeNameMapsService:
         if not filepath.exists():
             raise FileNotFoundError(filepath)
         with filepath.open("r", encoding="utf-8") as handle:
-            data = yaml.safe_load(handle)
+            data = safe_load(handle)
         return data or {}
 
     @staticmethod
@@ -92,7 +93,7 @@ class MergeNameMapsApp:
         merged_map = self.service.merge_maps(main_map, new_map)
         print(f"\n✓ Merging {len(new_map)} entries into {main_path}...")
         with main_path.open("w", encoding="utf-8") as handle:
-            yaml.dump(merged_map, handle, sort_keys=True, default_flow_style=False)
+            safe_dump(merged_map, handle, sort_keys=True, default_flow_style=False)
 
         print(f"✓ Total entries now: {len(merged_map)}")
         print(f"✓ Removing {new_entries_path}")
@@ -103,7 +104,7 @@ class MergeNameMapsApp:
 
 class MergeNameMapsCommand:
     name = "merge-name-maps"
-    help = "Merge newly discovered naming map entries into the main map."
+    help = MERGE_NAME_MAPS_HELP
 
     def configure_parser(self, parser: argparse.ArgumentParser) -> None:
         parser.description = self.help
@@ -0,0 +1,72 @@
+"""Minimal writer for ninja build files."""
+
+from __future__ import annotations
+
+import os
+import shlex
+from collections.abc import Iterable
+from pathlib import Path
+
+
+def escape_path(path: Path | str) -> str:
+    """A path as it must appear in a ``build`` line, where ``$``, spaces and colons are special."""
+    return os.fspath(path).replace("$", "$$").replace(" ", "$ ").replace(":", "$:")
+
+
+def command(args: Iterable[Path | str]) -> str:
+    """Shell-quote arguments for a ``command`` variable, escaping ``$`` for ninja.
+
+    Arguments starting with ``$`` are ninja variable references and are kept as is.
+    """
+    words = []
+    for arg in args:
+        text = os.fspath(arg)
+        words.append(text if text.startswith("$") else shlex.quote(text).replace("$", "$$"))
+    return " ".join(words)
+
+
+class NinjaWriter:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def comment(self, text: str) -> None:
+        self.lines.append(f"# {text}")
+
+    def newline(self) -> None:
+        self.lines.append("")
+
+    def variable(self, key: str, value: str, indent: int = 0) -> None:
+        self.lines.append(f"{'  ' * indent}{key} = {value}")
+
+    def pool(self, name: str, depth: int) -> None:
+        self.lines.append(f"pool {name}")
+        self.variable("depth", str(depth), indent=1)
+        self.newline()
+
+    def rule(self, name: str, **variables: str) -> None:
+        self.lines.append(f"rule {name}")
+        for key, value in variables.items():
+            self.variable(key, value, indent=1)
+        self.newline()
+
+    def build(
+        self,
+        outputs: Iterable[Path | str],
+        rule: str,
+        inputs: Iterable[Path | str] = (),
+        implicit: Iterable[Path | str] = (),
+        **variables: str,
+    ) -> None:
+        text = " $\n    ".join(escape_path(output) for output in outputs)
+        line = [f"build {text}: {rule}"]
+        line.extend(escape_path(path) for path in inputs)
+        line.extend(
+            f"| {escape_path(path)}" if index == 0 else escape_path(path) for index, path in enumerate(implicit)
+        )
+        self.lines.append(" $\n    ".join(line))
+        for key, value in variables.items():
+            self.variable(key, value, indent=1)
+        self.newline()
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
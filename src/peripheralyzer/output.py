@@ -0,0 +1,144 @@
+"""Atomic, write-if-changed file output shared by transmogrify and generate."""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+# Rendered text is compared and written in blocks of about this many characters.
+OUTPUT_BLOCK_SIZE = 64 * 1024
+
+
+@functools.cache
+def _default_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _same_contents(path: Path, data: bytes, size: int) -> bool:
+    if size != len(data):
+        return False
+    with path.open("rb") as handle:
+        existing = hashlib.sha256(handle.read()).digest()
+    return existing == hashlib.sha256(data).digest()
+
+
+def _open_temporary(path: Path) -> tuple[BinaryIO, str]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    return os.fdopen(descriptor, "wb"), temp_name
+
+
+def _commit(temp_name: str, mode: int, path: Path) -> None:
+    os.chmod(temp_name, mode)
+    os.replace(temp_name, path)
+
+
+def write_if_changed(path: Path, text: str, encoding: str = "utf-8") -> bool:
+    """Write text to path unless the file already holds exactly those bytes.
+
+    The existing file is compared by size first and only hashed when the sizes
+    match, so an unchanged file keeps its mtime and downstream builds see
+    nothing to do. Changed files are written to a temporary file next to the
+    target and renamed over it, so readers (and concurrent writers) only ever
+    see a complete file. Returns True when the file was written.
+    """
+    data = text.encode(encoding)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        mode = _default_mode()
+    else:
+        if _same_contents(path, data, stat.st_size):
+            return False
+        mode = stat.st_mode & 0o777
+
+    handle, temp_name = _open_temporary(path)
+    try:
+        with handle:
+            handle.write(data)
+        _commit(temp_name, mode, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def _blocks(chunks: Iterable[str], encoding: str, block_size: int) -> Iterator[bytes]:
+    """Join text chunks into encoded blocks of at least block_size characters (except the last)."""
+    pending: list[str] = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= block_size:
+            yield "".join(pending).encode(encoding)
+            pending.clear()
+            size = 0
+    if pending:
+        yield "".join(pending).encode(encoding)
+
+
+def write_chunks_if_changed(
+    path: Path,
+    chunks: Iterable[str],
+    encoding: str = "utf-8",
+    block_size: int = OUTPUT_BLOCK_SIZE,
+) -> bool:
+    """Stream text chunks to path unless the file already holds exactly those bytes.
+
+    Like ``write_if_changed`` but the text never exists as a whole: the
+    chunks are compared with the existing file one block at a time as they are
+    produced, and nothing is written while they match. At the first difference
+    the matching prefix is copied from the existing file into the temporary
+    file, which then receives the remaining blocks and is renamed over the
+    target. Returns True when the file was written.
+    """
+    blocks = _blocks(chunks, encoding, block_size)
+    try:
+        existing: BinaryIO | None = path.open("rb")
+    except FileNotFoundError:
+        existing = None
+    mode = _default_mode()
+    first = b""
+    handle: BinaryIO | None = None
+    temp_name = ""
+    try:
+        if existing is not None:
+            with existing:
+                mode = os.fstat(existing.fileno()).st_mode & 0o777
+                matched = 0
+                for block in blocks:
+                    if existing.read(len(block)) != block:
+                        first = block
+                        break
+                    matched += len(block)
+                else:
+                    if not existing.read(1):
+                        return False
+                handle, temp_name = _open_temporary(path)
+                existing.seek(0)
+                while matched:
+                    data = existing.read(min(matched, block_size))
+                    handle.write(data)
+                    matched -= len(data)
+        if handle is None:
+            handle, temp_name = _open_temporary(path)
+        with handle:
+            handle.write(first)
+            for block in blocks:
+                handle.write(block)
+        _commit(temp_name, mode, path)
+    except BaseException:
+        if handle is not None:
+            handle.close()
+        if temp_name:
+            Path(temp_name).unlink(missing_ok=True)
+        raise
+    return True
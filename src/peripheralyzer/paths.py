@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import os
 from importlib.resources import files
 from pathlib import Path
 
+CACHE_DIR_ENV = "PERIPHERALYZER_CACHE_DIR"
+
 
 def package_root() -> Path:
     return Path(__file__).resolve().parent
@@ -12,3 +15,13 @@ def package_root() -> Path:
 
 def package_templates_root() -> Path:
     return Path(str(files("peripheralyzer").joinpath("templates")))
+
+
+def default_cache_root() -> Path:
+    """Where peripheralyzer keeps reusable build caches ($PERIPHERALYZER_CACHE_DIR, else the user cache dir)."""
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+    return base / "peripheralyzer"
@@ -18,7 +18,10 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable, NamedTuple
 
-import yaml
+from .bundle import is_bundle, open_bundle
+from .command_help import FIND_DUPLICATES_HELP
+from .ir import IR_VERSION_KEY, ir_version
+from .yaml_io import safe_dump, safe_load
 
 
 def to_int(value: Any, default: int = 0) -> int:
@@ -109,8 +112,17 @@ def freeze_member_shape(member: dict[str, Any]) -> tuple[Any, ...]:
 
 
 def load_yaml(path: Path) -> Any:
+    if is_bundle(path.parent):
+        return open_bundle(path.parent).load(path.name)
     with path.open("r", encoding="utf-8") as handle:
-        return yaml.safe_load(handle)
+        return safe_load(handle)
+
+
+def yaml_paths(yaml_dir: Path, pattern: str) -> list[Path]:
+    """Sorted yaml files matching pattern in a directory, or in a device bundle (as bundle/name)."""
+    if is_bundle(yaml_dir):
+        return [yaml_dir / name for name in open_bundle(yaml_dir).glob(pattern)]
+    return sorted(yaml_dir.glob(pattern))
 
 
 @dataclass(frozen=True)
@@ -127,7 +139,7 @@ class PeripheralRecord:
 def load_register_signatures(yaml_dir: Path) -> dict[str, tuple[Any, ...]]:
     """Load signatures for all register_*.yml files in a directory."""
     signatures: dict[str, tuple[Any, ...]] = {}
-    for register_path in sorted(yaml_dir.glob("register_*.yml")):
+    for register_path in yaml_paths(yaml_dir, "register_*.yml"):
         data = load_yaml(register_path)
         if isinstance(data, dict):
             signatures[register_path.name] = freeze_register_signature(data)
@@ -159,12 +171,15 @@ def build_peripheral_signature(
         sorted((signature, count) for signature, count in register_counter.items())
     )
 
+    return (*peripheral_defaults(peripheral), member_shapes, register_shapes)
+
+
+def peripheral_defaults(peripheral: dict[str, Any]) -> tuple[int, int, str]:
+    """The leading (sizeof, default_depth, default_type) part of a peripheral signature."""
     return (
         to_int(peripheral.get("sizeof"), 0),
         to_int(peripheral.get("default_depth"), 0),
         str(peripheral.get("default_type", "")),
-        member_shapes,
-        register_shapes,
     )
 
 
@@ -233,9 +248,8 @@ def make_collision_safe_name(
 
 def collect_peripherals(yaml_dir: Path) -> list[PeripheralRecord]:
     register_signatures = load_register_signatures(yaml_dir)
-    records: list[PeripheralRecord] = []
-
-    for path in sorted(yaml_dir.glob("peripheral_*.yml")):
+    loaded: list[tuple[Path, dict[str, Any]]] = []
+    for path in yaml_paths(yaml_dir, "peripheral_*.yml"):
         data = load_yaml(path)
         if not isinstance(data, dict):
             continue
@@ -243,17 +257,37 @@ def collect_peripherals(yaml_dir: Path) -> list[PeripheralRecord]:
         peripheral = data.get("peripheral")
         if not isinstance(peripheral, dict):
             continue
+        ir_version(data)
+        loaded.append((path, peripheral))
 
-        signature = build_peripheral_signature(peripheral, register_signatures)
+    # Peripherals written with transmogrify --reuse-derived name the SVD
+    # peripheral they derive from and reference its register files, so they
+    # share its signature unless their own size or defaults differ.
+    signatures: dict[str, tuple[Any, ...]] = {}
+    for derived_pass in (False, True):
+        for path, peripheral in loaded:
+            raw_name = path.stem.removeprefix("peripheral_")
+            parent = peripheral.get("derived_from")
+            if (parent is not None) != derived_pass:
+                continue
+            signature = signatures.get(str(parent)) if parent is not None else None
+            if signature is None or signature[:3] != peripheral_defaults(peripheral):
+                signature = build_peripheral_signature(peripheral, register_signatures)
+            signatures[raw_name] = signature
+
+    records: list[PeripheralRecord] = []
+    for path, peripheral in loaded:
+        raw_name = path.stem.removeprefix("peripheral_")
+        base = peripheral.get("base", "")
         records.append(
             PeripheralRecord(
                 path=path,
-                raw_name=path.stem.removeprefix("peripheral_"),
-                name=str(peripheral.get("name", path.stem.removeprefix("peripheral_"))),
-                base=str(peripheral.get("base", "")),
+                raw_name=raw_name,
+                name=str(peripheral.get("name", raw_name)),
+                base=hex(base) if isinstance(base, int) else str(base),
                 member_count=len(peripheral.get("members", []) or []),
                 register_count=len(peripheral.get("registers", []) or []),
-                signature=signature,
+                signature=signatures[raw_name],
             )
         )
 
@@ -586,7 +620,8 @@ def unify_group(
     # Rename register file references and copy the files
     old_registers: list[str] = list(peripheral.get("registers") or [])
     new_registers: list[str] = []
-    old_prefix = f"register_{source_raw}_"
+    # a --reuse-derived peripheral references its parent's register files
+    old_prefix = f"register_{peripheral.pop('derived_from', source_raw)}_"
     for reg_filename in old_registers:
         if reg_filename.startswith(old_prefix):
             reg_suffix = reg_filename[len(old_prefix):]
@@ -597,7 +632,13 @@ def unify_group(
 
         src_reg = yaml_dir / reg_filename
         dst_reg = out_dir / new_reg_filename
-        if src_reg.exists() and not dst_reg.exists():
+        if dst_reg.exists():
+            continue
+        if is_bundle(yaml_dir):
+            bundle = open_bundle(yaml_dir)
+            if reg_filename in bundle:
+                dst_reg.write_text(bundle.text(reg_filename), encoding="utf-8")
+        elif src_reg.exists():
             shutil.copy2(src_reg, dst_reg)
 
     # Strip instance-specific fields
@@ -618,10 +659,12 @@ def unify_group(
         "namespaces": namespaces,
         "peripheral": peripheral,
     }
+    if IR_VERSION_KEY in source_data:
+        out_data[IR_VERSION_KEY] = ir_version(source_data)
 
     out_path = out_dir / f"peripheral_{canonical_type}.yml"
     with out_path.open("w", encoding="utf-8") as fh:
-        yaml.dump(out_data, fh, Dumper=yaml.SafeDumper)
+        safe_dump(out_data, fh)
 
     print(f"  Wrote {out_path.name}")
     print(f"  Wrote {len(new_registers)} register file(s) to {out_dir}")
@@ -637,7 +680,7 @@ def main(argv: list[str]) -> int:
     parser.add_argument(
         "yaml_dir",
         type=Path,
-        help="Folder containing generated peripheral_*.yml and register_*.yml files.",
+        help="Folder (or device bundle) containing generated peripheral_*.yml and register_*.yml files.",
     )
     parser.add_argument(
         "--min-group-size",
@@ -678,8 +721,8 @@ def main(argv: list[str]) -> int:
     args = parser.parse_args(argv)
 
     yaml_dir = args.yaml_dir
-    if not yaml_dir.exists() or not yaml_dir.is_dir():
-        print(f"Path must be an existing directory: {yaml_dir}", file=sys.stderr)
+    if not yaml_dir.is_dir() and not is_bundle(yaml_dir):
+        print(f"Path must be an existing directory or device bundle: {yaml_dir}", file=sys.stderr)
         return 2
 
     records = collect_peripherals(yaml_dir)
@@ -727,7 +770,7 @@ def main(argv: list[str]) -> int:
 
 class PeripheralDuplicateFinderCommand:
     name = "find-duplicates"
-    help = "Find duplicated peripheral YAML definitions with matching shapes."
+    help = FIND_DUPLICATES_HELP
 
     def configure_parser(self, parser: argparse.ArgumentParser) -> None:
         parser.description = (
@@ -737,7 +780,7 @@ class PeripheralDuplicateFinderCommand:
         parser.add_argument(
             "yaml_dir",
             type=Path,
-            help="Folder containing generated peripheral_*.yml and register_*.yml files.",
+            help="Folder (or device bundle) containing generated peripheral_*.yml and register_*.yml files.",
         )
         parser.add_argument(
             "--min-group-size",
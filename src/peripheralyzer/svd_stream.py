@@ -0,0 +1,557 @@
+"""Incremental CMSIS-SVD reader that walks a device one peripheral at a time.
+
+``cmsis_svd`` builds the complete device object tree before anything can be
+emitted. For large SoC descriptions that tree dominates both peak memory and
+time-to-first-output, so this module parses the SVD with ``iterparse`` and
+yields light-weight records shaped like the ``cmsis_svd`` model (the same
+attribute names the transmogrifier reads) for each ``<peripheral>`` as soon as
+its closing tag is seen. Only peripherals that are the target of a
+``derivedFrom`` are retained after they have been yielded.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+def _get_text(node: ElementTree.Element, tag: str, default: Any = None) -> Any:
+    child = node.find(tag)
+    if child is None or child.text is None:
+        return default
+    return child.text
+
+
+def parse_svd_int(text: str | None) -> int | None:
+    """Parse an SVD scaled integer the way ``cmsis_svd`` does (hex, ``#`` binary, decimal)."""
+    if text is None:
+        return None
+    value = text.strip().lower()
+    try:
+        if value.startswith("0x"):
+            return int(value[2:], 16)
+        if value.startswith("#"):
+            value = value.replace("x", "0")[1:]
+            return int(value, 2) if all(digit in "01" for digit in value) else int(value)
+        if value.startswith("true"):
+            return 1
+        if value.startswith("false"):
+            return 0
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _get_int(node: ElementTree.Element, tag: str) -> int | None:
+    return parse_svd_int(_get_text(node, tag))
+
+
+def _parse_dim_index(node: ElementTree.Element, dim: int | None) -> list[Any] | None:
+    text = _get_text(node, "dimIndex")
+    if not text:
+        return None if dim is None else list(range(dim))
+    if "," in text:
+        return text.split(",")
+    match = re.match(r"([0-9]+)-([0-9]+)", text)
+    if match:
+        return [str(value) for value in range(int(match.group(1)), int(match.group(2)) + 1)]
+    match = re.match(r"([A-Z])-([A-Z])", text)
+    if match:
+        return [chr(value) for value in range(ord(match.group(1)), ord(match.group(2)) + 1)]
+    raise ValueError(f'Unexpected dimIndex: "{text}"')
+
+
+def dim_name(name: str | None, dim_index: list[Any] | None, index: int) -> str | None:
+    """The name of element ``index`` of a dim array, ``name`` with ``%s`` replaced by its dimIndex."""
+    if name and "%s" in name and dim_index:
+        return name % dim_index[index]
+    return name
+
+
+@dataclass(slots=True)
+class StreamEnumeratedValue:
+    name: str | None
+    description: str | None
+    value: int | None
+
+
+@dataclass(slots=True)
+class StreamEnumeratedValues:
+    name: str | None
+    enumerated_values: list[StreamEnumeratedValue] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class StreamField:
+    name: str | None
+    description: str | None
+    bit_offset: int | None
+    bit_width: int | None
+    enumerated_values: list[StreamEnumeratedValues] | None = None
+
+    @property
+    def is_enumerated_type(self) -> bool:
+        return self.enumerated_values is not None
+
+
+@dataclass(slots=True)
+class StreamRegister:
+    name: str | None
+    description: str | None
+    address_offset: int | None
+    size: int | None
+    fields: list[StreamField] = field(default_factory=list)
+    dim: int | None = None
+    dim_increment: int | None = None
+    dim_index: list[Any] | None = None
+
+    def get_fields(self) -> list[StreamField]:
+        return list(self.fields)
+
+    def expand(self) -> list[StreamRegister]:
+        if self.dim is None:
+            return [self]
+        increment = self.dim_increment or 0
+        return [
+            StreamRegister(
+                name=dim_name(self.name, self.dim_index, index),
+                description=self.description,
+                address_offset=(self.address_offset or 0) + increment * index,
+                size=self.size,
+                fields=self.fields,
+            )
+            for index in range(self.dim)
+        ]
+
+
+@dataclass(slots=True)
+class StreamCluster:
+    name: str | None
+    description: str | None
+    address_offset: int | None
+    registers: list[StreamRegister] = field(default_factory=list)
+    clusters: list[StreamCluster] = field(default_factory=list)
+    dim: int | None = None
+    dim_increment: int | None = None
+    dim_index: list[Any] | None = None
+
+    def get_registers(self) -> list[StreamRegister]:
+        """Flatten the cluster into registers named ``{cluster}_{register}`` at absolute offsets."""
+        increment = self.dim_increment or 0
+        registers: list[StreamRegister] = []
+        for index in range(self.dim if self.dim is not None else 1):
+            name = dim_name(self.name, self.dim_index, index)
+            base = (self.address_offset or 0) + increment * index
+            contained = [register for item in self.registers for register in item.expand()]
+            contained += [register for cluster in self.clusters for register in cluster.get_registers()]
+            for register in contained:
+                registers.append(
+                    StreamRegister(
+                        name=f"{name}_{register.name}",
+                        description=register.description,
+                        address_offset=base + (register.address_offset or 0),
+                        size=register.size,
+                        fields=register.fields,
+                    )
+                )
+        return registers
+
+
+@dataclass(slots=True)
+class StreamAddressBlock:
+    offset: int | None
+    size: int | None
+
+
+@dataclass(slots=True)
+class StreamPeripheral:
+    name: str | None
+    description: str | None
+    base_address: int | None
+    address_blocks: list[StreamAddressBlock] = field(default_factory=list)
+    registers: list[StreamRegister | StreamCluster] = field(default_factory=list)
+    derived_from: str | None = None
+
+    def get_registers(self) -> list[StreamRegister]:
+        registers: list[StreamRegister] = []
+        for item in self.registers:
+            if isinstance(item, StreamCluster):
+                registers.extend(item.get_registers())
+            else:
+                registers.extend(item.expand())
+        return registers
+
+
+@dataclass(slots=True)
+class StreamDevice:
+    name: str | None
+    width: int | None
+    address_unit_bits: int | None
+    size: int | None
+
+
+def _derive_tags(source: ElementTree.Element, destination: ElementTree.Element) -> None:
+    """Copy the children of ``source`` whose tag is missing from ``destination``."""
+    present = {child.tag for child in destination}
+    for child in list(source):
+        if child.tag not in present:
+            destination.append(child)
+
+
+class SVDStreamReader:
+    """Iterate the peripherals of an SVD file without materializing the whole device."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._retain = self._scan_derived_targets()
+        self._retained: dict[str, ElementTree.Element] = {}
+        self._events = ElementTree.iterparse(os.fspath(path), events=("start", "end"))
+        self._device_properties: dict[str, str] = {}
+        self._device: StreamDevice | None = None
+        self._peripherals_node: ElementTree.Element | None = None
+
+    def _scan_derived_targets(self) -> set[str]:
+        """Find the peripherals that other elements derive from, so only those are kept."""
+        targets: set[str] = set()
+        for _, element in ElementTree.iterparse(os.fspath(self.path), events=("end",)):
+            derived_from = element.get("derivedFrom")
+            if derived_from:
+                if element.tag == "peripheral":
+                    targets.add(derived_from)
+                elif element.tag in ("register", "cluster") and "." in derived_from:
+                    targets.add(derived_from.split(".")[0])
+            if element.tag == "peripheral":
+                element.clear()
+        return targets
+
+    @property
+    def derived_targets(self) -> set[str]:
+        """Names of the peripherals that other elements derive from."""
+        return set(self._retain)
+
+    @property
+    def device(self) -> StreamDevice:
+        """Device-level properties, which SVD places before ``<peripherals>``."""
+        if self._device is None:
+            depth = 0
+            for event, element in self._events:
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and element.tag == "peripherals":
+                        self._peripherals_node = element
+                        break
+                    continue
+                depth -= 1
+                if depth == 1 and element.text is not None:
+                    self._device_properties[element.tag] = element.text
+            properties = self._device_properties
+            self._device = StreamDevice(
+                name=properties.get("name"),
+                width=parse_svd_int(properties.get("width")),
+                address_unit_bits=parse_svd_int(properties.get("addressUnitBits")),
+                size=parse_svd_int(properties.get("size")),
+            )
+        return self._device
+
+    def iter_peripherals(self) -> Iterator[StreamPeripheral]:
+        """Yield each peripheral in document order.
+
+        A peripheral deriving from one that has not been seen yet is deferred
+        until its parent arrives (or the end of the file).
+        """
+        device = self.device
+        deferred: dict[str, list[ElementTree.Element]] = {}
+        depth = 2
+        for event, element in self._events:
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth != 2 or element.tag != "peripheral":
+                continue
+            parent_name = element.get("derivedFrom")
+            if parent_name and parent_name not in self._retained:
+                deferred.setdefault(parent_name, []).append(element)
+                continue
+            ready = [element]
+            while ready:
+                current = ready.pop(0)
+                yield from self._parse_peripherals(current, device)
+                name = _get_text(current, "name")
+                if self._peripherals_node is not None:
+                    self._peripherals_node.remove(current)
+                if name in self._retain:
+                    self._retained[name] = current
+                else:
+                    current.clear()
+                ready.extend(deferred.pop(name, []))
+        for elements in deferred.values():
+            for element in elements:
+                yield from self._parse_peripherals(element, device)
+
+    def _resolve_derived(self, peripheral: ElementTree.Element) -> None:
+        parent_name = peripheral.get("derivedFrom")
+        if parent_name and parent_name in self._retained:
+            _derive_tags(self._retained[parent_name], peripheral)
+
+        for destination in peripheral.iter("enumeratedValues"):
+            source_name = destination.get("derivedFrom")
+            if not source_name or destination.find("enumeratedValue") is not None:
+                continue
+            for source in peripheral.iter("enumeratedValues"):
+                if source is not destination and _get_text(source, "name") == source_name:
+                    for value in source.findall("enumeratedValue"):
+                        destination.append(value)
+                    break
+
+        for container in peripheral.iter():
+            for tag in ("register", "cluster", "field"):
+                for destination in container.findall(tag):
+                    source_path = destination.get("derivedFrom")
+                    if not source_path:
+                        continue
+                    source = self._find_derived_source(container, tag, source_path)
+                    if source is not None and source is not destination:
+                        _derive_tags(source, destination)
+
+    def _find_derived_source(
+        self, container: ElementTree.Element, tag: str, source_path: str
+    ) -> ElementTree.Element | None:
+        parts = source_path.split(".")
+        if len(parts) == 1:
+            for sibling in container.findall(tag):
+                if _get_text(sibling, "name") == parts[0]:
+                    return sibling
+            return None
+        retained = self._retained.get(parts[0])
+        if retained is None:
+            return None
+        for candidate in retained.iter(tag):
+            if _get_text(candidate, "name") == parts[-1]:
+                return candidate
+        return None
+
+    def _parse_peripherals(self, node: ElementTree.Element, device: StreamDevice) -> list[StreamPeripheral]:
+        self._resolve_derived(node)
+        size = _get_int(node, "size")
+        if size is None:
+            size = device.size
+        registers: list[StreamRegister | StreamCluster] = [
+            self._parse_register(register, size) for register in node.findall("./registers/register")
+        ]
+        registers += [self._parse_cluster(cluster, size) for cluster in node.findall("./registers/cluster")]
+        name = _get_text(node, "name")
+        base_address = _get_int(node, "baseAddress")
+        address_blocks = [
+            StreamAddressBlock(offset=_get_int(block, "offset"), size=_get_int(block, "size"))
+            for block in node.findall("addressBlock")
+        ]
+        dim = _get_int(node, "dim")
+        if dim is None:
+            return [
+                StreamPeripheral(name, _get_text(node, "description"), base_address, address_blocks,
+                                 registers, node.get("derivedFrom"))
+            ]
+        dim_index = _parse_dim_index(node, dim)
+        increment = _get_int(node, "dimIncrement") or 0
+        return [
+            StreamPeripheral(
+                dim_name(name, dim_index, index),
+                _get_text(node, "description"),
+                None if base_address is None else base_address + increment * index,
+                address_blocks,
+                registers,
+                node.get("derivedFrom"),
+            )
+            for index in range(dim)
+        ]
+
+    def _parse_cluster(self, node: ElementTree.Element, size: int | None) -> StreamCluster:
+        dim = _get_int(node, "dim")
+        return StreamCluster(
+            name=_get_text(node, "name"),
+            description=_get_text(node, "description"),
+            address_offset=_get_int(node, "addressOffset"),
+            registers=[self._parse_register(register, size) for register in node.findall("register")],
+            clusters=[self._parse_cluster(cluster, size) for cluster in node.findall("cluster")],
+            dim=dim,
+            dim_increment=_get_int(node, "dimIncrement"),
+            dim_index=_parse_dim_index(node, dim),
+        )
+
+    def _parse_register(self, node: ElementTree.Element, size: int | None) -> StreamRegister:
+        dim = _get_int(node, "dim")
+        register_size = _get_int(node, "size")
+        fields: list[StreamField] = []
+        for field_node in node.findall("./fields/field"):
+            fields.extend(self._parse_fields(field_node))
+        return StreamRegister(
+            name=_get_text(node, "name"),
+            description=_get_text(node, "description"),
+            address_offset=_get_int(node, "addressOffset"),
+            size=size if register_size is None else register_size,
+            fields=fields,
+            dim=dim,
+            dim_increment=_get_int(node, "dimIncrement"),
+            dim_index=_parse_dim_index(node, dim),
+        )
+
+    def _parse_fields(self, node: ElementTree.Element) -> list[StreamField]:
+        bit_offset = _get_int(node, "bitOffset")
+        bit_width = _get_int(node, "bitWidth")
+        bit_range = _get_text(node, "bitRange")
+        lsb = _get_int(node, "lsb")
+        msb = _get_int(node, "msb")
+        if bit_range is not None:
+            match = re.search(r"\[([0-9]+):([0-9]+)\]", bit_range)
+            if match:
+                bit_offset = int(match.group(2))
+                bit_width = 1 + int(match.group(1)) - int(match.group(2))
+        elif msb is not None and lsb is not None:
+            bit_offset = lsb
+            bit_width = 1 + msb - lsb
+
+        enumerated_values = [
+            StreamEnumeratedValues(
+                name=_get_text(values, "name"),
+                enumerated_values=[
+                    StreamEnumeratedValue(
+                        name=_get_text(value, "name"),
+                        description=_get_text(value, "description"),
+                        value=_get_int(value, "value"),
+                    )
+                    for value in values.findall("enumeratedValue")
+                ],
+            )
+            for values in node.findall("enumeratedValues")
+        ]
+        name = _get_text(node, "name")
+        description = _get_text(node, "description")
+        dim = _get_int(node, "dim")
+        if dim is None:
+            return [StreamField(name, description, bit_offset, bit_width, enumerated_values or None)]
+        dim_index = _parse_dim_index(node, dim)
+        increment = _get_int(node, "dimIncrement") or 0
+        return [
+            StreamField(
+                dim_name(name, dim_index, index),
+                description,
+                None if bit_offset is None else bit_offset + increment * index,
+                bit_width,
+                enumerated_values or None,
+            )
+            for index in range(dim)
+        ]
+
+
+def detach_peripheral(peripheral: Any) -> StreamPeripheral:
+    """Copy a peripheral from any SVD model into plain records.
+
+    ``cmsis_svd`` objects hold parent references and cannot be pickled, so
+    they are converted before being handed to another process. Registers are
+    stored already expanded.
+    """
+    if isinstance(peripheral, StreamPeripheral):
+        return peripheral
+    registers: list[StreamRegister | StreamCluster] = [
+        _detach_register(register) for register in peripheral.get_registers()
+    ]
+    return StreamPeripheral(
+        name=peripheral.name,
+        description=getattr(peripheral, "description", None),
+        base_address=peripheral.base_address,
+        address_blocks=[
+            StreamAddressBlock(block.offset, block.size)
+            for block in getattr(peripheral, "address_blocks", []) or []
+        ],
+        registers=registers,
+        derived_from=getattr(peripheral, "derived_from", None),
+    )
+
+
+def detach_items(peripheral: Any) -> list[StreamRegister | StreamCluster]:
+    """The registers and clusters of a peripheral as stream records, with dim arrays left unexpanded.
+
+    Offsets of cluster contents stay relative to their cluster and register
+    names keep their ``%s`` placeholder.
+    """
+    if isinstance(peripheral, StreamPeripheral):
+        return list(peripheral.registers)
+    return [_detach_item(item) for item in getattr(peripheral, "registers", None) or []]
+
+
+def _detach_item(item: Any) -> StreamRegister | StreamCluster:
+    # cmsis_svd wraps dim arrays around their unexpanded definition
+    meta_register = getattr(item, "meta_register", None)
+    if meta_register is not None:
+        return _detach_register(meta_register, dimensioned=True)
+    meta_cluster = getattr(item, "meta_cluster", None)
+    if meta_cluster is not None:
+        return _detach_cluster(meta_cluster)
+    if hasattr(item, "clusters"):
+        return _detach_cluster(item)
+    return _detach_register(item)
+
+
+def _detach_cluster(cluster: Any) -> StreamCluster:
+    registers: list[StreamRegister] = []
+    for item in cluster.registers or []:
+        register = _detach_item(item)
+        assert isinstance(register, StreamRegister)
+        if cluster.dim is None and register.dim is None:
+            # cmsis_svd relocates the registers of a plain cluster to absolute, prefixed registers
+            register.name = (register.name or "").removeprefix(f"{cluster.name}_")
+            register.address_offset = (register.address_offset or 0) - (cluster.address_offset or 0)
+        registers.append(register)
+    clusters = [_detach_cluster(getattr(item, "meta_cluster", None) or item) for item in cluster.clusters or []]
+    return StreamCluster(
+        name=cluster.name,
+        description=getattr(cluster, "description", None),
+        address_offset=cluster.address_offset,
+        registers=registers,
+        clusters=clusters,
+        dim=cluster.dim,
+        dim_increment=cluster.dim_increment,
+        dim_index=cluster.dim_index,
+    )
+
+
+def _detach_register(register: Any, dimensioned: bool = False) -> StreamRegister:
+    fields: list[StreamField] = []
+    for svd_field in register.get_fields():
+        enumerated_values = None
+        if svd_field.is_enumerated_type:
+            enumerated_values = [
+                StreamEnumeratedValues(
+                    name=getattr(values, "name", None),
+                    enumerated_values=[
+                        StreamEnumeratedValue(value.name, value.description, value.value)
+                        for value in getattr(values, "enumerated_values", []) or []
+                    ],
+                )
+                for values in svd_field.enumerated_values or []
+            ]
+        fields.append(
+            StreamField(
+                svd_field.name,
+                getattr(svd_field, "description", None),
+                svd_field.bit_offset,
+                svd_field.bit_width,
+                enumerated_values,
+            )
+        )
+    return StreamRegister(
+        name=register.name,
+        description=getattr(register, "description", None),
+        address_offset=register.address_offset,
+        size=register.size,
+        fields=fields,
+        dim=register.dim if dimensioned else None,
+        dim_increment=register.dim_increment if dimensioned else None,
+        dim_index=register.dim_index if dimensioned else None,
+    )
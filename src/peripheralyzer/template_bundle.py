@@ -0,0 +1,74 @@
+"""Precompiled bundle of the packaged generate templates.
+
+At build time the templates under ``templates/`` are compiled into a zip of
+Python modules next to this file; ``generate`` then loads them through a
+``jinja2.ModuleLoader`` and skips parsing and compiling entirely. The bundle
+name carries the Jinja version, because compiled templates are version
+specific, and a digest of the template sources, so edited templates never
+run stale compiled code. This module only depends on the standard library and Jinja so the
+build hook in ``setup.py`` can load it without importing the package; Jinja itself is only
+imported when a bundle is looked up or compiled.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+
+def camel_to_snake_case(name: str) -> str:
+    """Convert CamelCase text into snake_case."""
+    snake_string = re.sub("([A-Z])", r"_\1", name)
+    return snake_string.lower().lstrip("_")
+
+
+def hex_literal(value: Any) -> Any:
+    """Format an integer as hex for the generated code; strings from legacy YAML pass through."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return hex(value)
+    return value
+
+
+TEMPLATE_FILTERS: dict[str, Callable[..., Any]] = {
+    "debug": lambda value: print(value) or value,
+    "list": list,
+    "conjoin": lambda namespace: f"{namespace}::",
+    "snake_case": camel_to_snake_case,
+    "hex": hex_literal,
+}
+
+
+def sources_digest(template_root: Path) -> str:
+    digest = hashlib.sha256()
+    for template in sorted(template_root.glob("*.jinja")):
+        digest.update(template.name.encode("utf-8") + b"\0")
+        digest.update(template.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def bundle_filename(template_root: Path) -> str:
+    import jinja2
+
+    return f"templates-jinja-{jinja2.__version__}-{sources_digest(template_root)}.zip"
+
+
+def packaged_bundle(package_dir: Path | None = None) -> Path | None:
+    """The precompiled bundle for the packaged templates, or None when none was built for them."""
+    package_dir = Path(__file__).resolve().parent if package_dir is None else package_dir
+    bundle = package_dir / bundle_filename(package_dir / "templates")
+    return bundle if bundle.is_file() else None
+
+
+def compile_template_bundle(template_root: Path, package_dir: Path) -> Path:
+    """Compile every template in template_root into the bundle inside package_dir."""
+    import jinja2
+
+    environment = jinja2.Environment(loader=jinja2.FileSystemLoader(os.fspath(template_root)))
+    environment.filters.update(TEMPLATE_FILTERS)
+    bundle = package_dir / bundle_filename(template_root)
+    environment.compile_templates(os.fspath(bundle), extensions=["jinja"], zip="deflated", ignore_errors=False)
+    return bundle
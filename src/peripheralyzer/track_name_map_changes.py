@@ -9,7 +9,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import yaml
+from .command_help import TRACK_NAME_MAP_CHANGES_HELP
+from .yaml_io import safe_dump, safe_load
 
 
 @dataclass(slots=True)
@@ -32,7 +33,7 @@ class TrackNameMapChangesOptions:
 class NameMapSnapshotService:
     @staticmethod
     def compute_hash(data: dict[str, Any]) -> str:
-        yaml_str = yaml.dump(data, sort_keys=True, default_flow_style=False)
+        yaml_str = safe_dump(data, sort_keys=True, default_flow_style=False)
         return hashlib.md5(yaml_str.encode()).hexdigest()
 
     @staticmethod
@@ -40,7 +41,7 @@ class NameMapSnapshotService:
         if not filepath.exists():
             return {}
         with filepath.open("r", encoding="utf-8") as handle:
-            data = yaml.safe_load(handle)
+            data = safe_load(handle)
         return data or {}
 
     @staticmethod
@@ -79,7 +80,7 @@ class TrackNameMapChangesApp:
             hash_val = self.service.compute_hash(data)
 
             with snapshot_file.open("w", encoding="utf-8") as handle:
-                yaml.dump(data, handle, sort_keys=True, default_flow_style=False)
+                safe_dump(data, handle, sort_keys=True, default_flow_style=False)
 
             with hash_file.open("w", encoding="utf-8") as handle:
                 handle.write(hash_val)
@@ -154,7 +155,7 @@ class TrackNameMapChangesApp:
 
 class TrackNameMapChangesCommand:
     name = "track-name-map-changes"
-    help = "Track changes to naming maps during transmogrify processing."
+    help = TRACK_NAME_MAP_CHANGES_HELP
 
     def configure_parser(self, parser: argparse.ArgumentParser) -> None:
         parser.description = self.help
@@ -3,23 +3,80 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import fnmatch
+import io
 import os
 import re
 import sys
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any, cast
 
-import yaml
 from cmsis_svd.parser import SVDParser
 
+from .bundle import render_bundle
+from .command_help import TRANSMOGRIFY_HELP
+from .ir import IR_VERSION_KEY, IR_VERSIONS, LEGACY_IR_VERSION, NATIVE_IR_VERSION, as_int
+from .manifest import Manifest, PeripheralRecord, digest_text
+from .ninja import NinjaWriter, command
+from .output import write_if_changed
+from .svd_stream import SVDStreamReader, StreamCluster, detach_items, detach_peripheral, dim_name
+from .yaml_io import safe_dump, safe_load, sorted_dump
 
-class SortedSafeDumper(yaml.SafeDumper):
-    def represent_sequence(self, tag: str, sequence: Any, flow_style: bool | None = None) -> Any:
-        if sequence is not None and sequence and isinstance(sequence[0], str):
-            sequence = sorted(sequence)
-        return super().represent_sequence(tag, sequence, flow_style)
+
+_WILDCARDS = "*?["
+# Hex digits of the content digest used to name deduplicated register and enum files.
+DEDUPE_DIGEST_LENGTH = 16
+
+
+class OverrideIndex:
+    """The overrides of one name map entry, compiled once and ranked up front.
+
+    Glob patterns are ranked the way ``fnmatch`` matches were always sorted
+    (fewest wildcards, then longest pattern, then alphabetically) and grouped by
+    the literal text before their first wildcard, so a context is only matched
+    against patterns whose prefix it actually starts with.
+    """
+
+    def __init__(self, overrides: dict[Any, Any]) -> None:
+        self._exact: dict[str, dict[str, Any]] = {}
+        ranked: list[tuple[int, int, str, dict[str, Any]]] = []
+        for pattern, override in overrides.items():
+            if not isinstance(pattern, str) or not isinstance(override, dict):
+                continue
+            self._exact[pattern] = override
+            if any(token in pattern for token in _WILDCARDS):
+                wildcard_count = sum(pattern.count(token) for token in _WILDCARDS)
+                ranked.append((wildcard_count, -len(pattern), pattern, override))
+        ranked.sort(key=lambda match: (match[0], match[1], match[2]))
+
+        self._groups: dict[str, list[tuple[int, re.Pattern[str], dict[str, Any]]]] = {}
+        for rank, (_, _, pattern, override) in enumerate(ranked):
+            prefix = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+            compiled = re.compile(fnmatch.translate(pattern))
+            self._groups.setdefault(prefix, []).append((rank, compiled, override))
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._groups})
+
+    def best(self, context: str) -> dict[str, Any] | None:
+        exact_override = self._exact.get(context)
+        if exact_override is not None:
+            return exact_override
+
+        best_rank = -1
+        best_override: dict[str, Any] | None = None
+        for length in self._prefix_lengths:
+            if length > len(context):
+                break
+            for rank, compiled, override in self._groups.get(context[:length], ()):
+                if best_override is not None and rank > best_rank:
+                    break
+                if compiled.match(context):
+                    best_rank, best_override = rank, override
+                    break
+        return best_override
 
 
 @dataclass(slots=True)
@@ -36,6 +93,21 @@ class TransmogrifyOptions:
     fragment_templates: list[str]
     fragment_aggregate_target: str
     preserve_name_map: bool
+    stream: bool
+    jobs: int
+    incremental: bool
+    ir_version: int = LEGACY_IR_VERSION
+    bundle: Path | None = None
+    dedupe: bool = False
+    reuse_derived: bool = False
+    compact_arrays: bool = False
+    emit_ninja: Path | None = None
+    ninja_batches: int = 1
+
+    @property
+    def emits_build_file(self) -> bool:
+        """Whether this run only writes a Makefile fragment or ninja file, and no yaml."""
+        return bool(self.emit_fragment or self.emit_ninja)
 
     @classmethod
     def from_namespace(cls, args: argparse.Namespace) -> "TransmogrifyOptions":
@@ -52,6 +124,16 @@ class TransmogrifyOptions:
             fragment_templates=list(args.fragment_templates or []),
             fragment_aggregate_target=args.fragment_aggregate_target,
             preserve_name_map=bool(args.preserve_name_map),
+            stream=bool(args.stream),
+            jobs=int(args.jobs),
+            incremental=bool(args.incremental),
+            ir_version=int(getattr(args, "ir_version", LEGACY_IR_VERSION)),
+            bundle=None if getattr(args, "bundle", None) is None else Path(args.bundle),
+            dedupe=bool(getattr(args, "dedupe", False)),
+            reuse_derived=bool(getattr(args, "reuse_derived", False)),
+            compact_arrays=bool(getattr(args, "compact_arrays", False)),
+            emit_ninja=None if getattr(args, "emit_ninja", None) is None else Path(args.emit_ninja),
+            ninja_batches=int(getattr(args, "ninja_batches", 1)),
         )
 
 
@@ -63,12 +145,19 @@ class NameMapper:
         self._name_map: dict[str, dict[str, Any]] = {}
         self._original_keys: set[str] = set()
         self._new_entries: dict[str, dict[str, Any]] = {}
+        self._journal: list[tuple[str, str | None]] | None = None
+        self._recording: list[tuple[str, str | None]] | None = None
+        self._override_indexes: dict[str, OverrideIndex] = {}
+        self._resolved: dict[tuple[str, str | None], dict[str, Any]] = {}
+        # Insertion ordered sets of the contexts each name was seen in, written
+        # back to the entries' "context" lists by dump().
+        self._contexts: dict[str, dict[str | None, None]] = {}
 
         if self._file_path.exists():
             if self._verbose:
                 print(f"Loading {self._file_path}")
             with self._file_path.open("r", encoding="utf-8") as handle:
-                data = yaml.safe_load(handle)
+                data = safe_load(handle)
             if isinstance(data, dict):
                 self._name_map = data
                 self._original_keys = set(self._name_map.keys())
@@ -88,56 +177,104 @@ class NameMapper:
                 if isinstance(override, dict):
                     self._normalize_entry(override)
 
-    def _best_override(self, entry: dict[str, Any], context: str | None) -> dict[str, Any] | None:
+    def _best_override(self, name: str, entry: dict[str, Any], context: str | None) -> dict[str, Any] | None:
         overrides = entry.get("overrides")
         if not context or not isinstance(overrides, dict):
             return None
 
-        exact_override = overrides.get(context)
-        if isinstance(exact_override, dict):
-            return exact_override
-
-        matches: list[tuple[int, int, str, dict[str, Any]]] = []
-        for pattern, override in overrides.items():
-            if not isinstance(pattern, str) or not isinstance(override, dict):
-                continue
-            if fnmatch.fnmatchcase(context, pattern):
-                wildcard_count = sum(pattern.count(token) for token in "*?[")
-                matches.append((wildcard_count, -len(pattern), pattern, override))
-
-        if not matches:
-            return None
-
-        matches.sort(key=lambda match: (match[0], match[1], match[2]))
-        return matches[0][3]
-
-    def lookup(self, name: str, context: str | None) -> dict[str, Any]:
+        index = self._override_indexes.get(name)
+        if index is None:
+            index = self._override_indexes[name] = OverrideIndex(overrides)
+        return index.best(context)
+
+    def start_journal(self) -> None:
+        """Begin recording every lookup so it can be replayed into another mapper."""
+        self._journal = []
+
+    def take_journal(self) -> list[tuple[str, str | None]]:
+        journal = self._journal or []
+        self._journal = []
+        return journal
+
+    def replay(self, journal: list[tuple[str, str | None]]) -> None:
+        recording, self._journal = self._journal, None
+        for name, context in journal:
+            self.lookup(name, context)
+        self._journal = recording
+
+    @contextlib.contextmanager
+    def recording(self, lookups: list[tuple[str, str | None]]) -> Iterator[None]:
+        """Also append every lookup made inside the block to lookups."""
+        previous, self._recording = self._recording, lookups
+        try:
+            yield
+        finally:
+            self._recording = previous
+
+    def resolves_alike(self, name: str, context: str | None, other: str | None) -> bool:
+        """Whether name maps to the same type and variable names in both contexts."""
+        first, second = self.resolve(name, context), self.resolve(name, other)
+        return (first["as_type"], first["as_variable"]) == (second["as_type"], second["as_variable"])
+
+    def signature(self, journal: list[tuple[str, str | None]]) -> str:
+        """Digest of the names every lookup in journal resolves to right now."""
+        lines = []
+        for name, context in journal:
+            resolved = self.resolve(name, context)
+            lines.append(f"{resolved['as_type']}\t{resolved['as_variable']}")
+        return digest_text("\n".join(lines))
+
+    def resolve(self, name: str, context: str | None) -> dict[str, Any]:
+        """The entry lookup() returns for name in context, without recording the lookup."""
         if name not in self._name_map:
-            new_entry = {
+            return {
                 "as_type": name,
                 "as_variable": name.lower(),
                 "context": [context],
             }
+
+        # The same (name, context) is looked up several times per register
+        # and the resolved entry cannot change once the map is loaded.
+        key = (name, context)
+        resolved = self._resolved.get(key)
+        if resolved is not None:
+            return resolved
+
+        entry = self._name_map[name]
+        override = self._best_override(name, entry, context)
+        if override is None:
+            resolved = entry
+        else:
+            resolved = dict(entry)
+            resolved.update(override)
+            resolved["context"] = entry.get("context", [])
+        self._resolved[key] = resolved
+        return resolved
+
+    def lookup(self, name: str, context: str | None) -> dict[str, Any]:
+        if self._journal is not None:
+            self._journal.append((name, context))
+        if self._recording is not None:
+            self._recording.append((name, context))
+        if name not in self._name_map:
+            new_entry = self.resolve(name, context)
             if self._preserve_existing:
                 self._new_entries[name] = new_entry
                 return new_entry
             self._name_map[name] = new_entry
 
         entry = self._name_map[name]
-        if "context" in entry:
-            if context and context not in entry["context"]:
-                entry["context"].append(context)
-        else:
-            entry["context"] = [context]
-
-        override = self._best_override(entry, context)
-        if override is None:
-            return entry
-
-        merged_entry = dict(entry)
-        merged_entry.update(override)
-        merged_entry["context"] = entry["context"]
-        return merged_entry
+        contexts = self._contexts.get(name)
+        if contexts is None:
+            if "context" in entry:
+                contexts = dict.fromkeys(entry["context"])
+            else:
+                entry["context"] = []
+                contexts = {context: None}
+            self._contexts[name] = contexts
+        if context and context not in contexts:
+            contexts[context] = None
+        return self.resolve(name, context)
 
     def as_type(self, name: str, context: str | None = None) -> str:
         return str(self.lookup(name, context)["as_type"])
@@ -145,15 +282,19 @@ class NameMapper:
     def as_variable(self, name: str, context: str | None = None) -> str:
         return str(self.lookup(name, context)["as_variable"])
 
+    def _materialize_contexts(self) -> None:
+        for name, contexts in self._contexts.items():
+            self._name_map[name]["context"][:] = contexts
+
     def dump(self) -> None:
         if self._verbose:
             print(f"Dumping {self._file_path}")
         assert self._name_map
+        self._materialize_contexts()
 
         if self._preserve_existing:
             original_map = {key: value for key, value in self._name_map.items() if key in self._original_keys}
-            with self._file_path.open("w", encoding="utf-8") as handle:
-                yaml.dump(data=original_map, stream=handle, sort_keys=True, Dumper=SortedSafeDumper)
+            write_if_changed(self._file_path, sorted_dump(original_map, sort_keys=True))
             if self._new_entries:
                 new_entries_file = self._file_path.with_name(
                     self._file_path.stem + "_new_entries" + self._file_path.suffix
@@ -161,11 +302,45 @@ class NameMapper:
                 if self._verbose:
                     print(f"Discovered {len(self._new_entries)} new entries")
                     print(f"Writing new entries to {new_entries_file}")
-                with new_entries_file.open("w", encoding="utf-8") as handle:
-                    yaml.dump(data=self._new_entries, stream=handle, sort_keys=True, Dumper=SortedSafeDumper)
+                write_if_changed(new_entries_file, sorted_dump(self._new_entries, sort_keys=True))
         else:
-            with self._file_path.open("w", encoding="utf-8") as handle:
-                yaml.dump(data=self._name_map, stream=handle, sort_keys=True, Dumper=SortedSafeDumper)
+            write_if_changed(self._file_path, sorted_dump(self._name_map, sort_keys=True))
+
+
+def _device_peripherals(svd_device: Any) -> list[Any]:
+    get_peripherals = getattr(svd_device, "get_peripherals", None)
+    if callable(get_peripherals):
+        return cast(list[Any], get_peripherals())
+    return cast(list[Any], svd_device.peripherals or [])
+
+
+def _peripheral_registers(svd_peripheral: Any) -> list[Any]:
+    """Registers with dim arrays and clusters expanded, whichever SVD model supplied them."""
+    get_registers = getattr(svd_peripheral, "get_registers", None)
+    if callable(get_registers):
+        return cast(list[Any], get_registers())
+    return cast(list[Any], getattr(svd_peripheral, "registers", []) or [])
+
+
+def _register_fields(svd_register: Any) -> list[Any]:
+    get_fields = getattr(svd_register, "get_fields", None)
+    if callable(get_fields):
+        return cast(list[Any], get_fields())
+    return cast(list[Any], getattr(svd_register, "fields", []) or [])
+
+
+def _array_name(name: str) -> str:
+    """The name of a dim array without its ``%s`` placeholder, ``CH%s`` or ``CH[%s]`` becoming ``CH``."""
+    return name.replace("[%s]", "").replace("%s", "")
+
+
+def _is_default_dim_index(dim: int, dim_index: list[Any] | None) -> bool:
+    return dim_index is None or [str(index) for index in dim_index] == [str(index) for index in range(dim)]
+
+
+def _file_scope(scope: str) -> str:
+    """A name map scope (``DMA1.STREAM``) as used in yaml filenames (``DMA1_STREAM``)."""
+    return scope.replace(".", "_")
 
 
 def fix_comment(comment: str | None) -> str:
@@ -183,39 +358,234 @@ def fix_sizeof(sizeof: int | str) -> int:
 
 
 class YamlDumper:
-    def __init__(self, dry_run: bool = False, verbose: bool = False) -> None:
+    def __init__(
+        self,
+        dry_run: bool = False,
+        verbose: bool = False,
+        previous_digests: dict[Path, str] | None = None,
+    ) -> None:
         self._file_map: dict[Path, bool] = {}
         self._dry_run = dry_run
         self._verbose = verbose
+        # When tracking digests, files whose text matches the previous run are left untouched.
+        self._previous_digests = previous_digests
+        self.digests: dict[Path, str] = {}
+        # Content-addressed paths, which any number of peripherals may claim.
+        self._shared: set[Path] = set()
 
     def output_paths(self) -> list[Path]:
         return sorted(self._file_map.keys())
 
-    def dump(self, data: dict[str, Any], yaml_file_path: Path) -> None:
+    def claimed_since(self, mark: int) -> list[Path]:
+        """Paths claimed after output count ``mark``, in the order they were claimed."""
+        return list(self._file_map)[mark:]
+
+    def claimed_count(self) -> int:
+        return len(self._file_map)
+
+    @staticmethod
+    def render(data: dict[str, Any]) -> str:
+        return cast(str, safe_dump(data))
+
+    def dump(self, data: dict[str, Any], yaml_file_path: Path, shared: bool = False) -> None:
+        """Write data to yaml_file_path; shared paths are named after their contents and written once."""
+        if shared and yaml_file_path in self._shared:
+            return
         if self._verbose:
-            print(yaml.dump(data))
+            print(safe_dump(data))
+        self.write(yaml_file_path, None if self._dry_run else self.render(data), shared)
+
+    def _claim(self, yaml_file_path: Path, shared: bool) -> bool:
+        """Claim yaml_file_path, returning False if it is a shared path that was already claimed."""
         if yaml_file_path in self._file_map:
+            if shared and yaml_file_path in self._shared:
+                return False
             raise ValueError(f"Duplicate name found! {yaml_file_path}")
         self._file_map[yaml_file_path] = True
-        if self._dry_run:
+        if shared:
+            self._shared.add(yaml_file_path)
+        return True
+
+    def write(self, yaml_file_path: Path, text: str | None, shared: bool = False) -> None:
+        """Claim yaml_file_path and write already rendered text to it (None when dry running)."""
+        if not self._claim(yaml_file_path, shared):
+            return
+        if self._dry_run or text is None:
+            return
+        if self._previous_digests is not None:
+            digest = digest_text(text)
+            self.digests[yaml_file_path] = digest
+            if self._previous_digests.get(yaml_file_path) == digest and yaml_file_path.exists():
+                return
+        write_if_changed(yaml_file_path, text)
+
+
+class BundleYamlDumper(YamlDumper):
+    """Collects every yaml document so they can be written as one device bundle."""
+
+    def __init__(self, dry_run: bool = False, verbose: bool = False) -> None:
+        super().__init__(dry_run=dry_run, verbose=verbose)
+        self.documents: dict[str, str] = {}
+
+    def write(self, yaml_file_path: Path, text: str | None, shared: bool = False) -> None:
+        if self._claim(yaml_file_path, shared) and text is not None:
+            self.documents[yaml_file_path.name] = text
+
+    def save(self, bundle_path: Path) -> None:
+        if not self._dry_run:
+            write_if_changed(bundle_path, render_bundle(self.documents))
+
+
+class MemoryYamlDumper(YamlDumper):
+    """Keeps every document in memory, keyed by filename, for rendering without a YAML round trip.
+
+    The documents are still written to disk as usual unless dry running.
+    """
+
+    def __init__(self, dry_run: bool = False, verbose: bool = False) -> None:
+        super().__init__(dry_run=dry_run, verbose=verbose)
+        self.documents: dict[str, dict[str, Any]] = {}
+
+    def dump(self, data: dict[str, Any], yaml_file_path: Path, shared: bool = False) -> None:
+        if shared and yaml_file_path in self._shared:
             return
-        yaml_file_path.parent.mkdir(parents=True, exist_ok=True)
-        with yaml_file_path.open("w", encoding="utf-8") as handle:
-            yaml.dump(data, handle, Dumper=yaml.SafeDumper)
+        super().dump(data, yaml_file_path, shared)
+        self.documents[yaml_file_path.name] = data
+
+
+class DeferredYamlDumper(YamlDumper):
+    """Renders yaml without writing it so a worker process can hand the text back to the parent."""
+
+    def __init__(self, dry_run: bool = False, verbose: bool = False) -> None:
+        super().__init__(dry_run=dry_run, verbose=verbose)
+        self.pending: list[tuple[Path, str | None, bool]] = []
+
+    def dump(self, data: dict[str, Any], yaml_file_path: Path, shared: bool = False) -> None:
+        if shared:
+            if yaml_file_path in self._shared:
+                return
+            self._shared.add(yaml_file_path)
+        if self._verbose:
+            print(safe_dump(data))
+        self.pending.append((yaml_file_path, None if self._dry_run else self.render(data), shared))
+
+    def take_pending(self) -> list[tuple[Path, str | None, bool]]:
+        pending = self.pending
+        self.pending = []
+        return pending
+
+
+@dataclass(slots=True)
+class DerivationSource:
+    """What a ``derivedFrom`` target produced, kept so derived peripherals can reference it.
+
+    ``registers`` is a digest of the target's registers, so the source can be
+    kept in the incremental manifest and restored when the target is reused.
+    """
+
+    registers: str
+    files: list[str]
+    lookups: list[tuple[str, str | None]]
+    structures: list[str] = field(default_factory=list)
+    inputs: list[str] = field(default_factory=list)
+
+    def to_data(self) -> dict[str, Any]:
+        return {
+            "registers": self.registers,
+            "files": list(self.files),
+            "lookups": [[name, context] for name, context in self.lookups],
+            "structures": list(self.structures),
+            "inputs": list(self.inputs),
+        }
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any]) -> "DerivationSource":
+        return cls(
+            registers=str(data["registers"]),
+            files=[str(name) for name in data.get("files", [])],
+            lookups=[(str(name), context) for name, context in data.get("lookups", [])],
+            structures=[str(name) for name in data.get("structures", [])],
+            inputs=[str(name) for name in data.get("inputs", [])],
+        )
+
+
+@dataclass(slots=True)
+class PeripheralResult:
+    """Everything a worker produced for one peripheral, merged by the parent in SVD order."""
+
+    entry: tuple[Path, str, str]
+    journal: list[tuple[str, str | None]]
+    outputs: list[tuple[Path, str | None, bool]]
+    stdout: str
+    derivation: DerivationSource | None = None
+    inputs: list[str] = field(default_factory=list)
+
+
+_worker: Transmogrifier | None = None
+
+
+def _init_worker(options: TransmogrifyOptions, mapper: NameMapper, derived_targets: set[str]) -> None:
+    global _worker
+    mapper.start_journal()
+    # the parent owns the manifest; workers only ever build
+    _worker = Transmogrifier(
+        replace(options, incremental=False),
+        mapper=mapper,
+        dumper=DeferredYamlDumper(dry_run=options.dry_run or options.emits_build_file, verbose=options.verbose),
+    )
+    _worker._derived_targets = derived_targets
+
+
+def _transmogrify_in_worker(
+    svd_peripheral: Any, default_type: str, default_depth: int, address_unit_bits: int
+) -> PeripheralResult:
+    assert _worker is not None
+    dumper = cast(DeferredYamlDumper, _worker.dumper)
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        entry = _worker._transmogrify_peripheral(svd_peripheral, default_type, default_depth, address_unit_bits)
+    return PeripheralResult(
+        entry,
+        _worker.mapper.take_journal(),
+        dumper.take_pending(),
+        stdout.getvalue(),
+        _worker._derivation_sources.pop(entry[1], None),
+        _worker._inputs.pop(entry[1], []),
+    )
 
 
 class Transmogrifier:
-    def __init__(self, options: TransmogrifyOptions) -> None:
+    def __init__(
+        self,
+        options: TransmogrifyOptions,
+        mapper: NameMapper | None = None,
+        dumper: YamlDumper | None = None,
+    ) -> None:
         self.options = options
-        self.mapper = NameMapper(
+        self.mapper = mapper or NameMapper(
             options.name_map,
             verbose=options.verbose,
             preserve_existing=options.preserve_name_map,
         )
-        self.dumper = YamlDumper(
-            dry_run=options.dry_run or bool(options.emit_fragment),
+        self.manifest = Manifest.load(options.yaml_root) if options.incremental else None
+        if dumper is None and options.bundle is not None:
+            dumper = BundleYamlDumper(dry_run=options.dry_run or options.emits_build_file, verbose=options.verbose)
+        self.dumper = dumper or YamlDumper(
+            dry_run=options.dry_run or options.emits_build_file,
             verbose=options.verbose,
+            previous_digests=None if self.manifest is None else {
+                options.yaml_root / name: digest for name, digest in self.manifest.output_digests().items()
+            },
         )
+        self._records: dict[str, PeripheralRecord] = {}
+        # SVD names of the peripherals others derive from, what they produced,
+        # and which parent each derived peripheral ended up referencing.
+        self._derived_targets: set[str] = set()
+        self._derivation_sources: dict[str, DerivationSource] = {}
+        self._derived_from: dict[str, str] = {}
+        # Every yaml filename each peripheral's document references, itself first.
+        self._parts: list[str] = []
+        self._inputs: dict[str, list[str]] = {}
 
     @property
     def verbose(self) -> bool:
@@ -252,8 +622,10 @@ class Transmogrifier:
 
         seen_types: set[str] = set()
         all_outputs: list[Path] = []
+        depfiles: list[Path] = []
         rules: list[str] = []
 
+        bundle = self.options.bundle
         for yml_path, svd_name, type_name in peripheral_entries:
             if type_name in seen_types:
                 continue
@@ -266,19 +638,33 @@ class Transmogrifier:
 
             all_outputs.extend(outputs)
             outputs_str = " \\\n    ".join(os.fspath(output) for output in outputs)
-
+            depfile = cpp_root / f".{type_name}.d"
+            depfiles.append(depfile)
+
+            source_name = self._derived_from.get(svd_name, svd_name)
+            if bundle is not None:
+                yaml_inputs = [f"    {bundle} \\"]
+            elif self.options.dedupe:
+                # the content-addressed names change whenever a register or enum does
+                yaml_inputs = [f"    {yml_path} \\"]
+            else:
+                yaml_inputs = [
+                    f"    {yml_path} \\",
+                    f"    $(wildcard {yml_root}/register_{source_name}_*.yml) \\",
+                    f"    $(wildcard {yml_root}/enum_{source_name}_*_*.yml) \\",
+                ]
+                if self.options.compact_arrays:
+                    yaml_inputs.append(f"    $(wildcard {yml_root}/structure_{source_name}_*.yml) \\")
             rule_lines = [
                 f"{outputs_str}: \\",
-                f"    {yml_path} \\",
-                f"    $(wildcard {yml_root}/register_{svd_name}_*.yml) \\",
-                f"    $(wildcard {yml_root}/enum_{svd_name}_*_*.yml) \\",
+                *yaml_inputs,
                 f"    {transmogrify_stamp} \\",
                 "    src/peripheralyzer/generate.py \\",
                 "    src/peripheralyzer/cli.py",
                 f"\tmkdir -p {cpp_root}",
                 (
-                    f"\t$(PERIPHERALYZER) generate -tr $(TEMPLATES) -yr {yml_root}"
-                    f" -o {cpp_root} -y {yml_path.name} {template_flags} -a"
+                    f"\t$(PERIPHERALYZER) generate -tr $(TEMPLATES) -yr {bundle or yml_root}"
+                    f" -o {cpp_root} -y {yml_path.name} {template_flags} -a --depfile {depfile}"
                 ),
                 "",
             ]
@@ -297,9 +683,125 @@ class Transmogrifier:
             lines.append(f"{peripheralyzer_stamp}: \\\n    {all_outputs_str}")
             lines.append("")
             lines.extend(rules)
+            # generate's depfiles add the templates (and their includes) each output was rendered from
+            lines.append("-include " + " \\\n    ".join(os.fspath(depfile) for depfile in depfiles))
+            lines.append("")
+
+        write_if_changed(emit_fragment, "\n".join(lines))
+
+    def _transmogrify_args(self) -> list[str]:
+        """The transmogrify arguments that reproduce this run's yaml output."""
+        options = self.options
+        args = ["-s", os.fspath(options.svd), "-yr", os.fspath(options.yaml_root), "-nm", os.fspath(options.name_map)]
+        for namespace in options.namespaces:
+            args += ["-ns", namespace]
+        if options.bundle is not None:
+            args += ["--bundle", os.fspath(options.bundle)]
+        if options.ir_version != LEGACY_IR_VERSION:
+            args += ["--ir-version", str(options.ir_version)]
+        flags = {
+            "--stream": options.stream,
+            "--incremental": options.incremental,
+            "--dedupe": options.dedupe,
+            "--reuse-derived": options.reuse_derived,
+            "--compact-arrays": options.compact_arrays,
+            "--expand-name-map": not options.preserve_name_map,
+        }
+        args += [flag for flag, enabled in flags.items() if enabled]
+        if options.jobs != 1:
+            args += ["-j", str(options.jobs)]
+        return args
+
+    def _write_peripheral_ninja(self, peripheral_entries: list[tuple[Path, str, str]]) -> None:
+        """Write a ninja file that rebuilds the yaml and the generated code with exact inputs.
+
+        Unlike the Makefile fragment, every generate edge lists the yaml files
+        its peripherals reference, so ninja never scans the yaml root. The
+        peripherals are split into ``ninja_batches`` generate edges sharing a
+        pool of the same depth, which amortizes the start up of generate, and
+        generate reports the templates it rendered with through a depfile. The
+        ``peripheralyzer`` and ``templates`` variables are expected from the
+        build file that includes this one with ``subninja``.
+        """
+        emit_ninja = self.options.emit_ninja
+        cpp_root = self.options.fragment_cpp_root
+        if emit_ninja is None or cpp_root is None:
+            print("--emit-ninja requires --fragment-cpp-root", file=sys.stderr)
+            raise SystemExit(1)
+
+        yml_root = self.options.yaml_root
+        bundle = self.options.bundle
+        templates = self.options.fragment_templates or ["peripheral.hpp.jinja"]
+        aggregate = self.options.fragment_aggregate_target
+        pool = f"{aggregate}_generate"
+
+        peripherals: list[tuple[str, list[Path], list[Path]]] = []
+        seen_types: set[str] = set()
+        for yml_path, svd_name, type_name in peripheral_entries:
+            if type_name in seen_types:
+                continue
+            seen_types.add(type_name)
+            outputs = [cpp_root / f"{type_name}.{Path(template).name.split('.')[1]}" for template in templates]
+            if bundle is not None:
+                inputs = [bundle]
+            else:
+                inputs = [yml_root / name for name in self._inputs.get(svd_name, [yml_path.name])]
+            peripherals.append((yml_path.name, outputs, inputs))
+
+        writer = NinjaWriter()
+        writer.comment("Auto-generated by peripheralyzer transmogrify --emit-ninja")
+        writer.comment("Do not edit manually")
+        writer.newline()
+        # depfiles naming several outputs
+        writer.variable("ninja_required_version", "1.10")
+        writer.newline()
+        batches = max(1, min(self.options.ninja_batches, len(peripherals)))
+        writer.pool(pool, batches)
+        writer.rule(
+            "transmogrify",
+            command=command(["$peripheralyzer", "transmogrify", *self._transmogrify_args()]),
+            description=f"TRANSMOGRIFY {self.options.svd}",
+            restat="1",
+        )
+        template_flags = [word for template in templates for word in ("-t", template)]
+        writer.rule(
+            "generate",
+            command=command(
+                ["$peripheralyzer", "generate", "-tr", "$templates", "-yr", bundle or yml_root, "-o", cpp_root]
+            )
+            + " $yamls "
+            + command([*template_flags, "-a", "--depfile", "$depfile"]),
+            description="GENERATE $out",
+            depfile="$depfile",
+            deps="gcc",
+            pool=pool,
+            restat="1",
+        )
+        yaml_outputs = [bundle] if bundle is not None else self.dumper.output_paths()
+        writer.build(yaml_outputs, "transmogrify", [self.options.svd], implicit=[self.options.name_map])
+
+        all_outputs: list[Path] = []
+        for batch in range(batches):
+            members = peripherals[batch * len(peripherals) // batches : (batch + 1) * len(peripherals) // batches]
+            outputs = [output for _, peripheral_outputs, _ in members for output in peripheral_outputs]
+            inputs = list(dict.fromkeys(path for _, _, peripheral_inputs in members for path in peripheral_inputs))
+            yamls = command(word for yaml_file, _, _ in members for word in ("-y", yaml_file))
+            depfile = cpp_root / f".{aggregate}_{batch}.d"
+            writer.build(outputs, "generate", inputs, yamls=yamls, depfile=os.fspath(depfile).replace("$", "$$"))
+            all_outputs.extend(outputs)
+        writer.build([aggregate], "phony", all_outputs)
+
+        write_if_changed(emit_ninja, writer.text())
 
-        emit_fragment.parent.mkdir(parents=True, exist_ok=True)
-        emit_fragment.write_text("\n".join(lines), encoding="utf-8")
+    @property
+    def _ir_header(self) -> dict[str, int]:
+        """Version key for each emitted document; legacy documents carry none."""
+        if self.options.ir_version == LEGACY_IR_VERSION:
+            return {}
+        return {IR_VERSION_KEY: self.options.ir_version}
+
+    def _ir_address(self, value: int) -> int | str:
+        return value if self.options.ir_version == NATIVE_IR_VERSION else hex(value)
 
     @staticmethod
     def _require_text(value: Any, field_name: str) -> str:
@@ -313,195 +815,671 @@ class Transmogrifier:
             raise ValueError(f"Missing required integer field: {field_name}")
         return value
 
-    def run(self) -> int:
-        if self.options.banner:
-            self._print_banner()
-
-        if self.options.yaml_root and not (self.options.dry_run or self.options.emit_fragment):
-            self.options.yaml_root.mkdir(parents=True, exist_ok=True)
-
-        peripheral_entries: list[tuple[Path, str, str]] = []
+    def _open_device(self) -> tuple[Any, Iterable[Any]]:
+        if self.options.stream:
+            reader = SVDStreamReader(self.options.svd)
+            if self.options.reuse_derived:
+                self._derived_targets = reader.derived_targets
+            return reader.device, reader.iter_peripherals()
         svd_parser = SVDParser.for_xml_file(os.fspath(self.options.svd))
         svd_device = cast(Any, svd_parser.get_device())
-        device_width = self._require_int(svd_device.width, "device.width")
-        address_unit_bits = self._require_int(
-            svd_device.address_unit_bits, "device.address_unit_bits"
-        )
-        default_type = f"uint{device_width}_t"
-        default_depth = device_width
-
-        for raw_peripheral in cast(list[Any], svd_device.peripherals or []):
-            svd_peripheral = cast(Any, raw_peripheral)
-            peripheral_name = self._require_text(svd_peripheral.name, "peripheral.name")
-            peripheral_base_address = self._require_int(
-                svd_peripheral.base_address, f"{peripheral_name}.base_address"
+        svd_peripherals = _device_peripherals(svd_device)
+        if self.options.reuse_derived:
+            self._derived_targets = {
+                parent for parent in (getattr(p, "derived_from", None) for p in svd_peripherals) if parent
+            }
+        return svd_device, svd_peripherals
+
+    def _dump_part(self, kind: str, data: dict[str, Any], yaml_file: str) -> str:
+        """Dump a register or enum document and return the filename it is referenced by.
+
+        With ``dedupe`` the filename is derived from the document's text, so
+        identical registers and enums of sibling peripherals are written once.
+        """
+        if self.options.dedupe:
+            yaml_file = f"{kind}_{digest_text(self.dumper.render(data))[:DEDUPE_DIGEST_LENGTH]}.yml"
+        self.dumper.dump(data, self.options.yaml_root / yaml_file, shared=self.options.dedupe)
+        self._parts.append(yaml_file)
+        return yaml_file
+
+    def _derivation(self, peripheral_name: str, svd_peripheral: Any) -> tuple[str, DerivationSource] | None:
+        """The parent whose register and enum files a ``derivedFrom`` peripheral can reference instead of its own.
+
+        That is only the case when the parent was transmogrified earlier in this
+        run, the registers were not overridden and every name resolves in the
+        derived peripheral's context exactly as it did in the parent's. The
+        parent's lookups are then repeated in the derived context so the name
+        map records the same contexts as a full expansion.
+        """
+        parent_name = getattr(svd_peripheral, "derived_from", None)
+        if not self.options.reuse_derived or not parent_name:
+            return None
+        source = self._derivation_sources.get(parent_name)
+        if source is None or self._comparable_registers(svd_peripheral) != source.registers:
+            return None
+        lookups = [
+            (name, None if context is None else peripheral_name + context[len(parent_name):])
+            for name, context in source.lookups
+        ]
+        for (name, context), (_, derived_context) in zip(source.lookups, lookups):
+            if not self.mapper.resolves_alike(name, context, derived_context):
+                return None
+        for name, context in lookups:
+            self.mapper.lookup(name, context)
+        return parent_name, DerivationSource(source.registers, source.files, lookups, source.structures, source.inputs)
+
+    def _transmogrify_register(
+        self,
+        peripheral_name: str,
+        svd_register: Any,
+        register_name: str,
+        register_size: int,
+        default_type: str,
+        default_depth: int,
+        address_unit_bits: int,
+    ) -> str:
+        """Dump the register document (and its enums) and return the filename it is referenced by."""
+        register: dict[str, Any] = {
+            **self._ir_header,
+            "name": self.mapper.as_type(
+                register_name,
+                context=f"{peripheral_name}.{register_name}",
+            ),
+            "comment": fix_comment(getattr(svd_register, "description", None)) + f" ({register_name})",
+            "default_depth": default_depth,
+            "default_type": default_type,
+            "sizeof": int(register_size / address_unit_bits),
+            "fields": [],
+            "enums": [],
+        }
+        for raw_field in _register_fields(svd_register):
+            field = cast(Any, raw_field)
+            field_name = self._require_text(field.name, f"{peripheral_name}.{register_name}.field.name")
+            bit_offset = self._require_int(
+                field.bit_offset, f"{peripheral_name}.{register_name}.{field_name}.bit_offset"
+            )
+            bit_width = self._require_int(
+                field.bit_width, f"{peripheral_name}.{register_name}.{field_name}.bit_width"
             )
-            address_blocks = cast(list[Any], getattr(svd_peripheral, "address_blocks", []) or [])
-            if not address_blocks:
-                raise ValueError(f"Peripheral {peripheral_name} has no address blocks")
-            peripheral_size = self._require_int(address_blocks[0].size, f"{peripheral_name}.size")
-            data: dict[str, Any] = {
-                "peripheral": {
-                    "base": hex(peripheral_base_address),
-                    "name": self.mapper.as_type(peripheral_name),
-                    "comment": fix_comment(getattr(svd_peripheral, "description", None)) + f" ({peripheral_name})",
-                    "default_type": default_type,
+            field_context = f"{peripheral_name}.{register_name}"
+            output_field: dict[str, Any] = {
+                "name": self.mapper.as_variable(field_name, context=field_context),
+                "offset": bit_offset,
+                "count": bit_width,
+                "comment": fix_comment(getattr(field, "description", None)) + f" ({field_name})",
+            }
+            if bool(getattr(field, "is_enumerated_type", False)):
+                output_field["type"] = self.mapper.as_type(field_name, context=field_context)
+                enum: dict[str, Any] = {
+                    **self._ir_header,
+                    "name": self.mapper.as_type(
+                        field_name,
+                        context=f"{field_context}.{field_name}",
+                    ),
+                    "comment": fix_comment(getattr(field, "description", None)) + f" ({field_name})",
+                    "type": default_type,
                     "default_depth": default_depth,
-                    "sizeof": hex(int(fix_sizeof(peripheral_size))),
-                    "registers": [],
-                    "structures": [],
-                    "members": [],
+                    "symbols": [],
                 }
-            }
-            offsets: dict[str, list[dict[str, Any]]] = {}
-            for raw_register in cast(list[Any], getattr(svd_peripheral, "registers", []) or []):
-                svd_register = cast(Any, raw_register)
-                register_name = self._require_text(svd_register.name, f"{peripheral_name}.register.name")
-                register_offset = self._require_int(
-                    svd_register.address_offset, f"{peripheral_name}.{register_name}.offset"
+                for raw_enumeration in cast(list[Any], getattr(field, "enumerated_values", []) or []):
+                    enumeration = cast(Any, raw_enumeration)
+                    enum_name = getattr(enumeration, "name", None) or field_name
+                    if self.verbose:
+                        print(f"Found enum {enum_name}")
+                    for raw_enumerated_value in cast(
+                        list[Any], getattr(enumeration, "enumerated_values", []) or []
+                    ):
+                        enumerated_value = cast(Any, raw_enumerated_value)
+                        name = self._require_text(
+                            enumerated_value.name,
+                            f"{peripheral_name}.{register_name}.{field_name}.enum.name",
+                        )
+                        if self.verbose:
+                            print(f"\tFound enum {name}")
+                        enum["symbols"].append(
+                            {
+                                "name": self.mapper.as_type(
+                                    name,
+                                    context=f"{field_context}.{field_name}.{name}",
+                                ),
+                                "value": enumerated_value.value,
+                                "comment": fix_comment(enumerated_value.description) + f" ({name})",
+                            }
+                        )
+                register["enums"].append(
+                    self._dump_part(
+                        "enum", enum, f"enum_{_file_scope(peripheral_name)}_{register_name}_{field_name}.yml"
+                    )
                 )
-                register_size = self._require_int(
-                    svd_register.size, f"{peripheral_name}.{register_name}.size"
+            register["fields"].append(output_field)
+
+        return self._dump_part("register", register, f"register_{_file_scope(peripheral_name)}_{register_name}.yml")
+
+    def _transmogrify_items(
+        self,
+        items: Iterable[Any],
+        scope: str,
+        default_type: str,
+        default_depth: int,
+        address_unit_bits: int,
+        lookups: list[tuple[str, str | None]] | None,
+    ) -> tuple[list[dict[str, Any]], list[str], list[str]]:
+        """Members, register files and structure files for the registers and clusters of a peripheral or cluster.
+
+        ``scope`` is the SVD path of the container (``GPIOA`` or ``DMA1.STREAM``)
+        and prefixes every name map context. The name lookups made for the
+        register and structure documents are appended to ``lookups``; when it is
+        None those documents are not built at all.
+        """
+        address = self._ir_address
+        registers: list[str] = []
+        structures: list[str] = []
+        offsets: dict[int, list[dict[str, Any]]] = {}
+        for item in items:
+            if isinstance(item, StreamCluster):
+                cluster_name = self._require_text(item.name, f"{scope}.cluster.name")
+                cluster_offset = self._require_int(item.address_offset, f"{scope}.{cluster_name}.offset")
+                base_name = _array_name(cluster_name)
+                stride = self._cluster_sizeof(item, default_depth, address_unit_bits)
+                if lookups is not None:
+                    with self.mapper.recording(lookups):
+                        structures.append(
+                            self._transmogrify_cluster(
+                                scope, item, base_name, stride, default_type, default_depth, address_unit_bits, lookups
+                            )
+                        )
+                type_name = self.mapper.as_type(base_name, context=f"{scope}.{base_name}")
+                if item.dim is None or _is_default_dim_index(item.dim, item.dim_index):
+                    elements = [(base_name, cluster_offset, item.dim or 1)]
+                else:
+                    increment = item.dim_increment or stride
+                    elements = [
+                        (dim_name(cluster_name, item.dim_index, index), cluster_offset + increment * index, 1)
+                        for index in range(item.dim)
+                    ]
+                for member_name, offset, count in elements:
+                    offsets.setdefault(offset, []).append(
+                        {
+                            "name": self.mapper.as_variable(member_name, context=f"{scope}.{member_name}"),
+                            "comment": fix_comment(item.description) + f" ({cluster_name})",
+                            "type": type_name,
+                            "count": count,
+                            "offset": address(offset),
+                            "sizeof": address(count * stride),
+                        }
+                    )
+                continue
+
+            for svd_register, register_name, count in self._register_elements(item, scope, address_unit_bits):
+                register_offset = self._require_int(
+                    svd_register.address_offset, f"{scope}.{register_name}.offset"
                 )
+                register_size = self._require_int(svd_register.size, f"{scope}.{register_name}.size")
                 member = {
                     "name": self.mapper.as_variable(
                         register_name,
-                        context=f"{peripheral_name}.{register_name}",
+                        context=f"{scope}.{register_name}",
                     ),
                     "comment": fix_comment(getattr(svd_register, "description", None)) + f" ({register_name})",
                     "type": self.mapper.as_type(
                         register_name,
-                        context=f"{peripheral_name}.{register_name}",
+                        context=f"{scope}.{register_name}",
                     ),
-                    "count": 1,
-                    "offset": hex(register_offset),
-                    "sizeof": hex(int(register_size / address_unit_bits)),
+                    "count": count,
+                    "offset": address(register_offset),
+                    "sizeof": address(count * int(register_size / address_unit_bits)),
                 }
-                member_offset = str(member["offset"])
-                offsets.setdefault(member_offset, []).append(member)
+                offsets.setdefault(register_offset, []).append(member)
+
+                if lookups is not None:
+                    with self.mapper.recording(lookups):
+                        registers.append(
+                            self._transmogrify_register(
+                                scope,
+                                svd_register,
+                                register_name,
+                                register_size,
+                                default_type,
+                                default_depth,
+                                address_unit_bits,
+                            )
+                        )
+
+        members: list[dict[str, Any]] = []
+        for offset, grouped in offsets.items():
+            if len(grouped) > 1:
+                max_sizeof = max(grouped, key=lambda member: as_int(member["sizeof"]))["sizeof"]
+                members.append(
+                    {
+                        "is_union": True,
+                        "offset": address(offset),
+                        "sizeof": max_sizeof,
+                        "members": grouped,
+                    }
+                )
+            else:
+                members.append(grouped[0])
+        return members, registers, structures
+
+    def _register_elements(
+        self, svd_register: Any, scope: str, address_unit_bits: int
+    ) -> list[tuple[Any, str, int]]:
+        """(register, name, count) for each register to emit for one SVD register.
+
+        Only a ``dim`` array kept by ``compact_arrays`` can be emitted whole: one
+        register with a count, as long as its elements are contiguous and
+        indexed 0..n-1. Any other array is expanded into its elements.
+        """
+        register_name = self._require_text(svd_register.name, f"{scope}.register.name")
+        dim = getattr(svd_register, "dim", None)
+        if dim is None:
+            return [(svd_register, register_name, 1)]
+        size = self._require_int(svd_register.size, f"{scope}.{register_name}.size")
+        if (
+            "%s" in register_name
+            and _is_default_dim_index(dim, svd_register.dim_index)
+            and svd_register.dim_increment * address_unit_bits == size
+        ):
+            return [(svd_register, _array_name(register_name), dim)]
+        return [
+            (element, self._require_text(element.name, f"{scope}.register.name"), 1)
+            for element in svd_register.expand()
+        ]
 
-                register: dict[str, Any] = {
-                    "name": self.mapper.as_type(
-                        register_name,
-                        context=f"{peripheral_name}.{register_name}",
-                    ),
-                    "comment": fix_comment(getattr(svd_register, "description", None)) + f" ({register_name})",
-                    "default_depth": default_depth,
-                    "default_type": default_type,
-                    "sizeof": int(register_size / address_unit_bits),
-                    "fields": [],
-                    "enums": [],
-                }
-                for raw_field in cast(list[Any], getattr(svd_register, "fields", []) or []):
-                    field = cast(Any, raw_field)
-                    field_name = self._require_text(field.name, f"{peripheral_name}.{register_name}.field.name")
-                    bit_offset = self._require_int(
-                        field.bit_offset, f"{peripheral_name}.{register_name}.{field_name}.bit_offset"
-                    )
-                    bit_width = self._require_int(
-                        field.bit_width, f"{peripheral_name}.{register_name}.{field_name}.bit_width"
+    def _cluster_sizeof(self, cluster: StreamCluster, default_depth: int, address_unit_bits: int) -> int:
+        """Size of one element of a cluster: its dimIncrement, or the extent of its contents in whole words."""
+        if cluster.dim is not None and cluster.dim_increment:
+            return int(cluster.dim_increment)
+        extent = 0
+        for register in cluster.registers:
+            for element in register.expand():
+                extent = max(extent, (element.address_offset or 0) + int((element.size or 0) / address_unit_bits))
+        for inner in cluster.clusters:
+            last = (inner.dim or 1) - 1
+            extent = max(
+                extent,
+                (inner.address_offset or 0)
+                + last * (inner.dim_increment or 0)
+                + self._cluster_sizeof(inner, default_depth, address_unit_bits),
+            )
+        unit = default_depth // 8
+        return -(-extent // unit) * unit
+
+    def _transmogrify_cluster(
+        self,
+        scope: str,
+        cluster: StreamCluster,
+        base_name: str,
+        sizeof: int,
+        default_type: str,
+        default_depth: int,
+        address_unit_bits: int,
+        lookups: list[tuple[str, str | None]],
+    ) -> str:
+        """Dump the structure document for a cluster and return the filename it is referenced by."""
+        cluster_scope = f"{scope}.{base_name}"
+        members, registers, structures = self._transmogrify_items(
+            [*cluster.registers, *cluster.clusters],
+            cluster_scope,
+            default_type,
+            default_depth,
+            address_unit_bits,
+            lookups,
+        )
+        structure: dict[str, Any] = {
+            **self._ir_header,
+            "name": self.mapper.as_type(base_name, context=cluster_scope),
+            "comment": fix_comment(cluster.description) + f" ({cluster.name})",
+            "default_type": default_type,
+            "default_depth": default_depth,
+            "sizeof": self._ir_address(sizeof),
+            "members": members,
+            "registers": registers,
+            "structures": structures,
+        }
+        return self._dump_part("structure", structure, f"structure_{_file_scope(scope)}_{base_name}.yml")
+
+    def _comparable_registers(self, svd_peripheral: Any) -> str:
+        """Digest of the registers a derived peripheral must share with its parent to reference its files."""
+        if self.options.compact_arrays:
+            return digest_text(repr(detach_items(svd_peripheral)))
+        return digest_text(repr(detach_peripheral(svd_peripheral).registers))
+
+    def _transmogrify_peripheral(
+        self,
+        svd_peripheral: Any,
+        default_type: str,
+        default_depth: int,
+        address_unit_bits: int,
+    ) -> tuple[Path, str, str]:
+        peripheral_name = self._require_text(svd_peripheral.name, "peripheral.name")
+        peripheral_base_address = self._require_int(
+            svd_peripheral.base_address, f"{peripheral_name}.base_address"
+        )
+        address_blocks = cast(list[Any], getattr(svd_peripheral, "address_blocks", []) or [])
+        if not address_blocks:
+            raise ValueError(f"Peripheral {peripheral_name} has no address blocks")
+        peripheral_size = self._require_int(address_blocks[0].size, f"{peripheral_name}.size")
+        address = self._ir_address
+        data: dict[str, Any] = {
+            "peripheral": {
+                "base": address(peripheral_base_address),
+                "name": self.mapper.as_type(peripheral_name),
+                "comment": fix_comment(getattr(svd_peripheral, "description", None)) + f" ({peripheral_name})",
+                "default_type": default_type,
+                "default_depth": default_depth,
+                "sizeof": address(int(fix_sizeof(peripheral_size))),
+                "registers": [],
+                "structures": [],
+                "members": [],
+            }
+        }
+        derivation = self._derivation(peripheral_name, svd_peripheral)
+        lookups: list[tuple[str, str | None]] = []
+        mark = len(self._parts)
+        items = detach_items(svd_peripheral) if self.options.compact_arrays else _peripheral_registers(svd_peripheral)
+        members, registers, structures = self._transmogrify_items(
+            items,
+            peripheral_name,
+            default_type,
+            default_depth,
+            address_unit_bits,
+            lookups=lookups if derivation is None else None,
+        )
+        data["peripheral"]["members"] = members
+        if derivation is not None:
+            parent_name, source = derivation
+            data["peripheral"]["registers"] = list(source.files)
+            data["peripheral"]["structures"] = list(source.structures)
+            data["peripheral"]["derived_from"] = parent_name
+            parts = list(source.inputs)
+            self._derived_from[peripheral_name] = self._derived_from.get(parent_name, parent_name)
+            if peripheral_name in self._derived_targets:
+                self._derivation_sources[peripheral_name] = source
+        else:
+            data["peripheral"]["registers"] = registers
+            data["peripheral"]["structures"] = structures
+            parts = list(dict.fromkeys(self._parts[mark:]))
+            if peripheral_name in self._derived_targets:
+                self._derivation_sources[peripheral_name] = DerivationSource(
+                    registers=self._comparable_registers(svd_peripheral),
+                    files=list(registers),
+                    lookups=lookups,
+                    structures=list(structures),
+                    inputs=parts,
+                )
+        del self._parts[mark:]
+
+        yaml_file = f"peripheral_{peripheral_name}.yml"
+        yaml_file_path = self.options.yaml_root / yaml_file
+        data.update(self._ir_header)
+        if self.options.namespaces:
+            data["namespaces"] = self.options.namespaces
+        namespaces = list(data.get("namespaces", []))
+        ns = "_".join(namespaces)
+        peripheral_name = data["peripheral"]["name"]
+        data["include_lock"] = f"{ns}_{peripheral_name}_".upper() if ns else f"{peripheral_name}_".upper()
+        self.dumper.dump(data, yaml_file_path)
+        self._inputs[svd_peripheral.name] = [yaml_file, *parts]
+        return (yaml_file_path, svd_peripheral.name, data["peripheral"]["name"])
+
+    def _plan(
+        self,
+        svd_peripherals: Iterable[Any],
+        default_type: str,
+        default_depth: int,
+        address_unit_bits: int,
+    ) -> Iterator[tuple[Any, str | None, PeripheralRecord | None]]:
+        """Pair each peripheral with its source digest and, if it is unchanged, the previous record."""
+        if self.manifest is None:
+            for svd_peripheral in svd_peripherals:
+                yield svd_peripheral, None, None
+            return
+        for svd_peripheral in svd_peripherals:
+            detached = detach_peripheral(svd_peripheral)
+            source = digest_text(
+                repr(
+                    (
+                        detached,
+                        default_type,
+                        default_depth,
+                        address_unit_bits,
+                        self.options.namespaces,
+                        self.options.ir_version,
                     )
-                    field_context = f"{peripheral_name}.{register_name}"
-                    output_field: dict[str, Any] = {
-                        "name": self.mapper.as_variable(field_name, context=field_context),
-                        "offset": bit_offset,
-                        "count": bit_width,
-                        "comment": fix_comment(getattr(field, "description", None)) + f" ({field_name})",
-                    }
-                    if bool(getattr(field, "is_enumerated_type", False)):
-                        output_field["type"] = self.mapper.as_type(field_name, context=field_context)
-                        enum: dict[str, Any] = {
-                            "name": self.mapper.as_type(
-                                field_name,
-                                context=f"{field_context}.{field_name}",
-                            ),
-                            "comment": fix_comment(getattr(field, "description", None)) + f" ({field_name})",
-                            "type": default_type,
-                            "default_depth": default_depth,
-                            "symbols": [],
-                        }
-                        for raw_enumeration in cast(list[Any], getattr(field, "enumerated_values", []) or []):
-                            enumeration = cast(Any, raw_enumeration)
-                            enum_name = getattr(enumeration, "name", None) or field_name
-                            if self.verbose:
-                                print(f"Found enum {enum_name}")
-                            for raw_enumerated_value in cast(
-                                list[Any], getattr(enumeration, "enumerated_values", []) or []
-                            ):
-                                enumerated_value = cast(Any, raw_enumerated_value)
-                                name = self._require_text(
-                                    enumerated_value.name,
-                                    f"{peripheral_name}.{register_name}.{field_name}.enum.name",
-                                )
-                                if self.verbose:
-                                    print(f"\tFound enum {name}")
-                                enum["symbols"].append(
-                                    {
-                                        "name": self.mapper.as_type(
-                                            name,
-                                            context=f"{field_context}.{field_name}.{name}",
-                                        ),
-                                        "value": enumerated_value.value,
-                                        "comment": fix_comment(enumerated_value.description) + f" ({name})",
-                                    }
-                                )
-                        yaml_file = f"enum_{peripheral_name}_{register_name}_{field_name}.yml"
-                        yaml_file_path = self.options.yaml_root / yaml_file
-                        register["enums"].append(yaml_file)
-                        self.dumper.dump(enum, yaml_file_path)
-                    register["fields"].append(output_field)
-
-                yaml_file = f"register_{peripheral_name}_{register_name}.yml"
-                yaml_file_path = self.options.yaml_root / yaml_file
-                data["peripheral"]["registers"].append(yaml_file)
-                self.dumper.dump(register, yaml_file_path)
-
-            for offset, members in offsets.items():
-                if len(members) > 1:
-                    max_sizeof = max(members, key=lambda member: int(member["sizeof"], 0))["sizeof"]
-                    data["peripheral"]["members"].append(
-                        {
-                            "is_union": True,
-                            "offset": offset,
-                            "sizeof": max_sizeof,
-                            "members": members,
-                        }
+                )
+            )
+            previous = self.manifest.peripherals.get(str(detached.name))
+            if (
+                previous is None
+                or previous.source != source
+                or previous.names != self.mapper.signature(previous.journal)
+                or not all((self.options.yaml_root / name).exists() for name in previous.outputs)
+            ):
+                previous = None
+            yield detached, source, previous
+
+    def _reuse(self, record: PeripheralRecord) -> tuple[Path, str, str]:
+        """Account for an unchanged peripheral without rebuilding or rewriting it."""
+        if self.verbose:
+            print(f"Unchanged {record.entry[1]}")
+        self.mapper.replay(record.journal)
+        for name in record.outputs:
+            self.dumper.write(self.options.yaml_root / name, None)
+        self._records[record.entry[1]] = record
+        yaml_file, svd_name, type_name = record.entry
+        inputs = [yaml_file, *record.outputs]
+        if record.derived_from is not None:
+            self._derived_from[svd_name] = record.derived_from
+            parent = self._derivation_sources.get(record.derived_from)
+            if parent is not None:
+                inputs.extend(parent.inputs)
+        if record.derivation is not None and svd_name in self._derived_targets:
+            self._derivation_sources[svd_name] = DerivationSource.from_data(record.derivation)
+        self._inputs[svd_name] = list(dict.fromkeys(inputs))
+        return (self.options.yaml_root / yaml_file, svd_name, type_name)
+
+    def _remember(
+        self,
+        source: str | None,
+        journal: list[tuple[str, str | None]],
+        entry: tuple[Path, str, str],
+        mark: int,
+    ) -> None:
+        if source is None:
+            return
+        outputs = {
+            path.name: self.dumper.digests[path]
+            for path in self.dumper.claimed_since(mark)
+            if path in self.dumper.digests
+        }
+        derivation = self._derivation_sources.get(entry[1])
+        self._records[entry[1]] = PeripheralRecord(
+            source=source,
+            names=self.mapper.signature(journal),
+            journal=journal,
+            entry=(entry[0].name, entry[1], entry[2]),
+            outputs=outputs,
+            derived_from=self._derived_from.get(entry[1]),
+            derivation=None if derivation is None else derivation.to_data(),
+        )
+
+    def _transmogrify_serial(
+        self,
+        svd_peripherals: Iterable[Any],
+        default_type: str,
+        default_depth: int,
+        address_unit_bits: int,
+    ) -> list[tuple[Path, str, str]]:
+        peripheral_entries: list[tuple[Path, str, str]] = []
+        if self.manifest is not None:
+            self.mapper.start_journal()
+        for svd_peripheral, source, previous in self._plan(
+            svd_peripherals, default_type, default_depth, address_unit_bits
+        ):
+            if previous is not None:
+                peripheral_entries.append(self._reuse(previous))
+                continue
+            mark = self.dumper.claimed_count()
+            entry = self._transmogrify_peripheral(svd_peripheral, default_type, default_depth, address_unit_bits)
+            self._remember(source, self.mapper.take_journal(), entry, mark)
+            peripheral_entries.append(entry)
+        return peripheral_entries
+
+    def _transmogrify_parallel(
+        self,
+        svd_peripherals: Iterable[Any],
+        jobs: int,
+        default_type: str,
+        default_depth: int,
+        address_unit_bits: int,
+    ) -> list[tuple[Path, str, str]]:
+        """Fan peripherals out to worker processes and merge their results in SVD order.
+
+        Name mapping results only depend on the loaded map and the name itself, so
+        each worker can use its own copy of the mapper. The parent replays the
+        lookups each worker recorded, in order, so contexts and new entries come
+        out exactly as in a serial run, and claims the output paths in the same
+        order so duplicates are reported at the same point.
+        """
+        plan = [
+            (detach_peripheral(svd_peripheral), source, previous)
+            for svd_peripheral, source, previous in self._plan(
+                svd_peripherals, default_type, default_depth, address_unit_bits
+            )
+        ]
+        # Peripherals deriving from one earlier in the SVD are built here, in
+        # order, so they can reference what their parent's worker produced.
+        local: set[int] = set()
+        seen: set[str] = set()
+        for index, (svd_peripheral, _, previous) in enumerate(plan):
+            if previous is None and self.options.reuse_derived and svd_peripheral.derived_from in seen:
+                local.add(index)
+            seen.add(str(svd_peripheral.name))
+        detached = [
+            svd_peripheral
+            for index, (svd_peripheral, _, previous) in enumerate(plan)
+            if previous is None and index not in local
+        ]
+        peripheral_entries: list[tuple[Path, str, str]] = []
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, max(len(detached), 1)),
+            initializer=_init_worker,
+            initargs=(self.options, self.mapper, self._derived_targets),
+        ) as executor:
+            count = len(detached)
+            results = executor.map(
+                _transmogrify_in_worker,
+                detached,
+                [default_type] * count,
+                [default_depth] * count,
+                [address_unit_bits] * count,
+            )
+            if self.manifest is not None:
+                self.mapper.start_journal()
+            for index, (svd_peripheral, source, previous) in enumerate(plan):
+                if previous is not None:
+                    peripheral_entries.append(self._reuse(previous))
+                    continue
+                mark = self.dumper.claimed_count()
+                if index in local:
+                    entry = self._transmogrify_peripheral(
+                        svd_peripheral, default_type, default_depth, address_unit_bits
                     )
-                else:
-                    data["peripheral"]["members"].append(members[0])
-
-            yaml_file = f"peripheral_{peripheral_name}.yml"
-            yaml_file_path = self.options.yaml_root / yaml_file
-            if self.options.namespaces:
-                data["namespaces"] = self.options.namespaces
-            namespaces = list(data.get("namespaces", []))
-            ns = "_".join(namespaces)
-            peripheral_name = data["peripheral"]["name"]
-            data["include_lock"] = f"{ns}_{peripheral_name}_".upper() if ns else f"{peripheral_name}_".upper()
-            self.dumper.dump(data, yaml_file_path)
-            peripheral_entries.append((yaml_file_path, svd_peripheral.name, data["peripheral"]["name"]))
-
-        if self.options.emit_fragment:
-            self._write_peripheral_fragment(peripheral_entries)
+                    self._remember(source, self.mapper.take_journal(), entry, mark)
+                    peripheral_entries.append(entry)
+                    continue
+                result = next(results)
+                sys.stdout.write(result.stdout)
+                self.mapper.replay(result.journal)
+                for yaml_file_path, text, shared in result.outputs:
+                    self.dumper.write(yaml_file_path, text, shared)
+                if result.derivation is not None:
+                    self._derivation_sources[result.entry[1]] = result.derivation
+                self._inputs[result.entry[1]] = result.inputs
+                self._remember(source, result.journal, result.entry, mark)
+                peripheral_entries.append(result.entry)
+        return peripheral_entries
+
+    def _save_manifest(self) -> None:
+        """Record this run and delete yaml files the previous run produced but this one did not."""
+        if self.manifest is None:
+            return
+        current = Manifest(self._records)
+        produced = set(current.output_digests())
+        for name in self.manifest.output_digests():
+            if name not in produced:
+                if self.verbose:
+                    print(f"Removing stale {name}")
+                (self.options.yaml_root / name).unlink(missing_ok=True)
+        current.save(self.options.yaml_root)
+
+    def run(self) -> int:
+        if self.options.banner:
+            self._print_banner()
+
+        if self.options.bundle is not None and self.options.incremental:
+            print("--incremental tracks individual yaml files and cannot be combined with --bundle", file=sys.stderr)
+            raise SystemExit(1)
+        if self.options.dedupe and self.options.incremental:
+            print("--incremental tracks the files of each peripheral and cannot be combined with --dedupe", file=sys.stderr)
+            raise SystemExit(1)
+        if self.options.yaml_root and self.options.bundle is None and not (
+            self.options.dry_run or self.options.emits_build_file
+        ):
+            self.options.yaml_root.mkdir(parents=True, exist_ok=True)
+
+        peripheral_entries = self.transmogrify()
+
+        if self.options.emits_build_file:
+            if self.options.emit_fragment:
+                self._write_peripheral_fragment(peripheral_entries)
+            if self.options.emit_ninja:
+                self._write_peripheral_ninja(peripheral_entries)
         elif self.options.dry_run:
             for output_path in self.dumper.output_paths():
                 print(output_path)
         else:
-            self.mapper.dump()
-            if self.options.preserve_name_map and self.mapper.new_entries:
-                new_entries_file = self.options.name_map.with_name(
-                    self.options.name_map.stem + "_new_entries" + self.options.name_map.suffix
-                )
-                print(f"\n✓ Discovered {len(self.mapper.new_entries)} new entries")
-                print(f"  New entries saved to: {new_entries_file}")
-                print(f"  Review and rename them, then merge into: {self.options.name_map}")
+            if isinstance(self.dumper, BundleYamlDumper) and self.options.bundle is not None:
+                self.dumper.save(self.options.bundle)
+            self._save_manifest()
+            self.save_name_map()
 
         return 0
 
+    def transmogrify(self) -> list[tuple[Path, str, str]]:
+        """Hand every peripheral of the SVD to the dumper; returns (yaml path, SVD name, type name) of each."""
+        svd_device, svd_peripherals = self._open_device()
+        device_width = self._require_int(svd_device.width, "device.width")
+        address_unit_bits = self._require_int(
+            svd_device.address_unit_bits, "device.address_unit_bits"
+        )
+        default_type = f"uint{device_width}_t"
+        default_depth = device_width
+
+        jobs = self.options.jobs or os.cpu_count() or 1
+        if jobs > 1:
+            return self._transmogrify_parallel(
+                svd_peripherals, jobs, default_type, default_depth, address_unit_bits
+            )
+        return self._transmogrify_serial(
+            svd_peripherals, default_type, default_depth, address_unit_bits
+        )
+
+    def save_name_map(self) -> None:
+        self.mapper.dump()
+        if self.options.preserve_name_map and self.mapper.new_entries:
+            new_entries_file = self.options.name_map.with_name(
+                self.options.name_map.stem + "_new_entries" + self.options.name_map.suffix
+            )
+            print(f"\n✓ Discovered {len(self.mapper.new_entries)} new entries")
+            print(f"  New entries saved to: {new_entries_file}")
+            print(f"  Review and rename them, then merge into: {self.options.name_map}")
+
 
 class TransmogrifyCommand:
     name = "transmogrify"
-    help = "Convert CMSIS-SVD files into peripheralyzer YAML files."
+    help = TRANSMOGRIFY_HELP
 
     def configure_parser(self, parser: argparse.ArgumentParser) -> None:
         parser.description = self.help
@@ -562,6 +1540,73 @@ class TransmogrifyCommand:
             default="_peripherals",
             help="Name of the aggregate .PHONY target in the fragment (default: %(default)s)",
         )
+        parser.add_argument(
+            "--emit-ninja",
+            type=str,
+            metavar="PATH",
+            help="Write a ninja file with exact per-peripheral inputs to PATH (implies --dry-run); "
+            "uses the --fragment-* options",
+        )
+        parser.add_argument(
+            "--ninja-batches",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Number of generate edges, and the depth of their pool, in the ninja file (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Walk the SVD one peripheral at a time with an incremental parser instead of loading the whole device",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Number of worker processes used to emit peripherals, 0 uses every CPU (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Skip peripherals whose SVD and name map entries are unchanged since the last run "
+            "and only rewrite yaml files whose contents changed",
+        )
+        parser.add_argument(
+            "--bundle",
+            type=str,
+            metavar="FILE",
+            default=None,
+            help="Write every yaml document into this single device bundle instead of one file each "
+            "under the yaml root; generate and find-duplicates accept it in place of a yaml root",
+        )
+        parser.add_argument(
+            "--ir-version",
+            type=int,
+            choices=IR_VERSIONS,
+            default=LEGACY_IR_VERSION,
+            help=f"YAML representation to write; {NATIVE_IR_VERSION} stores offsets and sizes as integers "
+            "instead of hex strings (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--dedupe",
+            action="store_true",
+            help="Write identical register and enum documents once, named after a digest of their contents, "
+            "and reference that file from every peripheral using it",
+        )
+        parser.add_argument(
+            "--reuse-derived",
+            action="store_true",
+            help="Let derivedFrom peripherals reference their parent's register and enum files instead of "
+            "writing their own, and record the parent in the peripheral yaml",
+        )
+        parser.add_argument(
+            "--compact-arrays",
+            action="store_true",
+            help="Emit contiguous dim register arrays as one member with a count and clusters as structures "
+            "instead of expanding every element",
+        )
         parser.add_argument(
             "--preserve-name-map",
             action="store_true",
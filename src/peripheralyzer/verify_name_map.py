@@ -9,6 +9,9 @@ from typing import Any
 
 import yaml
 
+from .command_help import VERIFY_NAME_MAP_HELP
+from .yaml_io import safe_load
+
 CPP_KEYWORDS = {
     "alignas", "alignof", "and", "and_eq", "asm", "auto", "bitand", "bitor",
     "bool", "break", "case", "catch", "char", "char8_t", "char16_t", "char32_t",
@@ -56,7 +59,7 @@ class NameMapVerifier:
 
         try:
             with filepath.open("r", encoding="utf-8") as handle:
-                data = yaml.safe_load(handle)
+                data = safe_load(handle)
         except yaml.YAMLError as error:
             issues.append(f"YAML Syntax Error: {error}")
             return VerifyNameMapResult(issues=issues, warnings=warnings)
@@ -123,7 +126,7 @@ class VerifyNameMapApp:
             return 1
 
         with filepath.open("r", encoding="utf-8") as handle:
-            data = yaml.safe_load(handle) or {}
+            data = safe_load(handle) or {}
         print("✓ YAML syntax is valid")
         print(f"✓ Loaded {len(data)} entries")
         print()
@@ -152,7 +155,7 @@ class VerifyNameMapApp:
 
 class VerifyNameMapCommand:
     name = "verify-name-map"
-    help = "Verify a naming map YAML file."
+    help = VERIFY_NAME_MAP_HELP
 
     def configure_parser(self, parser: argparse.ArgumentParser) -> None:
         parser.description = self.help
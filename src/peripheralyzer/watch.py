@@ -0,0 +1,128 @@
+"""Keep generate running and re-render the peripherals whose yaml or templates change."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import jinja2
+
+    from .generate import PeripheralGenerator
+
+Signature = tuple[int, int, int] | None
+
+
+def signature(path: Path) -> Signature:
+    """What a poll compares to notice that a file was modified, replaced or removed."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class Watcher:
+    """Re-render peripherals as their inputs change, reusing one warm generator.
+
+    The Jinja environment, the compiled templates and the parsed yaml stay
+    loaded between rounds. Each round stats the files every peripheral was last
+    rendered from, which are its yaml documents and every template it resolved,
+    includes too. Only the peripherals with a changed input are rendered again.
+    Changed yaml is dropped from the loader's cache and changed templates from
+    the environment's, so nothing else is read or compiled twice. Peripherals
+    that failed to render are retried after any change.
+    """
+
+    def __init__(self, generator: PeripheralGenerator, templates: list[tuple[str, jinja2.Template]]) -> None:
+        self.generator = generator
+        self.templates = templates
+        self.interval = generator.options.watch_interval
+        self.inputs: dict[str, set[Path]] = {}
+        self.failed: set[str] = set()
+        self.signatures: dict[Path, Signature] = {}
+
+    @property
+    def template_root(self) -> Path:
+        return self.generator.options.template_root
+
+    def run(self) -> int:
+        """Render everything once, then poll until interrupted."""
+        self.update()
+        print(f"Watching {len(self.signatures)} files for changes, press Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(self.interval)
+                started = time.perf_counter()
+                rendered = self.update()
+                if rendered:
+                    print(f"Regenerated {len(rendered)} peripherals in {time.perf_counter() - started:.3f}s")
+        except KeyboardInterrupt:
+            return 0
+
+    def update(self) -> list[str]:
+        """Render the peripherals that are new or have changed inputs, returning their yaml files."""
+        yaml_files = self.generator.resolve_yaml_files()
+        current = {path: signature(path) for path in self.signatures}
+        changed = {path for path, known in self.signatures.items() if current[path] != known}
+        self.signatures.update(current)
+        for removed in self.inputs.keys() - set(yaml_files):
+            del self.inputs[removed]
+            self.failed.discard(removed)
+        stale = [
+            yaml_file
+            for yaml_file in yaml_files
+            if yaml_file not in self.inputs
+            or self.inputs[yaml_file] & changed
+            or (changed and yaml_file in self.failed)
+        ]
+        if not stale:
+            return []
+        if changed and not self._invalidate(changed):
+            self.failed.update(stale)
+            return stale
+        for yaml_file in stale:
+            self._render(yaml_file)
+        watched = set().union(*self.inputs.values())
+        self.signatures = {
+            path: self.signatures[path] if path in self.signatures else signature(path) for path in watched
+        }
+        self.generator.write_dependencies()
+        return stale
+
+    def _invalidate(self, changed: set[Path]) -> bool:
+        """Forget the cached yaml and compiled templates of changed files; False if the templates do not load."""
+        # the template root may hold yaml too, and forgetting what is not cached is harmless
+        templates = [
+            path.relative_to(self.template_root).as_posix()
+            for path in changed
+            if path.is_relative_to(self.template_root)
+        ]
+        try:
+            self.generator.loader.refresh(changed)
+            if templates:
+                environment = self.templates[0][1].environment
+                environment.forget(templates)
+                reloaded = self.generator._load_templates(environment)
+                if reloaded is None:
+                    return False
+                self.templates = reloaded
+        except Exception as error:  # keep watching, the next edit may fix it
+            print(f"{type(error).__name__}: {error}")
+            return False
+        return True
+
+    def _render(self, yaml_file: str) -> None:
+        generator = self.generator
+        try:
+            outputs = generator.render_peripheral(yaml_file, self.templates)
+        except Exception as error:  # keep watching, the next edit may fix it
+            print(f"{yaml_file}: {type(error).__name__}: {error}")
+            self.failed.add(yaml_file)
+            roots = [self.template_root / template for template in generator.options.templates]
+            self.inputs[yaml_file] = self.inputs.get(yaml_file, set()).union(generator._sources, roots)
+            return
+        generator._record_outputs(outputs)
+        self.failed.discard(yaml_file)
+        self.inputs[yaml_file] = set().union(*(output.inputs for output in outputs))
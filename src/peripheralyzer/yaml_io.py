@@ -0,0 +1,47 @@
+"""YAML loading and dumping shared by every command.
+
+The libyaml-backed ``CSafeLoader``/``CSafeDumper`` are used when PyYAML was
+built with libyaml, otherwise the pure-Python safe loader and dumper. Both
+emit byte-identical text for the plain data peripheralyzer writes.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper, SafeLoader  # type: ignore[assignment]
+
+LIBYAML = SafeLoader is not yaml.SafeLoader
+
+
+class SortedSequenceRepresenter:
+    """Dumper mixin that writes sequences of strings in sorted order."""
+
+    def represent_sequence(self, tag: str, sequence: Any, flow_style: bool | None = None) -> Any:
+        if sequence is not None and sequence and isinstance(sequence[0], str):
+            sequence = sorted(sequence)
+        return super().represent_sequence(tag, sequence, flow_style)  # type: ignore[misc]
+
+
+class SortedSafeDumper(SortedSequenceRepresenter, SafeDumper):
+    pass
+
+
+def safe_load(stream: Any) -> Any:
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def safe_dump(data: Any, stream: Any = None, **kwargs: Any) -> Any:
+    """``yaml.safe_dump`` through the fastest available dumper."""
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+
+def sorted_dump(data: Any, stream: Any = None, **kwargs: Any) -> Any:
+    """Like ``safe_dump`` but with sequences of strings sorted, as the name maps are written."""
+    return yaml.dump(data, stream, Dumper=SortedSafeDumper, **kwargs)
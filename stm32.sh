@@ -55,23 +55,15 @@ for pid in "${PIDS[@]}"; do
     wait "$pid"
 done
 PIDS=()
-python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp -y peripheral_GeneralPurposeInputOutput.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp -y peripheral_SerialPeripheralInterface.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp -y peripheral_UniversalAsynchronousReceiverTransmitter.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp -y peripheral_UniversalSynchronousAsynchronousReceiverTransmitter.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp -y peripheral_InterIntegratedCircuit.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp -y peripheral_ControllerAreaNetwork.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp -y peripheral_DirectMemoryAccess.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-for pid in "${PIDS[@]}"; do
-    wait "$pid"
-done
+python3 -m peripheralyzer generate -yr out/stm32/f4xx/unified -o out/stm32/f4xx/cpp \
+    -y peripheral_GeneralPurposeInputOutput.yml \
+    -y peripheral_SerialPeripheralInterface.yml \
+    -y peripheral_UniversalAsynchronousReceiverTransmitter.yml \
+    -y peripheral_UniversalSynchronousAsynchronousReceiverTransmitter.yml \
+    -y peripheral_InterIntegratedCircuit.yml \
+    -y peripheral_ControllerAreaNetwork.yml \
+    -y peripheral_DirectMemoryAccess.yml \
+    -t peripheral.hpp.jinja -a -j 0
 clang-format -Werror -i out/stm32/f4xx/cpp/*.hpp out/stm32/f4xx/cpp/*.cpp
 # #######################################################################
 ../svd.sh STM32H753 stm32 h7xx
@@ -95,21 +87,14 @@ for pid in "${PIDS[@]}"; do
 done
 # python3 -m peripheralyzer find-duplicates out/stm32/h7xx/unified --report-internal-repeats
 PIDS=()
-python3 -m peripheralyzer generate -yr out/stm32/h7xx/unified -o out/stm32/h7xx/cpp -y peripheral_GeneralPurposeInputOutput.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/h7xx/unified -o out/stm32/h7xx/cpp -y peripheral_UniversalSynchronousAsynchronousReceiverTransmitter.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/h7xx/unified -o out/stm32/h7xx/cpp -y peripheral_SerialPeripheralInterface.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/h7xx/unified -o out/stm32/h7xx/cpp -y peripheral_InterIntegratedCircuit.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/h7xx/unified -o out/stm32/h7xx/cpp -y peripheral_FlexibleDataRateControllerAreaNetwork.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-python3 -m peripheralyzer generate -yr out/stm32/h7xx/unified -o out/stm32/h7xx/cpp -y peripheral_DirectMemoryAccess.yml -t peripheral.hpp.jinja -a &
-PIDS+=($!)
-for pid in "${PIDS[@]}"; do
-    wait "$pid"
-done
+python3 -m peripheralyzer generate -yr out/stm32/h7xx/unified -o out/stm32/h7xx/cpp \
+    -y peripheral_GeneralPurposeInputOutput.yml \
+    -y peripheral_UniversalSynchronousAsynchronousReceiverTransmitter.yml \
+    -y peripheral_SerialPeripheralInterface.yml \
+    -y peripheral_InterIntegratedCircuit.yml \
+    -y peripheral_FlexibleDataRateControllerAreaNetwork.yml \
+    -y peripheral_DirectMemoryAccess.yml \
+    -t peripheral.hpp.jinja -a -j 0
 clang-format -Werror -i out/stm32/h7xx/cpp/*.hpp out/stm32/h7xx/cpp/*.cpp
 
 # Summary of new entries that need renaming
@@ -46,27 +46,15 @@ if [[ -z ${NAMESPACE} ]]; then
 fi
 
 OUT=out/${NAMESPACE}/${FAMILY}
-if [[ -d ${OUT} ]]; then
-    rm -rf ${OUT}
-fi
 YML_ROOT=${OUT}/ymls
 CPP_ROOT=${OUT}/cpp
 C_ROOT=${OUT}/c
 mkdir -p ${OUT} ${YML_ROOT} ${CPP_ROOT} ${C_ROOT}
-python3 -m peripheralyzer transmogrify -s ${SVD_FILE}.svd -yr ${YML_ROOT} -ns ${NAMESPACE} -ns ${FAMILY} -nm ${SVD_FILE}_name_map.yml
+python3 -m peripheralyzer transmogrify -s ${SVD_FILE}.svd -yr ${YML_ROOT} -ns ${NAMESPACE} -ns ${FAMILY} -nm ${SVD_FILE}_name_map.yml --incremental
 check_new_entries "${SVD_FILE}"
-declare -a PIDS
-for yml in `ls -1 ${YML_ROOT}/peripheral_*.yml`; do
-    # Run in the background
-    python3 -m peripheralyzer generate -yr ${YML_ROOT} -o ${CPP_ROOT} -y ${yml##*/} -t peripheral.hpp.jinja -t unittest.cpp.jinja -a &
-    PIDS+=($!)
-    # python3 peripheralyzer.py -tr templates -yr ${YML_ROOT} -o ${C_ROOT} -y ${yml##*/} -t peripheral.h.jinja -t unittest.c.jinja -a &
-    # PIDS+=($!)
-done
-for pid in "${PIDS[@]}"; do
-    wait $pid
-done
-PIDS=()
+# Renders every peripheral_*.yml in the yaml root, one worker per CPU
+python3 -m peripheralyzer generate -yr ${YML_ROOT} -o ${CPP_ROOT} -t peripheral.hpp.jinja -t unittest.cpp.jinja -a -j 0
+# python3 -m peripheralyzer generate -yr ${YML_ROOT} -o ${C_ROOT} -t peripheral.h.jinja -t unittest.c.jinja -a
 clang-format -Werror -i  ${CPP_ROOT}/*.hpp ${CPP_ROOT}/*.cpp
 for cpp in `ls -1 ${CPP_ROOT}/*.cpp`; do
     base=$(basename ${cpp} .cpp)
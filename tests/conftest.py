@@ -3,8 +3,18 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep template bytecode caches written by tests out of the user's cache directory."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("PERIPHERALYZER_CACHE_DIR", str(cache_dir))
+    return cache_dir
@@ -2,10 +2,16 @@
 from __future__ import annotations
 
 import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
 
 import pytest
 
-from peripheralyzer.cli import CLICommandGroup, PeripheralyzerCLI, default_commands
+from peripheralyzer.cli import CLICommandGroup, LazyCommand, PeripheralyzerCLI, default_commands
+
+SRC = Path(__file__).resolve().parents[1] / "src"
 
 
 def test_default_commands_returns_tuple() -> None:
@@ -156,3 +162,45 @@ def test_all_nested_commands_have_parsers() -> None:
         assert subparser is not None
         help_text = subparser.format_help()
         assert len(help_text) > 0, f"Subparser for '{name}' generated empty help"
+
+
+def _fresh_interpreter(code: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+    )
+
+
+@pytest.mark.parametrize(
+    ("argv", "expected"),
+    [
+        (["--help"], set()),
+        (["name-map", "verify", "--help"], {"yaml"}),
+        (["generate", "--help"], {"yaml"}),
+    ],
+)
+def test_cli_imports_only_the_dispatched_command(argv: list[str], expected: set[str]) -> None:
+    """Test that a subcommand does not import the heavy dependencies of the other commands."""
+    heavy = {"yaml", "jinja2", "rich", "cmsis_svd"}
+    code = (
+        "import contextlib, io, sys\n"
+        "from peripheralyzer.cli import main\n"
+        "with contextlib.redirect_stdout(io.StringIO()), contextlib.suppress(SystemExit):\n"
+        f"    main({argv!r})\n"
+        f"print(' '.join(sorted(name for name in {sorted(heavy)!r} if name in sys.modules)))\n"
+    )
+    loaded = set(_fresh_interpreter(code).stdout.split())
+    assert loaded == expected
+
+
+def test_lazy_command_loads_implementation_on_demand() -> None:
+    """Test that a lazy descriptor instantiates its command once and renames it."""
+    command = LazyCommand("verify", "Verify a naming map YAML file.", ".verify_name_map", "VerifyNameMapCommand")
+    assert command._command is None
+    loaded = command.load()
+    assert loaded is command.load()
+    assert loaded.name == "verify"
+    assert type(loaded).__name__ == "VerifyNameMapCommand"
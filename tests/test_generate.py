@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import argparse
+import os
 import tempfile
 from pathlib import Path
 from unittest import mock
@@ -11,6 +12,7 @@ import pytest
 from peripheralyzer.generate import (
     GenerateCommand,
     GenerateOptions,
+    PeripheralGenerator,
     YamlLoader,
     camel_to_snake_case,
 )
@@ -83,6 +85,47 @@ def test_yaml_loader_invalid_yaml_content() -> None:
             loader.load("invalid.yml")
 
 
+def test_yaml_loader_evicts_least_recently_used_unpinned_files(tmp_path: Path) -> None:
+    """Test that a bounded YamlLoader evicts by size, keeps pinned files and counts hits, misses and evictions."""
+    for name in "abcd":
+        (tmp_path / f"{name}.yml").write_text(f"key: {name * 5}\n")  # 11 bytes each
+    loader = YamlLoader(tmp_path, max_bytes=25)
+    evicted: list[str] = []
+    loader.add_eviction_listener(lambda path: evicted.append(path.name))
+
+    loader.load("a.yml")
+    loader.load("b.yml")
+    loader.load("a.yml")
+    loader.load("c.yml")
+    assert evicted == ["b.yml"]
+    assert loader.resident_bytes == 22
+
+    with loader.pinned():
+        loader.load("d.yml")
+        loader.load("c.yml")
+        loader.load("b.yml")
+        # everything is pinned but a, so the cache runs over budget until the block ends
+        assert evicted == ["b.yml", "a.yml"]
+        assert loader.resident_bytes == 33
+    assert evicted == ["b.yml", "a.yml", "d.yml"]
+    assert [path.name for path in loader.loaded_files] == ["c.yml", "b.yml"]
+
+    stats = loader.take_stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.peak_bytes) == (2, 5, 3, 33)
+    assert loader.take_stats().hits == 0
+
+
+def test_parse_size() -> None:
+    """Test that cache sizes accept plain bytes and binary suffixes."""
+    from peripheralyzer.generate import parse_size
+
+    assert parse_size("4096") == 4096
+    assert parse_size("64K") == 64 * 1024
+    assert parse_size("1.5mb") == 3 * 512 * 1024
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_size("lots")
+
+
 def test_generate_command_parser_configuration() -> None:
     """Test that GenerateCommand configures parser correctly."""
     command = GenerateCommand()
@@ -199,3 +242,452 @@ def test_generate_command_name_and_help() -> None:
     assert command.name == "generate"
     assert "peripheral" in command.help.lower()
     assert "yaml" in command.help.lower()
+
+
+def test_generate_resolves_yaml_globs_and_default_pattern() -> None:
+    """Test that --yaml accepts globs and defaults to every peripheral yaml in the yaml root."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yaml_root = Path(tmpdir)
+        for name in ("peripheral_B.yml", "peripheral_A.yml", "register_A_CR.yml", "other.yml"):
+            (yaml_root / name).write_text("peripheral: {}\n")
+        command = GenerateCommand()
+        parser = argparse.ArgumentParser()
+        command.configure_parser(parser)
+
+        args = parser.parse_args(["-t", "test.jinja", "-yr", tmpdir])
+        assert args.yaml is None
+        generator = PeripheralGenerator(GenerateOptions.from_namespace(args))
+        assert generator.resolve_yaml_files() == ["peripheral_A.yml", "peripheral_B.yml"]
+
+        args = parser.parse_args(["-t", "test.jinja", "-yr", tmpdir, "-y", "other.yml", "-y", "*_A*.yml"])
+        generator = PeripheralGenerator(GenerateOptions.from_namespace(args))
+        assert generator.resolve_yaml_files() == ["other.yml", "peripheral_A.yml", "register_A_CR.yml"]
+
+
+def test_generate_bytecode_cache_reuses_and_invalidates(isolated_cache_dir: Path) -> None:
+    """Test that compiled templates are cached on disk and recompiled when the template changes."""
+    from peripheralyzer.generate import main
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        template_root = root / "templates"
+        template_root.mkdir()
+        template = template_root / "name.txt.jinja"
+        template.write_text("{{ peripheral.name }}\n")
+        (root / "peripheral_A.yml").write_text(
+            "peripheral:\n  name: A\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n  members: []\n"
+        )
+        argv = ["-yr", str(root), "-tr", str(template_root), "-o", str(root / "out"), "-t", "name.txt.jinja"]
+
+        assert main(argv) == 0
+        cached = list(isolated_cache_dir.glob("jinja/jinja-*/__jinja2_*.cache"))
+        assert len(cached) == 1
+        assert main(argv) == 0
+        assert (root / "out" / "A.txt").read_text() == "A"
+
+        template.write_text("name={{ peripheral.name }}\n")
+        assert main(argv) == 0
+        assert (root / "out" / "A.txt").read_text() == "name=A"
+
+        cache_dir = root / "cache"
+        assert main([*argv, "--bytecode-cache", str(cache_dir)]) == 0
+        assert list(cache_dir.glob("jinja-*/__jinja2_*.cache"))
+        assert main([*argv, "--bytecode-cache", str(root / "unused"), "--no-bytecode-cache"]) == 0
+        assert not (root / "unused").exists()
+
+
+def test_generate_renders_when_bytecode_cache_is_not_writable(tmp_path: Path) -> None:
+    """Test that a cache directory that exists but cannot be written to falls back to in-memory compiles."""
+    from peripheralyzer.generate import main
+
+    template_root = tmp_path / "templates"
+    template_root.mkdir()
+    (template_root / "name.txt.jinja").write_text("{{ peripheral.name }}\n")
+    (tmp_path / "peripheral_A.yml").write_text(
+        "peripheral:\n  name: A\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n  members: []\n"
+    )
+    (tmp_path / "peripheral_B.yml").write_text(
+        "peripheral:\n  name: B\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n  members: []\n"
+    )
+    cache_dir = tmp_path / "cache"
+    argv = ["-yr", str(tmp_path), "-tr", str(template_root), "-o", str(tmp_path / "out"), "-t", "name.txt.jinja"]
+
+    denied = mock.Mock(side_effect=PermissionError("read-only cache"))
+    with mock.patch("jinja2.bccache.tempfile.NamedTemporaryFile", denied):
+        assert main([*argv, "--bytecode-cache", str(cache_dir)]) == 0
+    assert denied.call_count == 1
+    assert (tmp_path / "out" / "A.txt").read_text() == "A"
+    assert (tmp_path / "out" / "B.txt").read_text() == "B"
+    assert not list(cache_dir.glob("jinja-*/__jinja2_*.cache"))
+
+
+def test_generate_loads_packaged_templates_from_precompiled_bundle(tmp_path: Path) -> None:
+    """Test that the default template root renders through the precompiled bundle when one is shipped."""
+    from peripheralyzer import generate
+    from peripheralyzer.template_bundle import compile_template_bundle
+
+    package_dir = tmp_path / "package"
+    template_root = package_dir / "templates"
+    template_root.mkdir(parents=True)
+    template = template_root / "name.txt.jinja"
+    template.write_text("{{ peripheral.name | snake_case }}\n")
+    bundle = compile_template_bundle(template_root, package_dir)
+    # Only the bundle still holds the snake_case flavour of the template.
+    template.write_text("{{ peripheral.name }}\n")
+
+    yaml_root = tmp_path / "ymls"
+    yaml_root.mkdir()
+    (yaml_root / "peripheral_A.yml").write_text(
+        "peripheral:\n  name: TimerA\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n  members: []\n"
+    )
+    argv = ["-yr", str(yaml_root), "-t", "name.txt.jinja", "--no-bytecode-cache"]
+    custom_root = tmp_path / "custom"
+    custom_root.mkdir()
+    (custom_root / "name.txt.jinja").write_text(template.read_text())
+    with (
+        mock.patch.object(generate, "package_templates_root", return_value=template_root),
+        mock.patch.object(generate, "packaged_bundle", return_value=bundle),
+    ):
+        assert generate.main([*argv, "-o", str(tmp_path / "out")]) == 0
+        assert (tmp_path / "out" / "TimerA.txt").read_text() == "timer_a"
+        assert generate.main([*argv, "-o", str(tmp_path / "other"), "-tr", str(custom_root)]) == 0
+        assert (tmp_path / "other" / "TimerA.txt").read_text() == "TimerA"
+
+
+def test_packaged_bundle_ignores_stale_or_missing_bundles(tmp_path: Path) -> None:
+    """Test that a bundle compiled from other template sources, or one never built, is not used."""
+    from peripheralyzer.template_bundle import compile_template_bundle, packaged_bundle
+
+    (tmp_path / "templates").mkdir()
+    template = tmp_path / "templates" / "name.txt.jinja"
+    template.write_text("{{ peripheral.name }}\n")
+    assert packaged_bundle(tmp_path) is None
+
+    bundle = compile_template_bundle(tmp_path / "templates", tmp_path)
+    assert packaged_bundle(tmp_path) == bundle
+    template.write_text("name={{ peripheral.name }}\n")
+    assert packaged_bundle(tmp_path) is None
+
+
+def test_shared_register_is_processed_once_and_raw_parse_is_untouched(tmp_path: Path) -> None:
+    """Test that a register shared by two peripherals is packed once and its cached parse stays raw."""
+    register = (
+        "name: CR\nsizeof: '0x4'\ndefault_depth: 32\ndefault_type: uint32_t\n"
+        "fields:\n  - name: EN\n    offset: 0\n"
+    )
+    (tmp_path / "register_CR.yml").write_text(register)
+    for name in ("A", "B"):
+        (tmp_path / f"peripheral_{name}.yml").write_text(
+            f"peripheral:\n  name: {name}\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n"
+            "  registers: [register_CR.yml]\n  members:\n    - name: cr\n      offset: 0\n      type: CR\n      sizeof: 4\n"
+        )
+    template_root = tmp_path / "templates"
+    template_root.mkdir()
+    (template_root / "fields.txt.jinja").write_text(
+        "{% for r in peripheral.registers %}{{ r.sizeof }}:{% for f in r.fields %}{{ f.name or '-' }}{{ f.count }} {% endfor %}{% endfor %}"
+    )
+    options = GenerateOptions(
+        banner=False,
+        templates=["fields.txt.jinja"],
+        yaml_files=[],
+        verbose=False,
+        output=tmp_path / "out",
+        template_root=template_root,
+        yaml_root=tmp_path,
+        anonymous=False,
+    )
+    generator = PeripheralGenerator(options)
+    with mock.patch.object(generator, "pack_fields", wraps=generator.pack_fields) as pack_fields:
+        assert generator.run() == 0
+    assert pack_fields.call_count == 1
+    assert (tmp_path / "out" / "A.txt").read_text() == (tmp_path / "out" / "B.txt").read_text() == "4:EN1 -31 "
+    raw = generator.loader.load("register_CR.yml")
+    assert raw["sizeof"] == "0x4"
+    assert raw["fields"] == [{"name": "EN", "offset": 0}]
+
+
+
+def test_bounded_yaml_cache_renders_the_same_outputs(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """Test that --yaml-cache-size evicts shared documents between peripherals without changing the output."""
+    from peripheralyzer.generate import main
+
+    for name in ("CR", "SR"):
+        (tmp_path / f"register_{name}.yml").write_text(
+            f"name: {name}\nsizeof: 4\ndefault_depth: 32\ndefault_type: uint32_t\n"
+            "fields:\n  - name: EN\n    offset: 0\n"
+        )
+    for name, register in (("A", "CR"), ("B", "SR"), ("C", "CR")):
+        (tmp_path / f"peripheral_{name}.yml").write_text(
+            f"peripheral:\n  name: {name}\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n"
+            f"  registers: [register_{register}.yml]\n"
+            f"  members:\n    - name: r\n      offset: 0\n      type: {register}\n      sizeof: 4\n"
+        )
+    template_root = tmp_path / "templates"
+    template_root.mkdir()
+    (template_root / "fields.txt.jinja").write_text(
+        "{% for r in peripheral.registers %}{{ r.name }}:{% for f in r.fields %}{{ f.name or '-' }}{{ f.count }} "
+        "{% endfor %}{% endfor %}"
+    )
+
+    def generate(out: str, *extra: str) -> dict[str, str]:
+        argv = ["-yr", str(tmp_path), "-tr", str(template_root), "-o", str(tmp_path / out)]
+        assert main([*argv, "-t", "fields.txt.jinja", "--no-bytecode-cache", *extra]) == 0
+        return {path.name: path.read_text() for path in (tmp_path / out).iterdir()}
+
+    unbounded = generate("unbounded")
+    capsys.readouterr()
+    assert generate("bounded", "--yaml-cache-size", "200") == unbounded
+    assert unbounded["C.txt"] == "CR:EN1 -31 "
+    # a peripheral and its register only fit while pinned, so every document is evicted once it is done with
+    assert capsys.readouterr().out == "yaml cache: 0 hits, 6 misses, 5 evictions, peak 277 bytes\n"
+
+
+def test_generate_jobs_leaves_template_compilation_to_the_workers(tmp_path: Path) -> None:
+    """Test that with --jobs the parent only checks the templates exist and never loads Jinja itself."""
+    import subprocess
+    import sys
+
+    for name in ("A", "B"):
+        (tmp_path / f"peripheral_{name}.yml").write_text(
+            f"peripheral:\n  name: {name}\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n  members: []\n"
+        )
+    template_root = tmp_path / "templates"
+    template_root.mkdir()
+    (template_root / "name.txt.jinja").write_text("{{ peripheral.name }}")
+    argv = ["-yr", str(tmp_path), "-tr", str(template_root), "-o", str(tmp_path / "out"), "-t", "name.txt.jinja"]
+
+    def run(*extra: str) -> tuple[int, str]:
+        code = (
+            "import sys\n"
+            "from peripheralyzer.generate import main\n"
+            f"status = main({[*argv, '-j', '2', *extra]!r})\n"
+            "assert 'jinja2' not in sys.modules\n"
+            "sys.exit(status)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1] / "src")},
+        )
+        assert not result.stderr
+        return result.returncode, result.stdout
+
+    assert run() == (0, "")
+    assert (tmp_path / "out" / "A.txt").read_text() == "A"
+    assert (tmp_path / "out" / "B.txt").read_text() == "B"
+    code, stdout = run("-t", "missing.txt.jinja")
+    assert code != 0
+    assert stdout == f"Template {template_root / 'missing.txt.jinja'} not found.\n"
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_generate_depfile_lists_loaded_yaml_and_resolved_templates(tmp_path: Path, jobs: str) -> None:
+    """Test that --depfile names every yaml and template, includes too, each output was rendered from."""
+    from peripheralyzer.generate import main
+
+    register = "name: CR\nsizeof: 4\ndefault_depth: 32\ndefault_type: uint32_t\nfields: []\n"
+    (tmp_path / "register_CR.yml").write_text(register)
+    for name, registers in (("A", "[register_CR.yml]"), ("B", "[register_CR.yml]"), ("C", "[]")):
+        (tmp_path / f"peripheral_{name}.yml").write_text(
+            f"peripheral:\n  name: {name}\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n"
+            f"  registers: {registers}\n  members: []\n"
+        )
+    template_root = tmp_path / "my templates"
+    template_root.mkdir()
+    (template_root / "name.txt.jinja").write_text("{% include 'body.inc' %}")
+    (template_root / "body.inc").write_text("{% for r in peripheral.registers %}{% include 'reg.inc' %}{% endfor %}")
+    (template_root / "reg.inc").write_text("{{ r.name }}")
+    (template_root / "other.md.jinja").write_text("{{ peripheral.name }}")
+    out = tmp_path / "out"
+    depfile = out / "gen.d"
+    argv = [
+        "-yr", str(tmp_path),
+        "-tr", str(template_root),
+        "-o", str(out),
+        "-t", "name.txt.jinja",
+        "-t", "other.md.jinja",
+        "-j", jobs,
+        "--depfile", str(depfile),
+        "--no-bytecode-cache",
+    ]
+    assert main(argv) == 0
+
+    rules = {}
+    for rule in depfile.read_text().replace("\\ ", "\0").replace(" \\\n", " ").splitlines():
+        target, _, inputs = rule.partition(": ")
+        rules[target.replace("\0", " ")] = [path.replace("\0", " ") for path in inputs.split()]
+
+    def templates(*names: str) -> list[str]:
+        return [str(template_root / name) for name in names]
+
+    register_yaml = str(tmp_path / "register_CR.yml")
+    with_registers = templates("name.txt.jinja", "body.inc", "reg.inc")
+    assert rules == {
+        str(out / "A.txt"): [str(tmp_path / "peripheral_A.yml"), register_yaml, *with_registers],
+        str(out / "A.md"): [str(tmp_path / "peripheral_A.yml"), register_yaml, *templates("other.md.jinja")],
+        str(out / "B.txt"): [str(tmp_path / "peripheral_B.yml"), register_yaml, *with_registers],
+        str(out / "B.md"): [str(tmp_path / "peripheral_B.yml"), register_yaml, *templates("other.md.jinja")],
+        str(out / "C.txt"): [str(tmp_path / "peripheral_C.yml"), *templates("name.txt.jinja", "body.inc")],
+        str(out / "C.md"): [str(tmp_path / "peripheral_C.yml"), *templates("other.md.jinja")],
+    }
+
+
+def test_generate_plan_reports_stale_outputs_without_rendering(tmp_path: Path) -> None:
+    """Test that --plan names exactly the outputs whose recorded inputs changed, without importing Jinja."""
+    import subprocess
+    import sys
+
+    from peripheralyzer.generate import main
+
+    register = "name: CR\nsizeof: 4\ndefault_depth: 32\ndefault_type: uint32_t\nfields: []\n"
+    (tmp_path / "register_CR.yml").write_text(register)
+    for name, registers in (("A", "[register_CR.yml]"), ("B", "[]")):
+        (tmp_path / f"peripheral_{name}.yml").write_text(
+            f"peripheral:\n  name: {name}\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n"
+            f"  registers: {registers}\n  members: []\n"
+        )
+    template_root = tmp_path / "templates"
+    template_root.mkdir()
+    (template_root / "name.txt.jinja").write_text("{{ peripheral.name }}{% include 'regs.inc' %}")
+    (template_root / "regs.inc").write_text("{% for r in peripheral.registers %}{{ r.name }}{% endfor %}")
+    out = tmp_path / "out"
+    argv = [
+        "-yr", str(tmp_path),
+        "-tr", str(template_root),
+        "-o", str(out),
+        "-t", "name.txt.jinja",
+        "--manifest", str(tmp_path / "manifest.yml"),
+        "--no-bytecode-cache",
+    ]
+
+    def plan(*extra: str) -> tuple[int, list[str]]:
+        code = (
+            "import sys\n"
+            "from peripheralyzer.generate import main\n"
+            f"status = main({[*argv, '--plan', *extra]!r})\n"
+            "assert 'jinja2' not in sys.modules\n"
+            "sys.exit(status)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1] / "src")},
+        )
+        assert not result.stderr
+        return result.returncode, result.stdout.splitlines()
+
+    assert plan() == (
+        1,
+        [f"{out / 'A.txt'}: not in the manifest", f"{out / 'B.txt'}: not in the manifest", "2 of 2 outputs are stale"],
+    )
+    assert main(argv) == 0
+    assert plan() == (0, ["0 of 2 outputs are stale"])
+    os.utime(tmp_path / "manifest.yml", ns=(1_000_000_000, 1_000_000_000))
+    assert main(argv) == 0
+    assert (tmp_path / "manifest.yml").stat().st_mtime_ns == 1_000_000_000
+
+    (tmp_path / "register_CR.yml").write_text(register.replace("CR", "CR2"))
+    assert plan() == (1, [f"{out / 'A.txt'}: {tmp_path / 'register_CR.yml'} changed", "1 of 2 outputs are stale"])
+    assert main([*argv, "-y", "peripheral_A.yml"]) == 0
+    assert (out / "A.txt").read_text() == "ACR2"
+    assert plan() == (0, ["0 of 2 outputs are stale"])
+
+    (template_root / "regs.inc").write_text("{% for r in peripheral.registers %}[{{ r.name }}]{% endfor %}")
+    (out / "B.txt").unlink()
+    assert plan() == (
+        1,
+        [
+            f"{out / 'A.txt'}: {template_root / 'regs.inc'} changed",
+            f"{out / 'B.txt'}: missing",
+            "2 of 2 outputs are stale",
+        ],
+    )
+    assert plan("-a") == (
+        1,
+        [f"{out / 'A.txt'}: options changed", f"{out / 'B.txt'}: options changed", "2 of 2 outputs are stale"],
+    )
+
+
+def test_watch_rerenders_only_peripherals_whose_inputs_changed(tmp_path: Path) -> None:
+    """Test that each watch round re-renders exactly the peripherals using a changed yaml or template."""
+    from peripheralyzer.watch import Watcher
+
+    def edit(path: Path, text: str) -> None:
+        # move the mtime well past the previous write, whatever the filesystem's timestamp granularity
+        mtime = path.stat().st_mtime_ns + 10**9 if path.exists() else None
+        path.write_text(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def peripheral(name: str, registers: str) -> None:
+        edit(
+            tmp_path / f"peripheral_{name}.yml",
+            f"peripheral:\n  name: {name}\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n"
+            f"  registers: {registers}\n  members: []\n",
+        )
+
+    def register(field: str) -> None:
+        edit(
+            tmp_path / "register_CR.yml",
+            "name: CR\nsizeof: 4\ndefault_depth: 32\ndefault_type: uint32_t\n"
+            f"fields:\n  - name: {field}\n    offset: 0\n",
+        )
+
+    register("EN")
+    peripheral("A", "[register_CR.yml]")
+    peripheral("B", "[register_CR.yml]")
+    peripheral("C", "[]")
+    template_root = tmp_path / "templates"
+    template_root.mkdir()
+    edit(template_root / "name.txt.jinja", "{{ peripheral.name }}{% include 'body.inc' %}")
+    edit(template_root / "body.inc", "{% for r in peripheral.registers %}{% include 'reg.inc' %}{% endfor %}")
+    edit(template_root / "reg.inc", "/{{ r.fields[0].name }}")
+    out = tmp_path / "out"
+    options = GenerateOptions(
+        banner=False,
+        templates=["name.txt.jinja"],
+        yaml_files=[],
+        verbose=False,
+        output=out,
+        template_root=template_root,
+        yaml_root=tmp_path,
+        anonymous=False,
+        watch=True,
+    )
+    generator = PeripheralGenerator(options)
+    templates = generator._load_templates(generator._build_environment())
+    assert templates is not None
+    watcher = Watcher(generator, templates)
+
+    def outputs() -> dict[str, str]:
+        return {path.stem: path.read_text() for path in sorted(out.iterdir())}
+
+    assert watcher.update() == ["peripheral_A.yml", "peripheral_B.yml", "peripheral_C.yml"]
+    assert outputs() == {"A": "A/EN", "B": "B/EN", "C": "C"}
+    assert watcher.update() == []
+
+    register("ENABLE")
+    assert watcher.update() == ["peripheral_A.yml", "peripheral_B.yml"]
+    assert outputs() == {"A": "A/ENABLE", "B": "B/ENABLE", "C": "C"}
+
+    # only the peripherals that reached reg.inc through body.inc depend on it
+    edit(template_root / "reg.inc", "[{{ r.fields[0].name }}]")
+    assert watcher.update() == ["peripheral_A.yml", "peripheral_B.yml"]
+    assert outputs() == {"A": "A[ENABLE]", "B": "B[ENABLE]", "C": "C"}
+
+    peripheral("C", "[register_CR.yml]")
+    peripheral("D", "[]")
+    assert watcher.update() == ["peripheral_C.yml", "peripheral_D.yml"]
+    assert outputs() == {"A": "A[ENABLE]", "B": "B[ENABLE]", "C": "C[ENABLE]", "D": "D"}
+
+    # a broken template keeps the watcher alive and the peripherals are retried on the next change
+    edit(template_root / "body.inc", "{% for r in peripheral.registers %}")
+    assert watcher.update() == ["peripheral_A.yml", "peripheral_B.yml", "peripheral_C.yml", "peripheral_D.yml"]
+    assert watcher.failed == {"peripheral_A.yml", "peripheral_B.yml", "peripheral_C.yml", "peripheral_D.yml"}
+    edit(template_root / "body.inc", "{% for r in peripheral.registers %}:{% include 'reg.inc' %}{% endfor %}")
+    assert watcher.update() == ["peripheral_A.yml", "peripheral_B.yml", "peripheral_C.yml", "peripheral_D.yml"]
+    assert watcher.failed == set()
+    assert outputs() == {"A": "A:[ENABLE]", "B": "B:[ENABLE]", "C": "C:[ENABLE]", "D": "D"}
+    assert watcher.update() == []
@@ -1,6 +1,7 @@
 """Integration tests for the generate command with real template rendering."""
 from __future__ import annotations
 
+import os
 import shutil
 import subprocess
 import tempfile
@@ -278,3 +279,83 @@ class TestGenerateWithTestPeripheral:
             )
         except subprocess.TimeoutExpired:
             pytest.fail("Test executable timed out")
+
+
+def test_generate_rerun_preserves_unchanged_outputs(test_data_dir: Path, output_dir: Path) -> None:
+    """Test that regenerating identical code does not touch the output files."""
+    cli = PeripheralyzerCLI(default_commands())
+    argv = [
+        "generate",
+        "-yr", str(test_data_dir),
+        "-o", str(output_dir),
+        "-y", "peripheral_test.yml",
+        "-t", "peripheral.hpp.jinja",
+        "-a",
+    ]
+    assert cli.run(argv) == 0
+    hpp_file = output_dir / "TestPeripheral.hpp"
+    os.utime(hpp_file, ns=(1_000_000_000, 1_000_000_000))
+
+    assert cli.run(argv) == 0
+    assert hpp_file.stat().st_mtime_ns == 1_000_000_000
+
+
+def test_generate_batch_matches_per_file_runs(test_data_dir: Path, output_dir: Path) -> None:
+    """Test that one generate over a whole yaml root renders the same code as one run per peripheral."""
+    from peripheralyzer.transmogrify import main as transmogrify_main
+
+    yaml_root = output_dir / "ymls"
+    assert transmogrify_main([
+        "-s", str(test_data_dir / "device_test.svd"),
+        "-yr", str(yaml_root),
+        "-nm", str(output_dir / "name_map.yml"),
+        "-ns", "test",
+        "--expand-name-map",
+    ]) == 0
+    cli = PeripheralyzerCLI(default_commands())
+    templates = ["-t", "peripheral.hpp.jinja", "-t", "unittest.cpp.jinja"]
+
+    batch_dir = output_dir / "batch"
+    assert cli.run(["generate", "-yr", str(yaml_root), "-o", str(batch_dir), *templates, "-a"]) == 0
+
+    single_dir = output_dir / "single"
+    peripheral_yamls = sorted(yaml_root.glob("peripheral_*.yml"))
+    for peripheral_yaml in peripheral_yamls:
+        argv = ["generate", "-yr", str(yaml_root), "-o", str(single_dir), "-y", peripheral_yaml.name, *templates, "-a"]
+        assert cli.run(argv) == 0
+
+    parallel_dir = output_dir / "parallel"
+    assert cli.run(["generate", "-yr", str(yaml_root), "-o", str(parallel_dir), *templates, "-a", "-j", "3"]) == 0
+
+    batch = {path.name: path.read_text() for path in sorted(batch_dir.iterdir())}
+    single = {path.name: path.read_text() for path in sorted(single_dir.iterdir())}
+    parallel = {path.name: path.read_text() for path in sorted(parallel_dir.iterdir())}
+    assert len(batch) == 2 * len(peripheral_yamls)
+    assert batch == single
+    assert parallel == single
+
+
+def test_generate_jobs_reports_first_error_in_input_order(test_data_dir: Path, output_dir: Path) -> None:
+    """Test that --jobs writes the peripherals before a failure and raises the first failure given."""
+    yaml_root = output_dir / "ymls"
+    shutil.copytree(test_data_dir, yaml_root)
+    (yaml_root / "not_a_peripheral.yml").write_text("register: {}\n")
+    (yaml_root / "missing_register.yml").write_text(
+        "peripheral:\n  name: Missing\n  sizeof: 4\n  default_type: uint32_t\n  default_depth: 32\n"
+        "  members: []\n  registers: [register_missing.yml]\n"
+    )
+    cli = PeripheralyzerCLI(default_commands())
+    argv = [
+        "generate",
+        "-yr", str(yaml_root),
+        "-o", str(output_dir / "cpp"),
+        "-y", "peripheral_test.yml",
+        "-y", "not_a_peripheral.yml",
+        "-y", "missing_register.yml",
+        "-t", "peripheral.hpp.jinja",
+        "-a",
+        "-j", "3",
+    ]
+    with pytest.raises(AssertionError):
+        cli.run(argv)
+    assert (output_dir / "cpp" / "TestPeripheral.hpp").exists()
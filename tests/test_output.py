@@ -0,0 +1,87 @@
+"""Tests for the write-if-changed output layer."""
+from __future__ import annotations
+
+import os
+import stat
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from peripheralyzer.output import write_chunks_if_changed, write_if_changed
+
+
+def _backdate(path: Path) -> None:
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+
+def test_write_if_changed_creates_file_and_parents() -> None:
+    """Test that a missing file (and its directory) is created."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "nested" / "out.hpp"
+        assert write_if_changed(path, "int x;\n") is True
+        assert path.read_text() == "int x;\n"
+        assert sorted(p.name for p in path.parent.iterdir()) == ["out.hpp"]
+
+
+def test_write_if_changed_skips_identical_contents() -> None:
+    """Test that rewriting the same text leaves the file and its mtime alone."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "out.yml"
+        write_if_changed(path, "name: A\n")
+        _backdate(path)
+        assert write_if_changed(path, "name: A\n") is False
+        assert path.stat().st_mtime_ns == 1_000_000_000
+
+
+def test_write_if_changed_replaces_changed_contents() -> None:
+    """Test that same-size and different-size changes are both written, keeping the file mode."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "out.yml"
+        write_if_changed(path, "name: A\n")
+        path.chmod(0o640)
+        _backdate(path)
+        assert write_if_changed(path, "name: B\n") is True
+        assert path.read_text() == "name: B\n"
+        assert path.stat().st_mtime_ns != 1_000_000_000
+        assert write_if_changed(path, "name: Longer\n") is True
+        assert path.read_text() == "name: Longer\n"
+        assert stat.S_IMODE(path.stat().st_mode) == 0o640
+        assert sorted(p.name for p in path.parent.iterdir()) == ["out.yml"]
+
+
+@pytest.mark.parametrize(
+    "new",
+    ["abcdefgh", "abcdefghij", "abcdXfgh", "abcdef", "", "Xbcdefgh", "abcdefgh\n"],
+)
+def test_write_chunks_if_changed_streams_only_changed_contents(new: str) -> None:
+    """Test that streamed chunks leave an identical file alone and replace any other, block by block."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "out.hpp"
+        write_if_changed(path, "abcdefgh")
+        path.chmod(0o640)
+        _backdate(path)
+        chunks = [new[index : index + 3] for index in range(0, len(new), 3)]
+        assert write_chunks_if_changed(path, iter(chunks), block_size=2) is (new != "abcdefgh")
+        assert path.read_text() == new
+        assert (path.stat().st_mtime_ns == 1_000_000_000) is (new == "abcdefgh")
+        assert stat.S_IMODE(path.stat().st_mode) == 0o640
+        assert sorted(p.name for p in path.parent.iterdir()) == ["out.hpp"]
+
+
+def test_write_chunks_if_changed_creates_file_and_keeps_old_one_on_error() -> None:
+    """Test that a new file is created and a failing chunk source leaves the previous file untouched."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "nested" / "out.hpp"
+        assert write_chunks_if_changed(path, iter(["int ", "x;\n"])) is True
+        assert path.read_text() == "int x;\n"
+
+        def failing() -> Iterator[str]:
+            yield "long x;\n"
+            raise RuntimeError("template failed")
+
+        with pytest.raises(RuntimeError):
+            write_chunks_if_changed(path, failing(), block_size=1)
+        assert path.read_text() == "int x;\n"
+        assert sorted(p.name for p in path.parent.iterdir()) == ["out.hpp"]
@@ -47,3 +47,14 @@ def test_package_templates_consistency() -> None:
     # Verify multiple calls return consistent paths
     root2 = package_templates_root()
     assert root == root2, "Inconsistent template root paths"
+
+
+def test_default_cache_root_honours_environment(monkeypatch) -> None:
+    """Test that the cache root comes from PERIPHERALYZER_CACHE_DIR, then XDG_CACHE_HOME."""
+    from peripheralyzer.paths import default_cache_root
+
+    monkeypatch.setenv("PERIPHERALYZER_CACHE_DIR", "/tmp/peripheralyzer-cache")
+    assert default_cache_root() == Path("/tmp/peripheralyzer-cache")
+    monkeypatch.delenv("PERIPHERALYZER_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/xdg")
+    assert default_cache_root() == Path("/tmp/xdg/peripheralyzer")
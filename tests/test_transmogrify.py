@@ -2,10 +2,12 @@
 from __future__ import annotations
 
 import argparse
+import os
 import tempfile
 from pathlib import Path
 
 import pytest
+import yaml
 
 from peripheralyzer.transmogrify import TransmogrifyCommand
 
@@ -63,3 +65,609 @@ def test_transmogrify_command_parser_has_optional_args() -> None:
     assert "-yr" in help_text  # yaml root
     assert "-ns" in help_text  # namespace
     assert "-nm" in help_text  # name map
+
+
+def _transmogrify(svd: Path, root: Path, *extra: str) -> dict[str, str]:
+    """Run transmogrify into root/ymls and return the emitted yaml text keyed by filename."""
+    from peripheralyzer.transmogrify import main
+
+    yaml_root = root / "ymls"
+    argv = [
+        "-s", str(svd),
+        "-yr", str(yaml_root),
+        "-nm", str(root / "name_map.yml"),
+        "-ns", "test",
+        "--expand-name-map",
+        *extra,
+    ]
+    assert main(argv) == 0
+    return {path.name: path.read_text() for path in sorted(yaml_root.glob("[!.]*.yml"))}
+
+
+def test_transmogrify_stream_matches_device_tree() -> None:
+    """Test that --stream emits the same yaml files as the full cmsis-svd device tree."""
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tree_outputs = _transmogrify(svd, Path(tmpdir) / "tree")
+        stream_outputs = _transmogrify(svd, Path(tmpdir) / "stream", "--stream")
+
+    assert "peripheral_TIM2.yml" in tree_outputs
+    assert "register_GPIOB_AFRH.yml" in tree_outputs
+    assert stream_outputs == tree_outputs
+
+
+def test_stream_reader_defers_forward_derived_peripherals() -> None:
+    """Test that a peripheral deriving from a later one is yielded once its parent is parsed."""
+    from peripheralyzer.svd_stream import SVDStreamReader
+
+    svd_text = """<?xml version="1.0" encoding="utf-8"?>
+<device>
+  <name>FWD</name>
+  <addressUnitBits>8</addressUnitBits>
+  <width>32</width>
+  <size>32</size>
+  <peripherals>
+    <peripheral derivedFrom="UART1">
+      <name>UART2</name>
+      <baseAddress>0x1000</baseAddress>
+    </peripheral>
+    <peripheral>
+      <name>UART1</name>
+      <baseAddress>0x0</baseAddress>
+      <addressBlock><offset>0</offset><size>0x100</size></addressBlock>
+      <registers>
+        <register>
+          <name>DR</name>
+          <addressOffset>0x4</addressOffset>
+          <size>16</size>
+        </register>
+      </registers>
+    </peripheral>
+  </peripherals>
+</device>
+"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        svd = Path(tmpdir) / "forward.svd"
+        svd.write_text(svd_text)
+        reader = SVDStreamReader(svd)
+        assert reader.device.width == 32
+        peripherals = list(reader.iter_peripherals())
+
+    assert [peripheral.name for peripheral in peripherals] == ["UART1", "UART2"]
+    derived = peripherals[1]
+    assert derived.derived_from == "UART1"
+    assert derived.base_address == 0x1000
+    assert [(register.name, register.size) for register in derived.get_registers()] == [("DR", 16)]
+
+
+def test_transmogrify_jobs_matches_serial_run() -> None:
+    """Test that --jobs emits the same yaml files and name map as a serial run."""
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        serial_outputs = _transmogrify(svd, root / "serial")
+        parallel_outputs = _transmogrify(svd, root / "parallel", "--jobs", "3")
+        stream_outputs = _transmogrify(svd, root / "stream", "--stream", "--jobs", "2")
+        serial_map = (root / "serial" / "name_map.yml").read_text()
+        parallel_map = (root / "parallel" / "name_map.yml").read_text()
+
+    assert parallel_outputs == serial_outputs
+    assert stream_outputs == serial_outputs
+    assert parallel_map == serial_map
+
+
+def test_transmogrify_jobs_reports_new_entries_like_serial_run() -> None:
+    """Test that --jobs writes the same new name map entries file in preserve mode."""
+    from peripheralyzer.transmogrify import main
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    new_entries: list[str] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for jobs in ("1", "2"):
+            root = Path(tmpdir) / jobs
+            root.mkdir()
+            name_map = root / "name_map.yml"
+            name_map.write_text("TIM1:\n  as_type: Timer1\n  as_variable: timer1\n")
+            argv = ["-s", str(svd), "-yr", str(root / "ymls"), "-nm", str(name_map), "--jobs", jobs]
+            assert main(argv) == 0
+            new_entries.append((root / "name_map_new_entries.yml").read_text())
+
+    assert new_entries[0] == new_entries[1]
+
+
+def test_name_mapper_override_ranking() -> None:
+    """Test that the compiled override index ranks exact, then fewest wildcards, then longest pattern."""
+    from peripheralyzer.transmogrify import NameMapper
+
+    name_map = """CR1:
+  as_type: ControlRegister1
+  as_variable: cr1
+  overrides:
+    "TIM*":
+      as_type: TimerAnyControl
+    "TIM1*":
+      as_type: Timer1Control
+    "TIM?.CR1":
+      as_type: TimerDigitControl
+    "TIM1.CR1":
+      as_type: Timer1ExactControl
+    "USART[12].*":
+      as_type: UsartControl
+    "*.CR1":
+      as_type: AnyControl
+"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "name_map.yml"
+        path.write_text(name_map)
+        mapper = NameMapper(path, preserve_existing=False)
+
+        assert mapper.as_type("CR1", "TIM1.CR1") == "Timer1ExactControl"
+        assert mapper.as_type("CR1", "TIM2.CR1") == "TimerDigitControl"
+        assert mapper.as_type("CR1", "TIM15.CR2") == "Timer1Control"
+        assert mapper.as_type("CR1", "TIM20.CR2") == "TimerAnyControl"
+        # same wildcard count and length fall back to alphabetical order
+        assert mapper.as_type("CR1", "TIM15.CR1") == "AnyControl"
+        assert mapper.as_type("CR1", "USART2.CR3") == "UsartControl"
+        assert mapper.as_type("CR1", "SPI1.CR1") == "AnyControl"
+        assert mapper.as_type("CR1", "SPI1.CR2") == "ControlRegister1"
+        assert mapper.as_type("CR1", "TI") == "ControlRegister1"
+        assert mapper.as_type("CR1") == "ControlRegister1"
+        assert mapper.as_variable("CR1", "TIM2.CR1") == "cr1"
+        # memoized lookups still record their context, once each
+        mapper.lookup("CR1", "TIM2.CR1")
+        mapper.dump()
+        contexts = yaml.safe_load(path.read_text())["CR1"]["context"]
+
+    assert contexts == sorted(set(contexts))
+    assert {"TIM2.CR1", "SPI1.CR2", "TI"} <= set(contexts)
+
+
+def _age_outputs(yaml_root: Path) -> None:
+    """Backdate every yaml file so a rewrite shows up as a changed mtime."""
+    for path in yaml_root.glob("[!.]*.yml"):
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+
+def _rewritten(yaml_root: Path) -> set[str]:
+    return {path.name for path in yaml_root.glob("[!.]*.yml") if path.stat().st_mtime_ns != 1_000_000_000}
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_transmogrify_incremental_rebuilds_only_changed_peripherals(jobs: str) -> None:
+    """Test that --incremental leaves unchanged peripherals alone and prunes stale files."""
+    source = (Path(__file__).parent / "data" / "device_test.svd").read_text()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        svd = root / "device.svd"
+        svd.write_text(source)
+        yaml_root = root / "inc" / "ymls"
+        first = _transmogrify(svd, root / "inc", "--incremental", "--jobs", jobs)
+        assert (yaml_root / ".transmogrify_manifest.yml").exists()
+
+        manifest = yaml_root / ".transmogrify_manifest.yml"
+        _age_outputs(yaml_root)
+        os.utime(manifest, ns=(1_000_000_000, 1_000_000_000))
+        assert _transmogrify(svd, root / "inc", "--incremental", "--jobs", jobs) == first
+        assert _rewritten(yaml_root) == set()
+        assert manifest.stat().st_mtime_ns == 1_000_000_000
+
+        # a description change in GPIOA reaches its derived GPIOB but neither timer
+        svd.write_text(source.replace("GPIO port mode register", "GPIO port mode"))
+        _age_outputs(yaml_root)
+        changed = _transmogrify(svd, root / "inc", "--incremental", "--jobs", jobs)
+        assert changed == _transmogrify(svd, root / "full")
+        assert _rewritten(yaml_root) == {
+            "peripheral_GPIOA.yml",
+            "peripheral_GPIOB.yml",
+            "register_GPIOA_MODER.yml",
+            "register_GPIOB_MODER.yml",
+        }
+
+        # dropping a register removes its yaml file
+        svd.write_text(source.replace("<name>SR</name>", "<name>STATUS</name>"))
+        pruned = _transmogrify(svd, root / "inc", "--incremental", "--jobs", jobs)
+        assert "register_TIM1_SR.yml" not in pruned
+        assert "register_TIM1_STATUS.yml" in pruned
+        assert pruned == _transmogrify(svd, root / "full2")
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_transmogrify_incremental_reuse_derived_keeps_referencing_an_unchanged_parent(jobs: str) -> None:
+    """Test that a changed derived peripheral still references its parent when the parent is reused."""
+    source = (Path(__file__).parent / "data" / "device_test.svd").read_text()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        svd = root / "device.svd"
+        svd.write_text(source)
+        yaml_root = root / "inc" / "ymls"
+        _transmogrify(svd, root / "inc", "--incremental", "--reuse-derived", "--jobs", jobs)
+
+        svd.write_text(source.replace("General-purpose I/Os (port B)", "GPIO port B"))
+        _age_outputs(yaml_root)
+        changed = _transmogrify(svd, root / "inc", "--incremental", "--reuse-derived", "--jobs", jobs)
+        assert _rewritten(yaml_root) == {"peripheral_GPIOB.yml"}
+        assert changed == _transmogrify(svd, root / "full", "--reuse-derived")
+        assert (root / "inc" / "name_map.yml").read_text() == (root / "full" / "name_map.yml").read_text()
+        assert yaml.safe_load(changed["peripheral_GPIOB.yml"])["peripheral"]["derived_from"] == "GPIOA"
+
+
+def test_transmogrify_incremental_follows_name_map_changes() -> None:
+    """Test that renaming an entry in the name map rebuilds only the peripherals that use it."""
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        yaml_root = root / "ymls"
+        _transmogrify(svd, root, "--incremental")
+        name_map = root / "name_map.yml"
+        name_map.write_text(name_map.read_text().replace("as_type: CNT", "as_type: Counter"))
+
+        _age_outputs(yaml_root)
+        outputs = _transmogrify(svd, root, "--incremental")
+
+    assert "name: Counter" in outputs["register_TIM2_CNT.yml"]
+    assert "type: Counter" in outputs["peripheral_TIM1.yml"]
+    assert not any(name.startswith(("register_GPIO", "enum_GPIO")) for name in _rewritten(yaml_root))
+
+
+def test_native_ir_generates_the_same_code_as_legacy_ir() -> None:
+    """Test that --ir-version 2 stores integers and generate renders it exactly like the hex-string IR."""
+    from peripheralyzer.generate import main as generate
+    from peripheralyzer.peripheral_duplicate_finder import collect_peripherals
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _transmogrify(svd, root / "legacy")
+        native_outputs = _transmogrify(svd, root / "native", "--ir-version", "2")
+
+        peripheral = yaml.safe_load(native_outputs["peripheral_TIM2.yml"])
+        assert peripheral["ir_version"] == 2
+        assert isinstance(peripheral["peripheral"]["base"], int)
+        assert all(isinstance(member["offset"], int) for member in peripheral["peripheral"]["members"])
+        assert yaml.safe_load(native_outputs["register_GPIOB_AFRH.yml"])["ir_version"] == 2
+
+        rendered = {}
+        for name in ("legacy", "native"):
+            out = root / name / "cpp"
+            argv = [
+                "-yr", str(root / name / "ymls"),
+                "-o", str(out),
+                "-t", "peripheral.hpp.jinja",
+                "-t", "peripheral.h.jinja",
+            ]
+            assert generate(argv) == 0
+            rendered[name] = {path.name: path.read_text() for path in sorted(out.iterdir())}
+        assert {"GPIOA.hpp", "TIM1.hpp", "TIM2.hpp"} <= set(rendered["legacy"])
+        assert rendered["native"] == rendered["legacy"]
+
+        legacy_records = collect_peripherals(root / "legacy" / "ymls")
+        native_records = collect_peripherals(root / "native" / "ymls")
+        assert [(r.base, r.signature) for r in native_records] == [(r.base, r.signature) for r in legacy_records]
+
+
+@pytest.mark.parametrize("ir_version", ["1", "2"])
+def test_named_padding_fills_gaps_narrower_than_the_default_type(ir_version: str) -> None:
+    """Test that named reserved padding after TIM1's 2 byte CNT register finishes and keeps the layout."""
+    from peripheralyzer.generate import main as generate
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _transmogrify(svd, root, "--ir-version", ir_version)
+        argv = ["-yr", str(root / "ymls"), "-y", "peripheral_TIM1.yml", "-o", str(root / "cpp"), "-t", "peripheral.hpp.jinja"]
+        assert generate(argv) == 0
+        rendered = (root / "cpp" / "TIM1.hpp").read_text()
+
+    assert "uint8_t _reserved_0xe[2]; // offset 0xeUL" in rendered
+    assert "uint32_t _reserved_0x10[252]; // offset 0x10UL" in rendered
+
+
+def test_bundle_output_matches_yaml_root() -> None:
+    """Test that --bundle holds the same documents, deduplicated, and generate/find-duplicates accept it."""
+    from peripheralyzer.bundle import DeviceBundle
+    from peripheralyzer.generate import main as generate
+    from peripheralyzer.peripheral_duplicate_finder import collect_peripherals
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        outputs = _transmogrify(svd, root / "files")
+        bundle_path = root / "bundled" / "device.yml"
+        assert _transmogrify(svd, root / "bundled", "--bundle", str(bundle_path)) == {}
+
+        bundle = DeviceBundle(bundle_path)
+        assert bundle.names() == sorted(outputs)
+        assert {name: bundle.text(name) for name in bundle.names()} == outputs
+        assert len(bundle_path.read_text()) < sum(len(text) for text in outputs.values())
+        assert bundle.glob("peripheral_GPIO*.yml") == ["peripheral_GPIOA.yml", "peripheral_GPIOB.yml"]
+
+        rendered = {}
+        for name, yaml_root in (("files", root / "files" / "ymls"), ("bundled", bundle_path)):
+            out = root / name / "cpp"
+            argv = ["-yr", str(yaml_root), "-o", str(out), "-t", "peripheral.hpp.jinja"]
+            assert generate(argv) == 0
+            rendered[name] = {path.name: path.read_text() for path in sorted(out.iterdir())}
+        assert rendered["bundled"] == rendered["files"]
+
+        records = collect_peripherals(root / "files" / "ymls")
+        bundled_records = collect_peripherals(bundle_path)
+        assert [(r.path.name, r.signature) for r in bundled_records] == [(r.path.name, r.signature) for r in records]
+
+
+@pytest.mark.parametrize("ir_version", ["1", "2"])
+def test_build_matches_transmogrify_then_generate(ir_version: str) -> None:
+    """Test that build renders the in-memory documents exactly like generate renders the yaml files."""
+    from peripheralyzer.build import main as build
+    from peripheralyzer.generate import main as generate
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    templates = ["-t", "peripheral.hpp.jinja", "-t", "peripheral.h.jinja"]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        outputs = _transmogrify(svd, root / "files", "--ir-version", ir_version)
+        argv = ["-yr", str(root / "files" / "ymls"), "-o", str(root / "files" / "cpp")]
+        assert generate([*argv, *templates]) == 0
+
+        (root / "built").mkdir()
+        side = root / "built" / "ymls"
+        argv = [
+            "-s", str(svd),
+            "-nm", str(root / "built" / "name_map.yml"),
+            "-ns", "test",
+            "--expand-name-map",
+            "--ir-version", ir_version,
+            "-o", str(root / "built" / "cpp"),
+        ]
+        assert build([*argv, *templates]) == 0
+        assert not side.exists()
+        assert build([*argv, *templates, "-yr", str(side)]) == 0
+
+        rendered = {
+            name: {path.name: path.read_text() for path in sorted((root / name / "cpp").iterdir())}
+            for name in ("files", "built")
+        }
+        assert {"GPIOA.hpp", "TIM1.hpp", "TIM2.hpp"} <= set(rendered["built"])
+        assert rendered["built"] == rendered["files"]
+        assert {path.name: path.read_text() for path in sorted(side.glob("*.yml"))} == outputs
+        assert (root / "built" / "name_map.yml").read_text() == (root / "files" / "name_map.yml").read_text()
+
+
+def test_dedupe_shares_identical_registers_and_generates_the_same_code() -> None:
+    """Test that --dedupe writes each distinct register/enum once and generate renders it unchanged."""
+    from peripheralyzer.generate import main as generate
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        outputs = _transmogrify(svd, root / "files")
+        deduped = _transmogrify(svd, root / "deduped", "--dedupe")
+        assert _transmogrify(svd, root / "parallel", "--dedupe", "-j", "2") == deduped
+
+        assert sorted(name for name in deduped if name.startswith("peripheral_")) == sorted(
+            name for name in outputs if name.startswith("peripheral_")
+        )
+        assert len(deduped) < len(outputs)
+        gpioa = yaml.safe_load(deduped["peripheral_GPIOA.yml"])["peripheral"]["registers"]
+        gpiob = yaml.safe_load(deduped["peripheral_GPIOB.yml"])["peripheral"]["registers"]
+        assert set(gpioa) & set(gpiob)
+        assert all(name in deduped for name in gpioa + gpiob)
+
+        rendered = {}
+        for name in ("files", "deduped"):
+            out = root / name / "cpp"
+            argv = ["-yr", str(root / name / "ymls"), "-o", str(out), "-t", "peripheral.hpp.jinja"]
+            assert generate(argv) == 0
+            rendered[name] = {path.name: path.read_text() for path in sorted(out.iterdir())}
+        assert rendered["deduped"] == rendered["files"]
+
+
+def test_reuse_derived_references_the_parent_registers() -> None:
+    """Test that --reuse-derived peripherals reference their parent's files and still generate the same code."""
+    from peripheralyzer.generate import main as generate
+    from peripheralyzer.peripheral_duplicate_finder import collect_peripherals
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        outputs = _transmogrify(svd, root / "files")
+        reused = _transmogrify(svd, root / "reused", "--reuse-derived")
+        assert _transmogrify(svd, root / "parallel", "--reuse-derived", "-j", "2") == reused
+        assert _transmogrify(svd, root / "stream", "--reuse-derived", "--stream") == reused
+        assert (root / "reused" / "name_map.yml").read_text() == (root / "files" / "name_map.yml").read_text()
+
+        assert not any(name.startswith(("register_GPIOB", "enum_GPIOB", "register_TIM2")) for name in reused)
+        assert set(reused) < set(outputs)
+        gpiob = yaml.safe_load(reused["peripheral_GPIOB.yml"])["peripheral"]
+        assert gpiob["derived_from"] == "GPIOA"
+        assert gpiob["registers"] == yaml.safe_load(reused["peripheral_GPIOA.yml"])["peripheral"]["registers"]
+
+        rendered = {}
+        for name in ("files", "reused"):
+            out = root / name / "cpp"
+            argv = ["-yr", str(root / name / "ymls"), "-o", str(out), "-t", "peripheral.hpp.jinja"]
+            assert generate(argv) == 0
+            rendered[name] = {path.name: path.read_text() for path in sorted(out.iterdir())}
+        assert rendered["reused"] == rendered["files"]
+
+        records = collect_peripherals(root / "files" / "ymls")
+        reused_records = collect_peripherals(root / "reused" / "ymls")
+        assert [r.raw_name for r in reused_records] == [r.raw_name for r in records]
+        groups = {r.raw_name: r.signature for r in reused_records}
+        assert groups["GPIOA"] == groups["GPIOB"]
+        assert groups["TIM1"] == groups["TIM2"]
+
+
+def test_reuse_derived_expands_peripherals_whose_names_are_overridden() -> None:
+    """Test that a name map override in the derived peripheral's context forces its own register files."""
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "name_map.yml").write_text(
+            "CNT:\n  as_type: CNT\n  as_variable: cnt\n  overrides:\n    TIM2.CNT:\n      as_type: Tim2Count\n"
+        )
+        reused = _transmogrify(svd, root, "--reuse-derived")
+
+    assert "derived_from" not in yaml.safe_load(reused["peripheral_TIM2.yml"])["peripheral"]
+    assert "name: Tim2Count" in reused["register_TIM2_CNT.yml"]
+    assert yaml.safe_load(reused["peripheral_GPIOB.yml"])["peripheral"]["derived_from"] == "GPIOA"
+
+
+_ARRAY_SVD = """<?xml version="1.0" encoding="utf-8"?>
+<device>
+  <name>ARR</name>
+  <addressUnitBits>8</addressUnitBits>
+  <width>32</width>
+  <size>32</size>
+  <peripherals>
+    <peripheral>
+      <name>DMA</name>
+      <baseAddress>0x40000000</baseAddress>
+      <addressBlock><offset>0</offset><size>0x100</size></addressBlock>
+      <registers>
+        <register>
+          <name>ISR</name>
+          <addressOffset>0x0</addressOffset>
+          <size>32</size>
+        </register>
+        <register>
+          <dim>4</dim>
+          <dimIncrement>4</dimIncrement>
+          <name>CH%s</name>
+          <description>Channel word</description>
+          <addressOffset>0x10</addressOffset>
+          <size>32</size>
+          <fields>
+            <field><name>VAL</name><bitOffset>0</bitOffset><bitWidth>16</bitWidth></field>
+          </fields>
+        </register>
+        <cluster>
+          <dim>2</dim>
+          <dimIncrement>0x10</dimIncrement>
+          <name>STREAM[%s]</name>
+          <description>Stream registers</description>
+          <addressOffset>0x40</addressOffset>
+          <register>
+            <name>CR</name>
+            <addressOffset>0x0</addressOffset>
+            <size>32</size>
+            <fields>
+              <field><name>EN</name><bitOffset>0</bitOffset><bitWidth>1</bitWidth></field>
+            </fields>
+          </register>
+          <register>
+            <name>NDTR</name>
+            <addressOffset>0x4</addressOffset>
+            <size>32</size>
+          </register>
+        </cluster>
+      </registers>
+    </peripheral>
+  </peripherals>
+</device>
+"""
+
+
+def test_compact_arrays_keep_dim_registers_and_clusters_whole() -> None:
+    """Test that --compact-arrays emits a counted member per dim array and a structure per cluster."""
+    from peripheralyzer.generate import main as generate
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        svd = root / "arrays.svd"
+        svd.write_text(_ARRAY_SVD)
+        expanded = _transmogrify(svd, root / "expanded")
+        compact = _transmogrify(svd, root / "compact", "--compact-arrays")
+        assert _transmogrify(svd, root / "stream", "--compact-arrays", "--stream") == compact
+
+        assert "register_DMA_CH3.yml" in expanded
+        assert "register_DMA_STREAM[1]_NDTR.yml" in expanded
+        assert len(compact) < len(expanded)
+        assert sorted(compact) == [
+            "peripheral_DMA.yml",
+            "register_DMA_CH.yml",
+            "register_DMA_ISR.yml",
+            "register_DMA_STREAM_CR.yml",
+            "register_DMA_STREAM_NDTR.yml",
+            "structure_DMA_STREAM.yml",
+        ]
+        peripheral = yaml.safe_load(compact["peripheral_DMA.yml"])["peripheral"]
+        members = {member["name"]: member for member in peripheral["members"]}
+        assert [(m["offset"], m["count"], m["sizeof"]) for m in members.values()] == [
+            ("0x0", 1, "0x4"),
+            ("0x10", 4, "0x10"),
+            ("0x40", 2, "0x20"),
+        ]
+        assert peripheral["structures"] == ["structure_DMA_STREAM.yml"]
+        stream = yaml.safe_load(compact["structure_DMA_STREAM.yml"])
+        assert stream["sizeof"] == "0x10"
+        assert [(m["offset"], m["count"]) for m in stream["members"]] == [("0x0", 1), ("0x4", 1)]
+        assert sorted(stream["registers"]) == ["register_DMA_STREAM_CR.yml", "register_DMA_STREAM_NDTR.yml"]
+
+        out = root / "cpp"
+        argv = ["-yr", str(root / "compact" / "ymls"), "-o", str(out), "-t", "peripheral.hpp.jinja"]
+        assert generate(argv) == 0
+        header = (out / "DMA.hpp").read_text()
+        assert "[4];" in header
+        assert "[2];" in header
+
+
+def _ninja_edges(text: str) -> dict[str, tuple[list[str], list[str]]]:
+    """(outputs, explicit and implicit inputs) of each build edge, keyed by its first output."""
+    edges = {}
+    for line in text.replace(" $\n    ", " ").splitlines():
+        if line.startswith("build "):
+            outputs, _, rest = line[len("build "):].partition(": ")
+            rule, *inputs = rest.split()
+            edges[outputs.split()[0]] = (outputs.split(), [path for path in inputs if path != "|"])
+    return edges
+
+
+def _referenced_yaml(outputs: dict[str, str], yaml_file: str) -> set[str]:
+    """yaml_file and every register, enum and structure document it references, transitively."""
+    document = yaml.safe_load(outputs[yaml_file])
+    top = document.get("peripheral", document)
+    found = {yaml_file}
+    for key in ("registers", "structures", "enums"):
+        for name in top.get(key) or []:
+            found |= _referenced_yaml(outputs, name)
+    return found
+
+
+@pytest.mark.parametrize("extra", [(), ("-j", "2"), ("--reuse-derived",), ("--dedupe", "--compact-arrays")])
+def test_emit_ninja_lists_the_exact_yaml_inputs_of_each_peripheral(extra: tuple[str, ...]) -> None:
+    """Test that --emit-ninja gives every generate edge exactly the yaml files its peripherals reference."""
+    from peripheralyzer.transmogrify import main
+
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        outputs = _transmogrify(svd, root, *extra)
+        ninja = root / "device.ninja"
+        argv = [
+            "-s", str(svd),
+            "-yr", "ymls",
+            "-nm", str(root / "name_map.yml"),
+            "-ns", "test",
+            "--emit-ninja", str(ninja),
+            "--fragment-cpp-root", "cpp",
+            "--ninja-batches", "4",
+            *extra,
+        ]
+        assert main(argv) == 0
+        text = ninja.read_text()
+
+    assert "pool _peripherals_generate\n  depth = 4\n" in text
+    assert "--depfile $depfile" in text and "  deps = gcc\n" in text
+    assert "  depfile = cpp/._peripherals_3.d\n" in text
+    edges = _ninja_edges(text)
+    yaml_outputs, yaml_inputs = edges["ymls/" + min(outputs)]
+    assert yaml_outputs == [f"ymls/{name}" for name in sorted(outputs)]
+    assert yaml_inputs == [str(svd), str(root / "name_map.yml")]
+
+    generated = [edge for edge in edges.values() if edge[0][0].startswith("cpp/")]
+    assert [outputs for outputs, _ in generated] == [[f"cpp/{name}.hpp"] for name in ("TIM1", "TIM2", "GPIOA", "GPIOB")]
+    for (header,), inputs in generated:
+        yaml_file = f"peripheral_{Path(header).stem}.yml"
+        assert inputs[0] == f"ymls/{yaml_file}"
+        assert sorted(inputs) == sorted(f"ymls/{name}" for name in _referenced_yaml(outputs, yaml_file))
+    assert edges["_peripherals"][1] == [f"cpp/{name}.hpp" for name in ("TIM1", "TIM2", "GPIOA", "GPIOB")]
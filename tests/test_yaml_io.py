@@ -0,0 +1,49 @@
+"""Tests for the shared YAML serialization layer."""
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from peripheralyzer.transmogrify import main as transmogrify
+from peripheralyzer.yaml_io import SortedSequenceRepresenter, safe_dump, safe_load, sorted_dump
+
+
+class PureSortedSafeDumper(SortedSequenceRepresenter, yaml.SafeDumper):
+    pass
+
+
+def _documents() -> list[object]:
+    """Every yaml document transmogrify writes for the test device: yaml files, manifest and name map."""
+    svd = Path(__file__).parent / "data" / "device_test.svd"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        argv = ["-s", str(svd), "-yr", str(root / "ymls"), "-nm", str(root / "map.yml"), "--expand-name-map"]
+        assert transmogrify([*argv, "--incremental"]) == 0
+        paths = sorted((root / "ymls").glob("*.yml")) + [root / "map.yml"]
+        return [yaml.load(path.read_text(), Loader=yaml.SafeLoader) for path in paths]
+
+
+def test_dumps_are_byte_identical_to_the_pure_python_dumper() -> None:
+    """Test that whichever backend is selected writes exactly what the pure-Python safe dumper writes."""
+    extra = {"text": "naïve ünïcode", "multi": "a\nb", "empty": [], "flags": [True, None], "big": 2**40}
+    for document in [*_documents(), extra]:
+        assert safe_dump(document) == yaml.dump(document, Dumper=yaml.SafeDumper)
+        assert safe_dump(document, sort_keys=False) == yaml.dump(document, Dumper=yaml.SafeDumper, sort_keys=False)
+
+    name_map = _documents()[-1]
+    assert sorted_dump(name_map, sort_keys=True) == yaml.dump(name_map, Dumper=PureSortedSafeDumper, sort_keys=True)
+
+
+def test_safe_load_matches_the_pure_python_loader() -> None:
+    """Test that loading round-trips to the same data as the pure-Python safe loader."""
+    for document in _documents():
+        text = safe_dump(document)
+        assert safe_load(text) == yaml.load(text, Loader=yaml.SafeLoader) == document
+
+
+def test_sorted_dump_sorts_string_sequences() -> None:
+    """Test that sequences of strings are written sorted and other sequences keep their order."""
+    text = sorted_dump({"contexts": ["b", "a"], "offsets": [2, 1]})
+    assert safe_load(text) == {"contexts": ["a", "b"], "offsets": [2, 1]}